@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class AdminConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "admin"
+
+    def ready(self):
+        from admin.hierarchy import connect_signals
+
+        connect_signals()
@@ -0,0 +1,182 @@
+"""
+Institution → department → course → module tree, built in a fixed number of
+queries and cached per institution. Changes to links, departments, courses or
+modules drop only the trees of the institutions they belong to, once their
+transaction commits. Dropped any earlier, a concurrent read could cache the
+old tree again for up to HIERARCHY_CACHE_TIMEOUT.
+"""
+
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from admin.models import (
+    Course,
+    CourseDepartmentLink,
+    Department,
+    Institution,
+    InstitutionCourseLink,
+    InstitutionDepartmentLink,
+    Module,
+)
+from quizverse_backend.routers import primary_reads
+
+
+def hierarchy_key(institution_id):
+    return f"hierarchy:{institution_id}"
+
+
+def hierarchy_querysets(institution_id):
+    """
+    The queries build_hierarchy() runs for an institution, by name.
+    """
+    return {
+        "institution": Institution.objects.filter(id=institution_id).values(
+            "id", "name"
+        ),
+        "departments": InstitutionDepartmentLink.objects.filter(
+            institution_id=institution_id
+        )
+        .order_by("department__name")
+        .values_list("department_id", "department__name"),
+        "courses": InstitutionCourseLink.objects.filter(institution_id=institution_id)
+        .order_by("course__class_or_semester", "course__name")
+        .values_list(
+            "course_id", "course__name", "course__code", "course__class_or_semester"
+        ),
+        "modules": Module.objects.filter(
+            course__institutioncourselink__institution_id=institution_id
+        )
+        .order_by("module_number")
+        .values_list("id", "module_number", "module_name", "course_id"),
+        "placements": CourseDepartmentLink.objects.filter(
+            department__institutiondepartmentlink__institution_id=institution_id,
+            course__institutioncourselink__institution_id=institution_id,
+        ).values_list("department_id", "course_id"),
+    }
+
+
+def build_hierarchy(institution_id):
+    """
+    Returns the tree of the institution, or None if it does not exist.
+    Courses of the institution not linked to any of its departments are
+    listed under the institution itself.
+    """
+    queries = hierarchy_querysets(institution_id)
+    if (institution := queries["institution"].first()) is None:
+        return None
+
+    departments = {
+        department_id: {"id": str(department_id), "name": name, "courses": []}
+        for department_id, name in queries["departments"]
+    }
+    courses = {}
+    for course_id, name, code, class_or_semester in queries["courses"]:
+        courses[course_id] = {
+            "id": str(course_id),
+            "name": name,
+            "code": code,
+            "class_or_semester": class_or_semester,
+            "modules": [],
+        }
+
+    for module_id, number, name, course_id in queries["modules"]:
+        courses[course_id]["modules"].append(
+            {"id": str(module_id), "module_number": number, "module_name": name}
+        )
+
+    departments_of_course = defaultdict(set)
+    for department_id, course_id in queries["placements"]:
+        departments_of_course[course_id].add(department_id)
+
+    # Courses are walked once, in order, into each of their departments
+    unplaced = []
+    for course_id, course in courses.items():
+        placed_in = departments_of_course[course_id] & departments.keys()
+        for department_id in placed_in:
+            departments[department_id]["courses"].append(course)
+        if not placed_in:
+            unplaced.append(course)
+
+    return {
+        "id": str(institution["id"]),
+        "name": institution["name"],
+        "departments": list(departments.values()),
+        "courses": unplaced,
+    }
+
+
+def get_hierarchy(institution_id):
+    key = hierarchy_key(institution_id)
+    if (tree := cache.get(key)) is None:
+        with primary_reads():
+            tree = build_hierarchy(institution_id)
+        if tree is not None:
+            cache.set(key, tree, settings.HIERARCHY_CACHE_TIMEOUT)
+    return tree
+
+
+async def aget_hierarchy(institution_id):
+    if (tree := await cache.aget(hierarchy_key(institution_id))) is None:
+        tree = await sync_to_async(get_hierarchy)(institution_id)
+    return tree
+
+
+def invalidate_hierarchy(institution_ids):
+    # Resolved now, the rows they come from may be gone by the commit
+    keys = [hierarchy_key(pk) for pk in set(institution_ids)]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def institutions_of_courses(*course_ids):
+    return InstitutionCourseLink.objects.filter(course_id__in=course_ids).values_list(
+        "institution_id", flat=True
+    )
+
+
+def institutions_of_departments(*department_ids):
+    return InstitutionDepartmentLink.objects.filter(
+        department_id__in=department_ids
+    ).values_list("institution_id", flat=True)
+
+
+def on_institution_change(sender, instance, **kwargs):
+    invalidate_hierarchy([instance.pk])
+
+
+def on_institution_link_change(sender, instance, **kwargs):
+    invalidate_hierarchy([instance.institution_id])
+
+
+def on_course_change(sender, instance, **kwargs):
+    invalidate_hierarchy(institutions_of_courses(instance.pk))
+
+
+def on_department_change(sender, instance, **kwargs):
+    invalidate_hierarchy(institutions_of_departments(instance.pk))
+
+
+def on_course_child_change(sender, instance, **kwargs):
+    invalidate_hierarchy(institutions_of_courses(instance.course_id))
+
+
+def connect_signals():
+    receivers = [
+        (on_institution_change, [Institution]),
+        (
+            on_institution_link_change,
+            [InstitutionDepartmentLink, InstitutionCourseLink],
+        ),
+        (on_course_change, [Course]),
+        (on_department_change, [Department]),
+        (on_course_child_change, [CourseDepartmentLink, Module]),
+    ]
+    for receiver, models in receivers:
+        for model in models:
+            uid = f"hierarchy:{model.__name__}"
+            post_save.connect(receiver, sender=model, dispatch_uid=uid)
+            post_delete.connect(receiver, sender=model, dispatch_uid=uid)
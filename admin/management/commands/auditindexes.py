@@ -0,0 +1,198 @@
+import re
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+from admin.hierarchy import hierarchy_querysets
+from admin.models import (
+    CourseDepartmentLink,
+    CourseFacultyLink,
+    FacultyDepartmentLink,
+    Module,
+    StudentDepartmentLink,
+)
+from admin.visibility import visible_courses
+from quiz_viva.analytics import item_querysets, qbank_responses, quiz_responses
+from quiz_viva.duplicates import course_questions
+from quiz_viva.models import Answer, CourseResultSummary, Question, QuestionBank
+from quiz_viva.results import student_results, submitted_responses
+from users.models import (
+    Token,
+    User,
+    UserCommunityLink,
+    UserInstitutionLink,
+    VerificationToken,
+)
+
+PLACEHOLDER_ID = "00000000-0000-0000-0000-000000000000"
+
+SEQUENTIAL_SCAN = {
+    "sqlite": re.compile(r"\bSCAN (\w+)$"),
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+}
+
+UNINDEXED_SORT = {
+    "sqlite": re.compile(r"USE TEMP B-TREE FOR ORDER BY"),
+    "postgresql": re.compile(r"^(?:->\s+)?Sort\s+\("),
+}
+
+
+def endpoint_queries():
+    """
+    The filtered lookups issued by each endpoint, built wherever possible by
+    the same functions the endpoints call. Unfiltered listings such as
+    /auth/users and the admin view of /admin/course are left out since they
+    are expected to read the whole table.
+    """
+    queries = [
+        ("auth.get_user", User.objects.filter(id=PLACEHOLDER_ID)),
+        (
+            "auth.login",
+            User.objects.filter(Q(username="user") | Q(email="user")),
+        ),
+        (
+            "auth.verify_token",
+            Token.objects.filter(user_id=PLACEHOLDER_ID, access_token="token"),
+        ),
+        (
+            "auth.verify_email",
+            VerificationToken.objects.filter(
+                token="token",
+                token_type="verify",
+                created_at__gte=VerificationToken.oldest_kept(),
+            ),
+        ),
+        (
+            "auth.get_role_request",
+            UserInstitutionLink.objects.filter(
+                user_id=PLACEHOLDER_ID, accepted=False
+            ).values_list("institution__name", "role__name"),
+        ),
+        (
+            "auth.get_role_request",
+            UserCommunityLink.objects.filter(
+                user_id=PLACEHOLDER_ID, accepted=False
+            ).values_list("community__name", "role__name"),
+        ),
+        (
+            "affiliation",
+            FacultyDepartmentLink.objects.filter(faculty_id=PLACEHOLDER_ID),
+        ),
+        (
+            "affiliation",
+            CourseFacultyLink.objects.filter(faculty_id=PLACEHOLDER_ID),
+        ),
+        (
+            "affiliation",
+            StudentDepartmentLink.objects.filter(student_id=PLACEHOLDER_ID),
+        ),
+        (
+            "affiliation",
+            CourseDepartmentLink.objects.filter(
+                department_id__in=[PLACEHOLDER_ID], course__class_or_semester=1
+            ),
+        ),
+    ]
+    queries += [
+        (f"admin.get_course as {role}", visible_courses(PLACEHOLDER_ID, [role]))
+        for role in ["Institution", "Faculty", "Student"]
+    ]
+    queries += [
+        (f"admin.get_institution_hierarchy {name}", queryset)
+        for name, queryset in hierarchy_querysets(PLACEHOLDER_ID).items()
+    ]
+    queries += [
+        (
+            "admin.get_modules",
+            Module.objects.filter(course_id=PLACEHOLDER_ID).order_by("module_number"),
+        ),
+        (
+            "quiz.get_qbank",
+            QuestionBank.objects.filter(creator_id=PLACEHOLDER_ID),
+        ),
+        (
+            "quiz.get_question",
+            Question.objects.filter(
+                qbank_id=PLACEHOLDER_ID,
+                qbank__creator_id=PLACEHOLDER_ID,
+                qbank__deleting_at__isnull=True,
+            ).order_by("question_number"),
+        ),
+        (
+            "quiz.get_answer",
+            Answer.objects.filter(
+                question_id=PLACEHOLDER_ID, question__qbank__deleting_at__isnull=True
+            ).order_by("answer_number"),
+        ),
+        (
+            "quiz.submit_responses",
+            submitted_responses(PLACEHOLDER_ID, PLACEHOLDER_ID),
+        ),
+        ("quiz.get_results", student_results(PLACEHOLDER_ID)),
+        ("quiz.get_results", student_results(PLACEHOLDER_ID, PLACEHOLDER_ID)),
+        (
+            "quiz.get_course_results",
+            CourseResultSummary.objects.filter(course_id=PLACEHOLDER_ID),
+        ),
+        ("quiz.get_duplicates", course_questions(PLACEHOLDER_ID)),
+        (
+            "quiz.get_duplicates",
+            course_questions(PLACEHOLDER_ID).filter(qbank__creator_id=PLACEHOLDER_ID),
+        ),
+    ]
+    for source, (responses, questions) in [
+        ("quiz_or_viva", quiz_responses(PLACEHOLDER_ID)),
+        ("qbank", qbank_responses(PLACEHOLDER_ID)),
+    ]:
+        queries.append((f"quiz.get_analytics of a {source}", responses))
+        queries += [
+            (f"quiz.get_analytics of a {source}", queryset)
+            for queryset in item_querysets(questions)
+        ]
+    return queries
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN on the queries issued by each endpoint and report "
+        "sequential scans and sorts not served by an index. Run it against a "
+        "seeded database, the PostgreSQL planner prefers sequential scans on "
+        "near empty tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--show-plans",
+            dest="show_plans",
+            action="store_true",
+            help="Print the full plan of every query.",
+        )
+
+    def handle(self, *args, **options):
+        scan_pattern = SEQUENTIAL_SCAN.get(connection.vendor)
+        sort_pattern = UNINDEXED_SORT.get(connection.vendor)
+        if scan_pattern is None:
+            self.stdout.write(f"Unsupported database vendor: {connection.vendor}")
+            return
+
+        findings = 0
+        for endpoint, queryset in endpoint_queries():
+            plan = queryset.explain()
+            if options["show_plans"]:
+                self.stdout.write(f"{endpoint}\n{plan}\n")
+            for line in plan.splitlines():
+                line = line.strip()
+                if match := scan_pattern.search(line):
+                    message = f"{endpoint}: sequential scan on {match.group(1)}"
+                elif sort_pattern.search(line):
+                    message = f"{endpoint}: sort not served by an index"
+                else:
+                    continue
+                findings += 1
+                self.stdout.write(self.style.WARNING(message))
+
+        if findings:
+            self.stdout.write(f"{findings} finding(s)")
+        else:
+            self.stdout.write(self.style.SUCCESS("No sequential scans or sorts found"))
@@ -0,0 +1,454 @@
+import asyncio
+import gc
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+
+from quizverse_backend.databases import sqlite_profile
+from users.models import Role, User
+from utils.ids import uuid7
+
+BENCHMARKS = ["keys", "ids", "connections", "async"]
+
+# Served by async views since they were converted
+ASYNC_ENDPOINTS = ["/api/v1/auth/user", "/api/v1/admin/education-system"]
+
+
+def milliseconds(seconds):
+    return f"{seconds * 1000:.2f} ms"
+
+
+def index_bytes(cursor, table):
+    """
+    Size of the indexes of table, or None where the backend cannot tell.
+    """
+    if connection.vendor == "postgresql":
+        cursor.execute("SELECT pg_indexes_size(%s)", [table])
+        return cursor.fetchone()[0]
+    try:
+        cursor.execute(
+            "SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+            "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s)",
+            [table],
+        )
+    except Exception:
+        # SQLite built without the dbstat table
+        return None
+    return cursor.fetchone()[0]
+
+
+def insert_rows(cursor, table, columns, rows, batch_size=1000):
+    placeholders = ", ".join(["%s"] * len(columns))
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    for start in range(0, len(rows), batch_size):
+        with transaction.atomic():
+            cursor.executemany(sql, rows[start : start + batch_size])
+
+
+def median_time(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return (
+        timings[len(timings) // 2],
+        timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+    )
+
+
+def sqlite_writers(path, connect, threads, transactions):
+    """
+    Transactions per second of threads each committing an insert and a count
+    on their own connection, and the number that failed on a locked database.
+    """
+    setup = sqlite3.connect(path)
+    setup.execute("CREATE TABLE IF NOT EXISTS benchmark (id INTEGER PRIMARY KEY, n)")
+    setup.close()
+    failures = []
+
+    def write():
+        db = connect(path)
+        for n in range(transactions):
+            try:
+                with db:
+                    db.execute("INSERT INTO benchmark (n) VALUES (?)", [n])
+                    db.execute("SELECT COUNT(*) FROM benchmark").fetchone()
+            except sqlite3.OperationalError:
+                failures.append(n)
+        db.close()
+
+    workers = [threading.Thread(target=write) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    return (threads * transactions - len(failures)) / elapsed, len(failures)
+
+
+def rss_bytes():
+    """
+    Resident set size of this process, or None where /proc is missing.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class RSSSampler(threading.Thread):
+    """
+    Samples the resident set size every interval seconds while used as a
+    context manager, keeping the size at entry and the peak.
+    """
+
+    def __init__(self, interval=0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.done = threading.Event()
+        gc.collect()
+        self.baseline = self.peak = rss_bytes()
+
+    def run(self):
+        while not self.done.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes())
+
+    def __enter__(self):
+        if self.baseline is not None:
+            self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.baseline is not None:
+            self.done.set()
+            self.join()
+            self.peak = max(self.peak, rss_bytes())
+
+    def growth(self):
+        return None if self.baseline is None else self.peak - self.baseline
+
+
+def concurrency_levels(concurrency):
+    levels = []
+    level = 1
+    while level < concurrency:
+        levels.append(level)
+        level *= 2
+    return levels + [max(concurrency, 1)]
+
+
+def connect_default(path):
+    return sqlite3.connect(path)
+
+
+def connect_tuned(path):
+    options = sqlite_profile(path)["OPTIONS"]
+    db = sqlite3.connect(
+        path,
+        timeout=options["timeout"],
+        isolation_level=options["transaction_mode"],
+        check_same_thread=False,
+    )
+    db.executescript(options["init_command"])
+    return db
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the storage and access choices made for the database. Creates "
+        "tables and rows named benchmark* in the configured database and "
+        "removes them afterwards, so run it against a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "benchmarks",
+            nargs="*",
+            help=f"Benchmarks to run out of {', '.join(BENCHMARKS)}, all by default.",
+        )
+        parser.add_argument(
+            "--rows",
+            dest="rows",
+            type=int,
+            default=100000,
+            help="Rows inserted by the keys and ids benchmarks.",
+        )
+        parser.add_argument(
+            "--requests",
+            dest="requests",
+            type=int,
+            default=1000,
+            help="Repetitions per measurement.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            dest="concurrency",
+            type=int,
+            default=8,
+            help=(
+                "Concurrent writers, or the most concurrent clients; the async "
+                "benchmark doubles from 1 up to it."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        names = options["benchmarks"] or BENCHMARKS
+        if unknown := set(names) - set(BENCHMARKS):
+            raise CommandError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+        self.stdout.write(f"Database: {connection.vendor}")
+        for name in names:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            getattr(self, f"benchmark_{name}")(**options)
+
+    def benchmark_keys(self, rows, **options):
+        """
+        Index size and join latency of 36 character text keys against the
+        native type UUIDField stores keys as.
+        """
+        native = models.UUIDField()
+        parent_ids = [uuid7() for _ in range(max(rows // 10, 1))]
+        child_ids = [uuid7() for _ in range(rows)]
+        parents = [random.choice(parent_ids) for _ in child_ids]
+        sample = random.sample(parent_ids, min(50, len(parent_ids)))
+        storages = {
+            "varchar(36)": ("varchar(36)", str),
+            native.db_type(connection): (
+                native.db_type(connection),
+                lambda value: native.get_db_prep_value(value, connection),
+            ),
+        }
+        for label, (column_type, prepare) in storages.items():
+            with connection.cursor() as cursor:
+                try:
+                    cursor.execute(
+                        f"CREATE TABLE benchmark_parent (id {column_type} PRIMARY KEY)"
+                    )
+                    cursor.execute(
+                        f"CREATE TABLE benchmark_child (id {column_type} PRIMARY KEY, "
+                        f"parent_id {column_type} NOT NULL)"
+                    )
+                    cursor.execute(
+                        "CREATE INDEX benchmark_child_parent "
+                        "ON benchmark_child (parent_id)"
+                    )
+                    insert_rows(
+                        cursor,
+                        "benchmark_parent",
+                        ["id"],
+                        [[prepare(pk)] for pk in parent_ids],
+                    )
+                    insert_rows(
+                        cursor,
+                        "benchmark_child",
+                        ["id", "parent_id"],
+                        [
+                            [prepare(pk), prepare(parent)]
+                            for pk, parent in zip(child_ids, parents)
+                        ],
+                    )
+                    if connection.vendor == "postgresql":
+                        cursor.execute("ANALYZE benchmark_parent")
+                        cursor.execute("ANALYZE benchmark_child")
+                    size = index_bytes(cursor, "benchmark_child")
+                    placeholders = ", ".join(["%s"] * len(sample))
+                    lookup = median_time(
+                        lambda: cursor.execute(
+                            "SELECT COUNT(*) FROM benchmark_child c JOIN "
+                            "benchmark_parent p ON p.id = c.parent_id "
+                            f"WHERE p.id IN ({placeholders})",
+                            [prepare(pk) for pk in sample],
+                        ),
+                        options["requests"] // 10 or 1,
+                    )
+                    full = median_time(
+                        lambda: cursor.execute(
+                            "SELECT COUNT(*) FROM benchmark_child c JOIN "
+                            "benchmark_parent p ON p.id = c.parent_id"
+                        ),
+                        5,
+                    )
+                finally:
+                    cursor.execute("DROP TABLE IF EXISTS benchmark_child")
+                    cursor.execute("DROP TABLE IF EXISTS benchmark_parent")
+            self.stdout.write(
+                f"{label}: child indexes {size if size is None else f'{size} bytes'}, "
+                f"join of {len(sample)} parents {milliseconds(lookup)}, "
+                f"full join {milliseconds(full)}"
+            )
+
+    def benchmark_ids(self, rows, **options):
+        """
+        Insert throughput and primary key index size of random and
+        time-ordered ids.
+        """
+        native = models.UUIDField()
+        column_type = native.db_type(connection)
+        for label, generate in [("uuid4", uuid.uuid4), ("uuid7", uuid7)]:
+            ids = [
+                [native.get_db_prep_value(generate(), connection), n]
+                for n in range(rows)
+            ]
+            with connection.cursor() as cursor:
+                try:
+                    cursor.execute(
+                        f"CREATE TABLE benchmark_ids (id {column_type} PRIMARY KEY, "
+                        "n integer NOT NULL)"
+                    )
+                    start = time.perf_counter()
+                    insert_rows(cursor, "benchmark_ids", ["id", "n"], ids)
+                    elapsed = time.perf_counter() - start
+                    size = index_bytes(cursor, "benchmark_ids")
+                finally:
+                    cursor.execute("DROP TABLE IF EXISTS benchmark_ids")
+            self.stdout.write(
+                f"{label}: {rows / elapsed:.0f} rows/s, primary key index "
+                f"{size if size is None else f'{size} bytes'}"
+            )
+
+    def benchmark_connections(self, requests, concurrency, **options):
+        """
+        Query throughput with a connection kept open against one opened per
+        request, and on SQLite concurrent writers with and without the
+        profile's busy timeout, write lock and PRAGMAs.
+        """
+
+        def query():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+
+        connection.close()
+        for label, reconnect in [("persistent", False), ("per request", True)]:
+            start = time.perf_counter()
+            for _ in range(requests):
+                query()
+                if reconnect:
+                    connection.close()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{label} connection: {requests / elapsed:.0f} queries/s")
+        connection.close()
+
+        if connection.vendor != "sqlite":
+            return
+        transactions = max(requests // concurrency, 1)
+        for label, connect in [("default", connect_default), ("tuned", connect_tuned)]:
+            with tempfile.TemporaryDirectory() as directory:
+                rate, failures = sqlite_writers(
+                    Path(directory) / "benchmark.sqlite3",
+                    connect,
+                    concurrency,
+                    transactions,
+                )
+            self.stdout.write(
+                f"{label} SQLite, {concurrency} writers: {rate:.0f} "
+                f"transactions/s, {failures} failed on a locked database"
+            )
+
+    @override_settings(ALLOWED_HOSTS=["testserver"])
+    def benchmark_async(self, requests, concurrency, **options):
+        """
+        Latency of the async endpoints served through the WSGI handler, which
+        runs them in an event loop per request, and the ASGI handler, at each
+        concurrency level. Memory is the growth of this process's resident
+        set over the run divided by the number of concurrent clients; the
+        clients run in the same process, and memory freed by an earlier level
+        is reused by later ones, so it is a rough figure.
+        """
+        password = uuid.uuid4().hex
+        user = User.objects.create(
+            username=f"benchmark-{uuid.uuid4().hex[:12]}@example.com",
+            email=f"benchmark-{uuid.uuid4().hex[:12]}",
+            password=make_password(password),
+            is_verified=True,
+        )
+        # The admin endpoints check roles too
+        user.role.add(*Role.objects.filter(name="Admin"))
+        try:
+            token = (
+                Client()
+                .post(
+                    "/api/v1/auth/login/",
+                    {"username_or_email": user.username, "password": password},
+                    content_type="application/json",
+                )
+                .json()["access_token"]
+            )
+            headers = {"Authorization": f"Bearer {token}"}
+            for path in ASYNC_ENDPOINTS:
+                for level in concurrency_levels(concurrency):
+                    with RSSSampler() as memory:
+                        measurement = self.wsgi(path, headers, requests, level)
+                    self.report(f"{path} WSGI x{level}", measurement, memory, level)
+                    with RSSSampler() as memory:
+                        measurement = asyncio.run(
+                            self.asgi(path, headers, requests, level)
+                        )
+                    self.report(f"{path} ASGI x{level}", measurement, memory, level)
+        finally:
+            user.delete()
+
+    def wsgi(self, path, headers, requests, concurrency):
+        local = threading.local()
+
+        def get(_):
+            if not hasattr(local, "client"):
+                local.client = Client()
+            start = time.perf_counter()
+            status = local.client.get(path, headers=headers).status_code
+            return time.perf_counter() - start, status
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            timings = list(executor.map(get, range(requests)))
+        return timings, time.perf_counter() - start
+
+    async def asgi(self, path, headers, requests, concurrency):
+        client = AsyncClient()
+        slots = asyncio.Semaphore(concurrency)
+
+        async def get():
+            async with slots:
+                start = time.perf_counter()
+                status = (await client.get(path, headers=headers)).status_code
+                return time.perf_counter() - start, status
+
+        start = time.perf_counter()
+        timings = await asyncio.gather(*(get() for _ in range(requests)))
+        return timings, time.perf_counter() - start
+
+    def report(self, label, measurement, memory, concurrency):
+        responses, elapsed = measurement
+        median, p95 = percentiles([seconds for seconds, _ in responses])
+        failed = sum(status != 200 for _, status in responses)
+        growth = memory.growth()
+        self.stdout.write(
+            f"{label}: {len(responses) / elapsed:.0f} requests/s, "
+            f"p50 {milliseconds(median)}, p95 {milliseconds(p95)}, "
+            + (
+                "RSS unavailable"
+                if growth is None
+                else f"RSS +{growth / 1024:.0f} KiB, "
+                f"{growth / 1024 / concurrency:.0f} KiB per connection"
+            )
+            + (f", {failed} failed" if failed else "")
+        )
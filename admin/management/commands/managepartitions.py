@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from utils.partitions import maintain_partitions, supports_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Create upcoming monthly partitions and drop expired ones of the "
+        "tables partitioned on PostgreSQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ahead",
+            dest="ahead",
+            type=int,
+            default=None,
+            help="Months of partitions to create in advance.",
+        )
+
+    def handle(self, *args, **options):
+        if not supports_partitions():
+            self.stdout.write(
+                f"Tables are not partitioned on {connection.vendor}, nothing to do"
+            )
+            return
+        for table, changes in maintain_partitions(ahead=options["ahead"]).items():
+            self.stdout.write(
+                f"{table}: created {', '.join(changes['created']) or 'none'}, "
+                f"dropped {', '.join(changes['dropped']) or 'none'}, "
+                f"{changes['default_rows']} rows in the default partition"
+            )
@@ -0,0 +1,111 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:48
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("admin", "0007_rename_instituion_type_institution_institution_type"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="community",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="course",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="coursedepartmentlink",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="coursefacultylink",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="department",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="educationsystem",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="faculty",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="facultydepartmentlink",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="institution",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="institutioncourselink",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="institutiondepartmentlink",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="module",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="student",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="studentdepartmentlink",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("admin", "0009_time_ordered_ids"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(
+                fields=["class_or_semester"], name="course_semester_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="coursefacultylink",
+            index=models.Index(fields=["faculty", "course"], name="faculty_course_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="facultydepartmentlink",
+            index=models.Index(
+                fields=["faculty", "department"], name="faculty_department_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="module",
+            index=models.Index(
+                fields=["course", "module_number"], name="module_course_number_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="studentdepartmentlink",
+            index=models.Index(
+                fields=["student", "department"], name="student_department_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:22
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_modules(apps, schema_editor):
+    Course = apps.get_model("admin", "Course")
+    Module = apps.get_model("admin", "Module")
+    modules = (
+        Module.objects.filter(course=OuterRef("pk"))
+        .values("course")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Course.objects.update(module_count=Coalesce(Subquery(modules), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("admin", "0010_access_pattern_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="module_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_modules, migrations.RunPython.noop),
+    ]
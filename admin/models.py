@@ -1,6 +1,7 @@
-import uuid
 from django.db import models
 
+from utils.ids import generate_id
+
 
 # Create your models here.
 class Institution(models.Model):
@@ -9,7 +10,7 @@ class Institution(models.Model):
         ("COLLEGE", "college"),
     ]
 
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     name = models.CharField(max_length=100, unique=True)
     place = models.CharField(max_length=100)
     institution_type = models.CharField(max_length=7, choices=TYPE_CHOICES)
@@ -24,7 +25,7 @@ class Institution(models.Model):
 
 
 class EducationSystem(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     name = models.CharField(max_length=100, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -46,7 +47,7 @@ class Community(models.Model):
         ("SERVICE", "service"),
     ]
 
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     name = models.CharField(max_length=100, unique=True)
     level = models.CharField(max_length=100)
     community_type = models.CharField(max_length=100)
@@ -58,7 +59,7 @@ class Community(models.Model):
 
 
 class Department(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     name = models.CharField(max_length=100, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -68,7 +69,7 @@ class Department(models.Model):
 
 
 class Faculty(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     faculty_id = models.CharField(max_length=100)
     user = models.OneToOneField("users.User", on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -79,7 +80,7 @@ class Faculty(models.Model):
 
 
 class Student(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     roll_number = models.CharField(max_length=100)
     class_or_semester = models.IntegerField()
     user = models.OneToOneField("users.User", on_delete=models.CASCADE)
@@ -91,7 +92,7 @@ class Student(models.Model):
 
 
 class FacultyDepartmentLink(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     faculty = models.ForeignKey("Faculty", on_delete=models.CASCADE)
     department = models.ForeignKey("Department", on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -99,10 +100,15 @@ class FacultyDepartmentLink(models.Model):
 
     class Meta:
         db_table = "faculty_department_link"
+        indexes = [
+            models.Index(
+                fields=["faculty", "department"], name="faculty_department_idx"
+            ),
+        ]
 
 
 class StudentDepartmentLink(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     student = models.ForeignKey("Student", on_delete=models.CASCADE)
     department = models.ForeignKey("Department", on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -110,25 +116,34 @@ class StudentDepartmentLink(models.Model):
 
     class Meta:
         db_table = "student_department_link"
+        indexes = [
+            models.Index(
+                fields=["student", "department"], name="student_department_idx"
+            ),
+        ]
 
 
 class Course(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=10)
     education_system = models.ForeignKey(
         "EducationSystem", on_delete=models.CASCADE, null=True
     )
     class_or_semester = models.IntegerField()
+    module_count = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = "course"
+        indexes = [
+            models.Index(fields=["class_or_semester"], name="course_semester_idx"),
+        ]
 
 
 class CourseDepartmentLink(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     course = models.ForeignKey("Course", on_delete=models.CASCADE)
     department = models.ForeignKey("Department", on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -143,7 +158,7 @@ class CourseDepartmentLink(models.Model):
         ]
 
 class InstitutionCourseLink(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     institution = models.ForeignKey("Institution", on_delete=models.CASCADE)
     course = models.ForeignKey("Course", on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -158,7 +173,7 @@ class InstitutionCourseLink(models.Model):
         ]
 
 class InstitutionDepartmentLink(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     institution = models.ForeignKey("Institution", on_delete=models.CASCADE)
     department = models.ForeignKey("Department", on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -174,7 +189,7 @@ class InstitutionDepartmentLink(models.Model):
 
 
 class CourseFacultyLink(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     course = models.ForeignKey("Course", on_delete=models.CASCADE)
     faculty = models.ForeignKey("Faculty", on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -182,10 +197,13 @@ class CourseFacultyLink(models.Model):
 
     class Meta:
         db_table = "course_faculty_link"
+        indexes = [
+            models.Index(fields=["faculty", "course"], name="faculty_course_idx"),
+        ]
 
 
 class Module(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     module_number = models.IntegerField()
     module_name = models.CharField(max_length=100)
     syllabus = models.TextField()
@@ -194,4 +212,9 @@ class Module(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        db_table = "module"
\ No newline at end of file
+        db_table = "module"
+        indexes = [
+            models.Index(
+                fields=["course", "module_number"], name="module_course_number_idx"
+            ),
+        ]
\ No newline at end of file
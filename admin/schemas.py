@@ -11,32 +11,33 @@ class NameSchema(Schema):
 
 
 class RetrieveSchema(Schema):
-    id: str
+    id: uuid.UUID
 
 
 class InstitutionLink(Schema):
-    institution_id: str
-    link_id: str
+    institution_id: uuid.UUID
+    link_id: uuid.UUID
 
 
 class UserMembershipIDSchema(Schema):
     member_id: str
-    user_id: str
-    department_ids: List[str]
+    user_id: uuid.UUID
+    department_ids: List[uuid.UUID]
 
 
 class GiveRolesMembershipSchema(Schema):
     user_membership_id: List[UserMembershipIDSchema]
     class_or_semester: Union[int, None]
+    entity_id: uuid.UUID = None
 
 
 class GiveRolesSchema(Schema):
-    entity_id: str = None
-    user_ids: List[str]
+    entity_id: uuid.UUID = None
+    user_ids: List[uuid.UUID]
 
 
 class InstitutionInSchema(ModelSchema):
-    education_system_id: str
+    education_system_id: uuid.UUID
 
     class Meta:
         model = Institution
@@ -83,12 +84,18 @@ class DepartmentOutSchema(ModelSchema):
 
 
 class CourseInSchema(ModelSchema):
-    department_id: str
-    education_system_id: str
+    department_id: uuid.UUID
+    education_system_id: uuid.UUID
 
     class Meta:
         model = Course
-        exclude = ["id", "created_at", "updated_at", "education_system"]
+        exclude = [
+            "id",
+            "created_at",
+            "updated_at",
+            "education_system",
+            "module_count",
+        ]
 
 
 class CourseOutSchema(ModelSchema):
@@ -100,7 +107,7 @@ class CourseOutSchema(ModelSchema):
 
 
 class ModuleInSchema(ModelSchema):
-    course_id: str
+    course_id: uuid.UUID
 
     class Meta:
         model = Module
@@ -1,3 +1,177 @@
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from admin.models import (
+    Community,
+    Course,
+    CourseDepartmentLink,
+    CourseFacultyLink,
+    Department,
+    EducationSystem,
+    Faculty,
+    Institution,
+    InstitutionCourseLink,
+    Student,
+    StudentDepartmentLink,
+)
+from admin.schemas import (
+    CommunityOutSchema,
+    EducationSystemOutSchema,
+    InstitutionOutSchema,
+)
+from users.models import Role, User, UserInstitutionLink
+from users.schemas import UserOutSchema
+from utils.testing import (
+    TrustedOutputMixin,
+    create_user,
+    login,
+    random_moment,
+    random_text,
+)
+
+
+class TrustedOutputTests(TrustedOutputMixin, TestCase):
+    def populate(self, rng):
+        prefix = rng.random()
+        systems = [
+            EducationSystem.objects.create(name=f"{prefix}{index}{random_text(rng)}")
+            for index in range(5)
+        ]
+        for index in range(30):
+            Institution.objects.create(
+                name=f"{prefix}{index}{random_text(rng)}",
+                place=random_text(rng),
+                institution_type=rng.choice(["SCHOOL", "COLLEGE"]),
+                # Null foreign keys
+                education_system=rng.choice(systems + [None]),
+            )
+            Community.objects.create(
+                name=f"{prefix}{index}{random_text(rng)}",
+                level=random_text(rng),
+                community_type=random_text(rng),
+            )
+        roles = [
+            Role.objects.create(name=f"{prefix}{index}{random_text(rng, 20)}")
+            for index in range(4)
+        ]
+        for index in range(30):
+            user = User.objects.create(
+                username=f"{prefix}{index}@example.com",
+                email=f"{prefix}{index}{random_text(rng, 20)}",
+                password=random_text(rng),
+                is_verified=rng.random() < 0.5,
+            )
+            # Many to many ids as a nested list, empty for some users
+            user.role.set(rng.sample(roles, rng.randint(0, len(roles))))
+        for model in (EducationSystem, Institution, Community, User, Role):
+            for pk in model.objects.values_list("pk", flat=True):
+                model.objects.filter(pk=pk).update(
+                    created_at=random_moment(rng), updated_at=random_moment(rng)
+                )
+        return [
+            (EducationSystemOutSchema, EducationSystem.objects.order_by("pk")),
+            (InstitutionOutSchema, Institution.objects.order_by("pk")),
+            (CommunityOutSchema, Community.objects.order_by("pk")),
+            (UserOutSchema, User.objects.order_by("pk")),
+        ]
+
+
+class CourseVisibilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        system = EducationSystem.objects.create(name="CBSE")
+        cls.courses = [
+            Course.objects.create(
+                name=f"Course {index}",
+                code=f"C{index}",
+                education_system=system,
+                class_or_semester=index % 2 + 1,
+            )
+            for index in range(6)
+        ]
+        department = Department.objects.create(name="Science")
+        institution = Institution.objects.create(
+            name="School", place="Kochi", institution_type="SCHOOL"
+        )
+        cls.users = {}
+        for name in ("Admin", "Institution", "Faculty", "Student"):
+            user = User.objects.create(
+                username=f"{name.lower()}@example.com",
+                email=f"{name.lower()}@example.com",
+                password=make_password("password"),
+                is_verified=True,
+            )
+            user.role.add(Role.objects.get_or_create(name=name)[0])
+            cls.users[name] = user
+        UserInstitutionLink.objects.create(
+            user=cls.users["Institution"], institution=institution, accepted=True
+        )
+        faculty = Faculty.objects.create(faculty_id="F1", user=cls.users["Faculty"])
+        student = Student.objects.create(
+            roll_number="1", class_or_semester=1, user=cls.users["Student"]
+        )
+        StudentDepartmentLink.objects.create(student=student, department=department)
+        for course in cls.courses:
+            CourseDepartmentLink.objects.create(course=course, department=department)
+            # Several links per course must not repeat it
+            CourseFacultyLink.objects.create(course=course, faculty=faculty)
+            CourseFacultyLink.objects.create(course=course, faculty=faculty)
+        for course in cls.courses[:4]:
+            InstitutionCourseLink.objects.create(institution=institution, course=course)
+
+    def setUp(self):
+        cache.clear()
+        self.headers = {}
+
+    def get_course(self, role, **params):
+        if role not in self.headers:
+            response = self.client.post(
+                "/api/v1/auth/login/",
+                {"username_or_email": self.users[role].email, "password": "password"},
+                content_type="application/json",
+            )
+            access_token = response.json()["access_token"]
+            self.headers[role] = {"HTTP_AUTHORIZATION": f"Bearer {access_token}"}
+        # The token check and the courses, with the default settings and
+        # nothing cached yet
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                "/api/v1/admin/course", params, **self.headers[role]
+            )
+        self.assertEqual(response.status_code, 200)
+        return [course["id"] for course in response.json()]
+
+    def ids(self, courses):
+        return [str(course.id) for course in courses]
+
+    def test_visible_courses_per_role(self):
+        ordered = sorted(
+            self.courses, key=lambda course: (course.class_or_semester, course.name)
+        )
+        expected = {
+            "Admin": ordered,
+            "Institution": [c for c in ordered if c in self.courses[:4]],
+            "Faculty": ordered,
+            "Student": [c for c in ordered if c.class_or_semester == 1],
+        }
+        for role, courses in expected.items():
+            with self.subTest(role=role):
+                self.assertEqual(self.get_course(role), self.ids(courses))
+
+    def test_plain_list_paged_by_limit_and_offset(self):
+        everything = self.get_course("Admin")
+        self.assertEqual(self.get_course("Admin", limit=2, offset=1), everything[1:3])
+        self.assertEqual(self.get_course("Admin", offset=4), everything[4:])
+
+    def test_search(self):
+        self.assertEqual(
+            self.get_course("Admin", search="C3"), self.ids(self.courses[3:4])
+        )
+
+
+class MalformedIdTests(TestCase):
+    def test_malformed_course_id_is_rejected(self):
+        headers = login(self.client, create_user("admin", ["Admin"]))
+        response = self.client.get("/api/v1/admin/module", {"id": "abc"}, **headers)
+        self.assertEqual(response.status_code, 422)
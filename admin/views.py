@@ -1,18 +1,28 @@
+import uuid
+
 from ninja import Router
 from typing import Any
 
 from django.shortcuts import get_object_or_404
-from django.db.models import Prefetch, Q
-from django.db import IntegrityError
+from django.db.models import Q
+from django.db import IntegrityError, transaction
 
-from utils.authentication import role_required, AuthBearer
+from utils.authentication import role_required, has_role, AuthBearer, AsyncAuthBearer
+from utils.counters import increment
 from utils.utils import search_queryset
+from utils.serializers import TrustedOutput
 from admin.schemas import *
+from admin.hierarchy import aget_hierarchy
+from admin.visibility import visible_courses
 from users.models import User, Role, UserInstitutionLink, UserCommunityLink
 from admin.models import Institution, Community, EducationSystem
 
 router = Router(auth=AuthBearer())
 
+education_system_output = TrustedOutput(EducationSystemOutSchema)
+institution_output = TrustedOutput(InstitutionOutSchema)
+community_output = TrustedOutput(CommunityOutSchema)
+
 
 @router.post("/role/institution/", response={200: Any, 400: Any})
 @role_required(["Admin"])
@@ -56,17 +66,38 @@ def give_community_role(request, data: GiveRolesSchema):
     return 200, {"message": "Community role given"}
 
 
+def granting_scope(linked, entity_id, kind):
+    """
+    The institution or community of the caller a role is given in: entity_id
+    when it is one of theirs, or their only one. Returns (id, error).
+    """
+    if entity_id:
+        # Affiliations hold ids as strings
+        if str(entity_id) in linked:
+            return str(entity_id), None
+        return None, f"Not linked to this {kind}"
+    if len(linked) == 1:
+        return linked[0], None
+    if not linked:
+        return None, f"Not linked to a {kind}"
+    return None, f"Linked to several, give the {kind} as entity_id"
+
+
 @router.post("/role/faculty/", response={200: Any, 400: Any})
 @role_required(["Institution"])
 def give_faculty_role(request, data: GiveRolesMembershipSchema):
-    user_link = get_object_or_404(UserInstitutionLink, user_id=request.auth["user"])
+    institution_id, error = granting_scope(
+        request.auth["affiliation"]["institutions"], data.entity_id, "institution"
+    )
+    if error:
+        return 400, {"details": error}
     role = Role.objects.get(name="Faculty")
     for datas in data.user_membership_id:
         departments = Department.objects.filter(id__in=datas["department_ids"])
         user = User.objects.get(id=datas["user_id"])
         user.roles.add(role)
         UserInstitutionLink.objects.create(
-            user=user, institution=user_link.institution, role=role
+            user=user, institution_id=institution_id, role=role
         )
         faculty = Faculty.objects.create(facutly_id=datas["member_id"], user=user)
         for department in departments:
@@ -77,14 +108,18 @@ def give_faculty_role(request, data: GiveRolesMembershipSchema):
 @router.post("/role/student/", response={200: Any, 400: Any})
 @role_required(["Institution"])
 def give_student_role(request, data: GiveRolesMembershipSchema):
-    user_link = get_object_or_404(UserInstitutionLink, user_id=request.auth["user_id"])
+    institution_id, error = granting_scope(
+        request.auth["affiliation"]["institutions"], data.entity_id, "institution"
+    )
+    if error:
+        return 400, {"details": error}
     role = Role.objects.get(name="Student")
     for datas in data.user_membership_ids:
         departments = Department.objects.filter(id__in=datas["department_ids"])
         user = User.objects.get(id=datas["user_id"])
         user.roles.add(role)
         UserInstitutionLink.objects.create(
-            user=user, institution=user_link.institution, role=role
+            user=user, institution_id=institution_id, role=role
         )
         student = Student.objects.create(
             roll_number=datas["member_id"],
@@ -100,12 +135,18 @@ def give_student_role(request, data: GiveRolesMembershipSchema):
 @role_required(["Community"])
 def give_community_member_role(request, data: GiveRolesSchema):
     users = User.objects.filter(id__in=data.user_ids)
-    user_link = get_object_or_404(UserCommunityLink, user_id=request.auth["user_id"])
+    community_id, error = granting_scope(
+        request.auth["affiliation"]["communities"], data.entity_id, "community"
+    )
+    if error:
+        return 400, {"details": error}
 
     role = Role.objects.get(name="CommunityMember")
     for user in users:
         user.roles.add(role)
-        UserCommunityLink.objects.create(user=user, community=user_link.community, role=role)
+        UserCommunityLink.objects.create(
+            user=user, community_id=community_id, role=role
+        )
     return 200, {"message": "Community Member role given"}
 
 
@@ -172,7 +213,9 @@ def create_course(request, data: CourseInSchema):
 def create_module(request, data: ModuleInSchema):
     data = data.dict()
     data["course"] = get_object_or_404(Course, id=data.pop("course_id"))
-    module = Module.objects.create(**data)
+    with transaction.atomic():
+        module = Module.objects.create(**data)
+        increment(Course.objects.filter(pk=module.course_id), "module_count")
     return 200, module
 
 
@@ -204,105 +247,110 @@ def link_institution_course(request, data: InstitutionLink):
     return 200, {"message": "Course linked to institution"}
 
 
-@router.get("/education-system", response={200: List[EducationSystemOutSchema]})
+@router.get(
+    "/education-system",
+    auth=AsyncAuthBearer(),
+    response={200: List[EducationSystemOutSchema]},
+)
 @role_required(["Admin"])
-def get_education_system(request, search: str = None):
+async def get_education_system(request, search: str = None):
     education_system = EducationSystem.objects.all()
     if search:
         education_system = search_queryset(education_system, search, ["name"])
-    return 200, education_system
+    return await education_system_output.aresponse(
+        request, education_system, conditional=True
+    )
 
 
-@router.get("/institution", response={200: List[InstitutionOutSchema]})
+@router.get(
+    "/institution", auth=AsyncAuthBearer(), response={200: List[InstitutionOutSchema]}
+)
 @role_required(["Admin"])
-def get_institution(request, search: str = None):
+async def get_institution(request, search: str = None):
     institution = Institution.objects.all()
     if search:
         institution = search_queryset(institution, search, ["name", "place"])
-    return 200, institution
+    return await institution_output.aresponse(
+        request, institution, conditional=True
+    )
 
 
-@router.get("/community", response={200: List[CommunityOutSchema]})
+@router.get(
+    "/community", auth=AsyncAuthBearer(), response={200: List[CommunityOutSchema]}
+)
 @role_required(["Admin"])
-def get_community(request, search: str = None):
+async def get_community(request, search: str = None):
     community = Community.objects.all()
     if search:
         community = search_queryset(
             community, search, ["name", "level", "community_type"]
         )
-    return 200, community
+    return await community_output.aresponse(
+        request, community, conditional=True
+    )
+
+
+@router.get(
+    "/institution/{institution_id}/hierarchy",
+    auth=AsyncAuthBearer(),
+    response={200: Any, 403: Any, 404: Any},
+)
+@role_required(["Admin", "Institution", "Faculty", "Student"])
+async def get_institution_hierarchy(request, institution_id: uuid.UUID):
+    if not has_role(request, ["Admin"]) and (
+        str(institution_id)
+        not in (await request.auth["affiliation"].aload())["institutions"]
+    ):
+        return 403, {"detail": "Not a member of this institution"}
+    if (hierarchy := await aget_hierarchy(institution_id)) is None:
+        return 404, {"detail": "Not Found"}
+    return 200, hierarchy
 
 
 @router.get("/department", response={200: List[DepartmentOutSchema]})
 @role_required(["Admin", "Institution", "Faculty", "Student"])
 def get_department(request, search: str = None):
     department = Department.objects.all()
-    if "Faculty" in request.auth["roles"]:
-        faculty_instance = Faculty.objects.filter(user_id=request.auth["user"]).first()
-        department = Department.objects.prefetch_related(
-            Prefetch(
-                "faculty_department_link",
-                queryset=FacultyDepartmentLink.objects.filter(faculty=faculty_instance),
-                to_attr="handled_by_faculty",
-            )
-        )
-    if "Student" in request.auth["roles"]:
-        student_instance = Student.objects.filter(user_id=request.auth["user"]).first()
-        department = Department.objects.prefetch_related(
-            Prefetch(
-                "student_department_link",
-                queryset=StudentDepartmentLink.objects.filter(student=student_instance),
-                to_attr="department",
-            )
+    if has_role(request, ["Faculty", "Student"]) and not has_role(
+        request, ["Admin", "Institution"]
+    ):
+        department = department.filter(
+            id__in=request.auth["affiliation"]["departments"]
         )
     if search:
         department = search_queryset(department, search, ["name"])
     return 200, department
 
 
-@router.get("/course", response={200: Any, 400: Any})
+# Still a plain list, paged only when limit is given
+@router.get("/course", response={200: List[CourseOutSchema]})
 @role_required(["Admin", "Institution", "Faculty", "Student"])
-def get_course(request, search: str = None):
-    course = Course.objects.all()
-    if "Faculty" in request.auth["roles"]:
-        faculty_instance = Faculty.objects.filter(user_id=request.auth["user"]).first()
-        course = Course.objects.prefetch_related(
-            Prefetch(
-                "course_faculty_link",
-                queryset=CourseFacultyLink.objects.filter(faculty=faculty_instance),
-                to_attr="handled_by_faculty",
-            )
-        )
-    if "Student" in request.auth["roles"]:
-        student_instance = Student.objects.filter(user_id=request.auth["user"]).first()
-        department = Department.objects.prefetch_related(
-            Prefetch(
-                "student_department_link",
-                queryset=StudentDepartmentLink.objects.filter(student=student_instance),
-                to_attr="department",
-            )
-        )
-        course = Course.objects.prefetch_related(
-            Prefetch(
-                "course_department_link",
-                queryset=CourseDepartmentLink.objects.filter(department=department),
-                to_attr="department",
-            )
-        ).filter(class_or_semester=student_instance.class_or_semester)
+def get_course(request, search: str = None, limit: int = None, offset: int = 0):
+    course = visible_courses(request.auth["user"], request.auth["roles"])
     if search:
         course = search_queryset(
             course,
             search,
-            ["name", "code", "education_system_name", "class_or_semester"],
+            ["name", "code", "education_system__name", "class_or_semester"],
         )
-    return 200, course
+    offset = max(offset, 0)
+    if limit is not None:
+        return 200, course[offset : offset + max(limit, 0)]
+    return 200, course[offset:]
 
 
-@router.get("/module", response={200: List[ModuleOutSchema], 400: Any})
+@router.get(
+    "/module", auth=AsyncAuthBearer(), response={200: List[ModuleOutSchema], 400: Any}
+)
 @role_required(["Admin", "Institution", "Faculty", "Student"])
-def get_modules(request, id: RetrieveSchema):
+async def get_modules(request, id: uuid.UUID):
     if not (
-        modules := Module.objects.filter(course_id=id).first().order_by("module_number")
+        modules := [
+            module
+            async for module in Module.objects.filter(course_id=id).order_by(
+                "module_number"
+            )
+        ]
     ):
         return 400, {
             "message": "Invalid course id",
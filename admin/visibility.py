@@ -0,0 +1,65 @@
+from functools import reduce
+from operator import or_
+
+from django.db.models import Exists, OuterRef, Q
+
+from admin.models import (
+    Course,
+    CourseFacultyLink,
+    InstitutionCourseLink,
+    StudentDepartmentLink,
+)
+
+
+def course_visibility(user_id, roles):
+    """
+    Condition matching the courses a user may see, built from correlated
+    EXISTS subqueries so the visible set resolves in the listing's own query.
+    Admins see every course, institutions the courses linked to them,
+    faculty the courses they handle and students the courses of their
+    departments for their class or semester. Returns None for everything.
+    """
+    if "Admin" in roles:
+        return None
+    conditions = []
+    if "Institution" in roles:
+        conditions.append(
+            Exists(
+                InstitutionCourseLink.objects.filter(
+                    course=OuterRef("pk"),
+                    institution__institution_user_link__user_id=user_id,
+                    institution__institution_user_link__accepted=True,
+                )
+            )
+        )
+    if "Faculty" in roles:
+        conditions.append(
+            Exists(
+                CourseFacultyLink.objects.filter(
+                    course=OuterRef("pk"), faculty__user_id=user_id
+                )
+            )
+        )
+    if "Student" in roles:
+        conditions.append(
+            Exists(
+                StudentDepartmentLink.objects.filter(
+                    student__user_id=user_id,
+                    student__class_or_semester=OuterRef("class_or_semester"),
+                    department__coursedepartmentlink__course=OuterRef("pk"),
+                )
+            )
+        )
+    if not conditions:
+        return Q(pk__in=[])
+    return reduce(or_, conditions)
+
+
+def visible_courses(user_id, roles):
+    """
+    The courses a user may see, in listing order.
+    """
+    courses = Course.objects.order_by("class_or_semester", "name", "pk")
+    if (condition := course_visibility(user_id, roles)) is not None:
+        courses = courses.filter(condition)
+    return courses
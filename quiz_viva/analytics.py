@@ -0,0 +1,307 @@
+"""
+Classical item analysis over graded responses.
+
+Responses are streamed in chunks into flat NumPy arrays of examinee,
+question, option and correctness indexes, and every statistic is computed
+from those with bincount, so memory stays proportional to the number of
+responses rather than examinees × questions. An examinee is one student
+sitting one quiz or viva; unanswered questions count as incorrect for the
+totals and reliability, but not for a question's difficulty.
+"""
+
+import uuid
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import QuerySet
+
+from quiz_viva.archive import read_archive
+from quizverse_backend.routers import primary_reads
+from quiz_viva.models import Answer, Question, QuestionResponse
+
+CHUNK_SIZE = 10000
+# Share of examinees in each of the upper and lower scoring groups
+GROUP_FRACTION = 0.27
+# Distractors picked by fewer respondents than this are non-functional
+FUNCTIONAL_DISTRACTOR_SHARE = 0.05
+
+
+def analytics_key(kind, pk):
+    return f"analytics:{kind}:{pk}"
+
+
+def invalidate_analytics(quiz_or_viva_ids=(), qbank_ids=()):
+    cache.delete_many(
+        [analytics_key("quiz", pk) for pk in set(quiz_or_viva_ids)]
+        + [analytics_key("qbank", pk) for pk in set(qbank_ids)]
+    )
+
+
+def raw_chunks(queryset, *fields):
+    """
+    Yield lists of up to CHUNK_SIZE rows of fields as the database driver
+    returns them. Skipping Django's converters avoids building a UUID object
+    per id, which otherwise dominates the load; ids are only used as keys.
+    """
+    sql, params = queryset.values_list(*fields).query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        while rows := cursor.fetchmany(CHUNK_SIZE):
+            yield rows
+
+
+def load_responses(chunks, questions, options):
+    """
+    Encode chunks of response rows as index arrays. questions and options map
+    question and answer ids to their positions; responses to unknown
+    questions are dropped.
+    Returns (examinee, question, option, correct, examinee count).
+    """
+    examinees = {}
+
+    def encode(batch):
+        batch = [row for row in batch if row[2] in questions]
+        count = len(batch)
+        return (
+            np.fromiter(
+                (examinees.setdefault(row[:2], len(examinees)) for row in batch),
+                dtype=np.int64,
+                count=count,
+            ),
+            np.fromiter(
+                (questions[row[2]] for row in batch), dtype=np.int64, count=count
+            ),
+            np.fromiter(
+                (options.get(row[3], -1) for row in batch),
+                dtype=np.int64,
+                count=count,
+            ),
+            np.fromiter((row[4] for row in batch), dtype=np.float64, count=count),
+        )
+
+    encoded = [encode([])] + [encode(batch) for batch in chunks]
+    return (*(np.concatenate(arrays) for arrays in zip(*encoded)), len(examinees))
+
+
+def id_string(value):
+    # Raw UUIDs come back as hex text on SQLite and as UUIDs from psycopg
+    return str(value if isinstance(value, uuid.UUID) else uuid.UUID(value))
+
+
+def ratio(numerator, denominator):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def rounded(value):
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+def reliability(totals, item_means):
+    """
+    KR-20 and Cronbach's alpha over k items. Responses are scored 0 or 1, so
+    item variances are p(1 - p) and both coefficients agree; alpha is kept
+    for callers expecting the general form.
+    """
+    k = len(item_means)
+    total_variance = totals.var()
+    if k < 2 or total_variance == 0:
+        return {"kr20": None, "cronbach_alpha": None}
+    scale = k / (k - 1)
+    kr20 = scale * (1 - (item_means * (1 - item_means)).sum() / total_variance)
+    return {"kr20": rounded(kr20), "cronbach_alpha": rounded(kr20)}
+
+
+def item_querysets(questions):
+    """
+    The questions in order and their options, as item_analysis() reads them.
+    """
+    return (
+        questions.order_by("question_number"),
+        Answer.objects.filter(question__in=questions).order_by("answer_number"),
+    )
+
+
+def item_analysis(responses, questions):
+    """
+    Statistics for the given questions queryset over responses, either a
+    QuestionResponse queryset or chunks of (student, quiz or viva, question,
+    answer, is_correct) rows with ids as strings, as read from an archive.
+    """
+    archived = not isinstance(responses, QuerySet)
+    key = id_string if archived else (lambda pk: pk)
+    ordered_questions, options = item_querysets(questions)
+    question_rows = [
+        row
+        for batch in raw_chunks(ordered_questions, "id", "question_number")
+        for row in batch
+    ]
+    question_index = {key(pk): index for index, (pk, _) in enumerate(question_rows)}
+    option_rows = [
+        row
+        for batch in raw_chunks(
+            options,
+            "id",
+            "question_id",
+            "answer_number",
+            "is_correct",
+        )
+        for row in batch
+    ]
+    option_index = {key(row[0]): index for index, row in enumerate(option_rows)}
+
+    if not archived:
+        responses = raw_chunks(
+            responses,
+            "student_id",
+            "quiz_or_viva_id",
+            "question_id",
+            "answer_id",
+            "is_correct",
+        )
+    examinee, item, option, correct, n_examinees = load_responses(
+        responses, question_index, option_index
+    )
+    n_items, n_options = len(question_rows), len(option_rows)
+
+    totals = np.bincount(examinee, weights=correct, minlength=n_examinees)
+    respondents = np.bincount(item, minlength=n_items)
+    item_correct = np.bincount(item, weights=correct, minlength=n_items)
+    difficulty = ratio(item_correct, respondents)
+
+    # Upper and lower groups by total score
+    group_size = max(1, round(GROUP_FRACTION * n_examinees))
+    order = np.argsort(totals, kind="stable")
+    in_upper = np.zeros(n_examinees, dtype=bool)
+    in_lower = np.zeros(n_examinees, dtype=bool)
+    in_upper[order[-group_size:]] = True
+    in_lower[order[:group_size]] = True
+    upper, lower = in_upper[examinee], in_lower[examinee]
+
+    def group_share(mask, weights=None, index=item, length=n_items):
+        return np.bincount(index[mask], weights=weights, minlength=length)
+
+    upper_respondents = group_share(upper)
+    lower_respondents = group_share(lower)
+    upper_difficulty = ratio(group_share(upper, correct[upper]), upper_respondents)
+    lower_difficulty = ratio(group_share(lower, correct[lower]), lower_respondents)
+    discrimination = upper_difficulty - lower_difficulty
+
+    chosen = option >= 0
+    option_item = np.fromiter(
+        (question_index[key(row[1])] for row in option_rows),
+        dtype=np.int64,
+        count=n_options,
+    )
+    picks = group_share(chosen, index=option, length=n_options)
+    upper_picks = group_share(chosen & upper, index=option, length=n_options)
+    lower_picks = group_share(chosen & lower, index=option, length=n_options)
+    selected = ratio(picks, respondents[option_item])
+    upper_selected = ratio(upper_picks, upper_respondents[option_item])
+    lower_selected = ratio(lower_picks, lower_respondents[option_item])
+
+    options_by_item = [[] for _ in range(n_items)]
+    for index, (pk, _, answer_number, is_correct) in enumerate(option_rows):
+        stats = {
+            "answer_id": id_string(pk),
+            "answer_number": answer_number,
+            "is_correct": bool(is_correct),
+            "selected": rounded(selected[index]),
+            "upper": rounded(upper_selected[index]),
+            "lower": rounded(lower_selected[index]),
+            "discrimination": rounded(upper_selected[index] - lower_selected[index]),
+        }
+        if not is_correct:
+            # A working distractor draws some respondents, mostly weaker ones
+            stats["functional"] = bool(
+                selected[index] >= FUNCTIONAL_DISTRACTOR_SHARE
+                and upper_selected[index] <= lower_selected[index]
+            )
+        options_by_item[option_item[index]].append(stats)
+
+    return {
+        "examinees": n_examinees,
+        "responses": len(item),
+        "reliability": reliability(totals, item_correct / max(n_examinees, 1)),
+        "questions": [
+            {
+                "question_id": id_string(pk),
+                "question_number": question_number,
+                "respondents": int(respondents[index]),
+                "difficulty": rounded(difficulty[index]),
+                "discrimination": rounded(discrimination[index]),
+                "options": options_by_item[index],
+            }
+            for index, (pk, question_number) in enumerate(question_rows)
+        ],
+    }
+
+
+def cached_analysis(key, build):
+    if (result := cache.get(key)) is None:
+        with primary_reads():
+            result = build()
+        cache.set(key, result, settings.ANALYTICS_CACHE_TIMEOUT)
+    return result
+
+
+def archived_responses(quiz_or_viva_id):
+    rows = [
+        (
+            row["student_id"],
+            row["quiz_or_viva_id"],
+            row["question_id"],
+            row["answer_id"],
+            row["is_correct"],
+        )
+        for row in read_archive(quiz_or_viva_id, QuestionResponse._meta.db_table)
+    ]
+    chunks = [rows[i : i + CHUNK_SIZE] for i in range(0, len(rows), CHUNK_SIZE)]
+    return chunks, Question.objects.filter(id__in={row[2] for row in rows})
+
+
+def quiz_responses(quiz_or_viva_id):
+    """
+    Responses to a quiz or viva still in the hot table, and their questions.
+    """
+    responses = QuestionResponse.objects.filter(quiz_or_viva_id=quiz_or_viva_id)
+    return responses, Question.objects.filter(
+        id__in=responses.values("question_id").distinct()
+    )
+
+
+def qbank_responses(qbank_id):
+    """
+    Responses to the questions of a question bank still in the hot table,
+    and its questions.
+    """
+    return (
+        QuestionResponse.objects.filter(question__qbank_id=qbank_id),
+        Question.objects.filter(qbank_id=qbank_id),
+    )
+
+
+def quiz_analytics(quiz_or_viva):
+    """
+    Statistics of a quiz or viva, read from its archive once archived.
+    """
+
+    def build():
+        if quiz_or_viva.archived_at:
+            return item_analysis(*archived_responses(quiz_or_viva.id))
+        return item_analysis(*quiz_responses(quiz_or_viva.id))
+
+    return cached_analysis(analytics_key("quiz", quiz_or_viva.id), build)
+
+
+def qbank_analytics(qbank_id):
+    """
+    Statistics of a question bank over the responses still in the hot table,
+    i.e. those of quizzes and vivas not archived yet.
+    """
+    return cached_analysis(
+        analytics_key("qbank", qbank_id),
+        lambda: item_analysis(*qbank_responses(qbank_id)),
+    )
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class QuizVerseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'quiz_viva'
+
+    def ready(self):
+        from quiz_viva.archive import RESPONSE_PARTITIONS
+        from quiz_viva.duplicates import connect_signals
+        from utils.ids import get_id_generator
+        from utils.partitions import register
+
+        # Fail at startup rather than on the first insert
+        get_id_generator()
+        connect_signals()
+        register(RESPONSE_PARTITIONS)
@@ -0,0 +1,222 @@
+"""
+Cold storage for finished quizzes and vivas.
+
+A closed quiz or viva is written to ARCHIVE_DIR/<id>.jsonl.gz, one JSON line
+per row of its enrollment links, responses and viva slots, after which the
+quiz row is marked archived_at and those rows are deleted from the hot
+tables in batches. The quiz row itself stays, so foreign keys and listings
+keep working, and readers of archived data go through read_archive().
+
+Every step can be repeated: the file is rewritten from the hot rows until
+archived_at is set, and the batched deletes pick up where an interrupted run
+stopped.
+"""
+import gzip
+import json
+import os
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from quiz_viva.models import (
+    CommunityMemberQuizOrVivaLink,
+    QuestionResponse,
+    QuizOrViva,
+    StudentQuizOrVivaLink,
+    VivaSlot,
+)
+from users.cleanup import delete_in_batches
+from utils.ids import uuid7_floor
+from utils.partitions import MonthlyPartitions
+
+ARCHIVE_FORMAT = 1
+ARCHIVED_MODELS = [
+    StudentQuizOrVivaLink,
+    CommunityMemberQuizOrVivaLink,
+    QuestionResponse,
+    VivaSlot,
+]
+
+
+class ArchiveMissing(Exception):
+    """
+    The archive file of an archived quiz or viva is gone, so its rows are
+    lost for good.
+    """
+
+
+def responses_archived(lower, upper, now):
+    """
+    Whether every quiz and viva created in [lower, upper) is archived, so
+    none of their responses are still needed in the hot table.
+    """
+    return upper <= now and not QuizOrViva.objects.filter(
+        id__gte=uuid7_floor(lower), id__lt=uuid7_floor(upper), archived_at__isnull=True
+    ).exists()
+
+
+# Responses are partitioned by the creation month of their quiz or viva,
+# read off its time-ordered id, so per quiz queries and upserts stay within
+# one partition and archived months can be dropped whole. Quizzes and vivas
+# from before time-ordered ids have random uuid4 ids instead: their
+# responses land in the default partition, or for a few in whichever month
+# their id falls in, which responses_archived() then also waits on. Either
+# way they leave the hot table row by row when the quiz or viva is archived.
+RESPONSE_PARTITIONS = MonthlyPartitions(
+    "question_response",
+    "quiz_or_viva_id",
+    bound=uuid7_floor,
+    expired=responses_archived,
+)
+
+
+def archive_path(quiz_or_viva_id):
+    return os.path.join(settings.ARCHIVE_DIR, f"{quiz_or_viva_id}.jsonl.gz")
+
+
+def hot_rows(model, quiz_or_viva_id):
+    return model.objects.filter(quiz_or_viva_id=quiz_or_viva_id)
+
+
+def closed_before(cutoff):
+    return QuizOrViva.objects.filter(end_time__lt=cutoff, archived_at__isnull=True)
+
+
+def interrupted():
+    """
+    Archived quizzes and vivas whose hot rows were not all deleted yet.
+    """
+    return QuizOrViva.objects.filter(archived_at__isnull=False).filter(
+        reduce(
+            or_,
+            [
+                Exists(model.objects.filter(quiz_or_viva=OuterRef("pk")))
+                for model in ARCHIVED_MODELS
+            ],
+        )
+    )
+
+
+def write_archive(quiz_or_viva, batch_size=1000):
+    """
+    Dump the quiz or viva and its hot rows to its archive file, replacing
+    it atomically. Returns the size of the file in bytes.
+    """
+    os.makedirs(settings.ARCHIVE_DIR, exist_ok=True)
+    path = archive_path(quiz_or_viva.id)
+    temporary = f"{path}.tmp"
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    header = {
+        "format": ARCHIVE_FORMAT,
+        "quiz_or_viva": QuizOrViva.objects.filter(pk=quiz_or_viva.pk).values().get(),
+    }
+    with open(temporary, "wb") as raw:
+        with gzip.open(raw, "wt", encoding="utf-8") as file:
+            file.write(encoder.encode(header) + "\n")
+            for model in ARCHIVED_MODELS:
+                table = model._meta.db_table
+                for row in (
+                    hot_rows(model, quiz_or_viva.id)
+                    .order_by("pk")
+                    .values()
+                    .iterator(chunk_size=batch_size)
+                ):
+                    file.write(encoder.encode({"table": table, "row": row}) + "\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(temporary, path)
+    return os.path.getsize(path)
+
+
+def purge_hot_rows(quiz_or_viva_id, batch_size=1000, pause=0):
+    return {
+        model._meta.db_table: delete_in_batches(
+            hot_rows(model, quiz_or_viva_id), batch_size, pause
+        )
+        for model in ARCHIVED_MODELS
+    }
+
+
+def archive_quiz_or_viva(quiz_or_viva, batch_size=1000, pause=0):
+    """
+    Move one quiz or viva to cold storage. Returns the archive size and the
+    rows deleted per table.
+    """
+    size = None
+    if quiz_or_viva.archived_at is None:
+        size = write_archive(quiz_or_viva, batch_size)
+        quiz_or_viva.archived_at = timezone.now()
+        quiz_or_viva.save(update_fields=["archived_at", "updated_at"])
+    return size, purge_hot_rows(quiz_or_viva.id, batch_size, pause)
+
+
+def archive_records(quiz_or_viva_id):
+    """
+    Yield the (table, row) records of an archive in file order, the tables
+    of ARCHIVED_MODELS one after the other.
+    """
+    try:
+        file = gzip.open(archive_path(quiz_or_viva_id), "rt", encoding="utf-8")
+    except FileNotFoundError:
+        raise ArchiveMissing(quiz_or_viva_id) from None
+    with file:
+        header = json.loads(next(file))
+        if header["format"] != ARCHIVE_FORMAT:
+            raise ValueError(f"Unsupported archive format {header['format']}")
+        for line in file:
+            record = json.loads(line)
+            yield record["table"], record["row"]
+
+
+def read_archive(quiz_or_viva_id, table=None):
+    """
+    Yield the archived rows of a quiz or viva, as dicts of column values,
+    optionally only those of one table. Raises ArchiveMissing when its file
+    is gone.
+    """
+    for record_table, row in archive_records(quiz_or_viva_id):
+        if table is None or record_table == table:
+            yield row
+
+
+def archived_enrollment(quiz_or_viva_id):
+    """
+    Ids of the users enrolled in an archived quiz or viva, as strings. They
+    are read from the enrollment rows leading its archive, and cached with
+    no timeout as an archive no longer changes once the quiz is archived.
+    """
+    key = f"archived_enrollment:{quiz_or_viva_id}"
+    if (enrolled := cache.get(key)) is None:
+        columns = {
+            StudentQuizOrVivaLink._meta.db_table: "student_id",
+            CommunityMemberQuizOrVivaLink._meta.db_table: "community_member_id",
+        }
+        enrolled = set()
+        for table, row in archive_records(quiz_or_viva_id):
+            if table not in columns:
+                break
+            enrolled.add(row[columns[table]])
+        cache.set(key, enrolled, timeout=None)
+    return enrolled
+
+
+def table_sizes(models=ARCHIVED_MODELS):
+    """
+    Row count and, on PostgreSQL, on-disk size including indexes of each
+    hot table.
+    """
+    sizes = {}
+    for model in models:
+        table = model._meta.db_table
+        sizes[table] = {"rows": model.objects.count()}
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+                sizes[table]["bytes"] = cursor.fetchone()[0]
+    return sizes
@@ -0,0 +1,144 @@
+"""
+Cloning of question banks with set-based INSERT ... SELECT statements.
+
+Nothing is read into Python. A temporary table maps every source question
+to the id of its copy, and answers, module links and course links are copied
+by joining on it, all in one transaction. New ids are built in SQL as a fresh
+UUIDv7 per table whose low 32 bits are replaced by a row number, so they stay
+time-ordered and unique without a Python round trip per row.
+"""
+import uuid
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from quiz_viva.duplicates import get_index
+from quiz_viva.models import (
+    Answer,
+    QBankCourseLink,
+    Question,
+    QuestionBank,
+    QuestionModuleLink,
+)
+
+MAP_CHUNK_SIZE = 10000
+
+# Row numbered id from a 24 hex digit prefix, per backend storage of UUIDField
+ID_EXPRESSIONS = {
+    "sqlite": "%s || printf('%%08x', ROW_NUMBER() OVER (ORDER BY src.{pk}))",
+    "postgresql": (
+        "CAST(%s || lpad(to_hex(ROW_NUMBER() OVER (ORDER BY src.{pk})), 8, '0') "
+        "AS uuid)"
+    ),
+}
+
+
+def new_ids(model):
+    """
+    SQL expression and params numbering fresh ids for the rows of src.
+    """
+    pk = connection.ops.quote_name(model._meta.pk.column)
+    prefix = model._meta.pk.default().hex[:24]
+    return ID_EXPRESSIONS[connection.vendor].format(pk=pk), [prefix]
+
+
+def table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def insert_select(cursor, model, source, params, replace):
+    """
+    Copy the rows of the source query, aliased src, into the table of model.
+    replace maps columns to (SQL, params) computed instead of copied; the
+    primary key is always renumbered and timestamps are set to now.
+    Returns the number of rows inserted.
+    """
+    quote = connection.ops.quote_name
+    now = timezone.now()
+    replace = {model._meta.pk.column: new_ids(model), **replace}
+    columns, expressions, select_params = [], [], []
+    for field in model._meta.concrete_fields:
+        columns.append(quote(field.column))
+        if field.column in replace:
+            expression, extra = replace[field.column]
+        elif getattr(field, "auto_now", False) or getattr(
+            field, "auto_now_add", False
+        ):
+            expression, extra = "%s", [field.get_db_prep_value(now, connection)]
+        else:
+            expression, extra = f"src.{quote(field.column)}", []
+        expressions.append(expression)
+        select_params += extra
+    cursor.execute(
+        f"INSERT INTO {table(model)} ({', '.join(columns)}) "
+        f"SELECT {', '.join(expressions)} FROM {source}",
+        select_params + params,
+    )
+    return cursor.rowcount
+
+
+def clone_qbank(source, creator_id, title=None):
+    """
+    Copy a question bank with its questions, answers, module links and course
+    links for creator_id. Returns the new bank.
+    """
+    prep = QuestionBank._meta.pk.get_db_prep_value
+    source_id = prep(source.pk, connection)
+
+    with transaction.atomic():
+        clone = QuestionBank.objects.create(
+            title=title or source.title, creator_id=creator_id
+        )
+        clone_id = prep(clone.pk, connection)
+        # One map per clone, several may be indexed after the same commit
+        clone_map = f"question_clone_map_{clone.pk.hex}"
+        with connection.cursor() as cursor:
+            expression, params = new_ids(Question)
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {clone_map} AS "
+                f"SELECT src.id AS old_id, {expression} AS new_id "
+                f"FROM {table(Question)} src WHERE src.qbank_id = %s",
+                params + [source_id],
+            )
+            copied = insert_select(
+                cursor,
+                Question,
+                f"{table(Question)} src JOIN {clone_map} map ON src.id = map.old_id",
+                [],
+                {"id": ("map.new_id", []), "qbank_id": ("%s", [clone_id])},
+            )
+            for model in (Answer, QuestionModuleLink):
+                insert_select(
+                    cursor,
+                    model,
+                    f"{table(model)} src "
+                    f"JOIN {clone_map} map ON src.question_id = map.old_id",
+                    [],
+                    {"question_id": ("map.new_id", [])},
+                )
+            insert_select(
+                cursor,
+                QBankCourseLink,
+                f"{table(QBankCourseLink)} src WHERE src.question_bank_id = %s",
+                [source_id],
+                {"question_bank_id": ("%s", [clone_id])},
+            )
+        clone.question_count = copied
+        clone.save(update_fields=["question_count", "updated_at"])
+        transaction.on_commit(lambda: index_clones(clone_map))
+    return clone
+
+
+def index_clones(clone_map):
+    """
+    Index the copied questions under the signatures of their originals and
+    drop the mapping table.
+    """
+    index = get_index()
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT old_id, new_id FROM {clone_map}")
+        while rows := cursor.fetchmany(MAP_CHUNK_SIZE):
+            index.copy(
+                [(uuid.UUID(str(old)), uuid.UUID(str(new))) for old, new in rows]
+            )
+        cursor.execute(f"DROP TABLE {clone_map}")
@@ -0,0 +1,237 @@
+"""
+Background deletion of question banks and quizzes or vivas.
+
+Django's CASCADE collector loads every dependent row into memory before
+deleting anything. Instead, the parent is marked deleting_at, which hides it
+from the default manager, and a background thread deletes its dependents
+bottom-up in raw statements of at most DELETION_BATCH_SIZE rows, each
+committed on its own. The plan is read off the foreign keys, so models added
+later are covered as long as they CASCADE or SET_NULL.
+
+Endpoints adding rows under a question bank or quiz or viva hold it with
+hold_live() for their transaction, and deletions start under a row lock on
+the parent, so a deletion waits for those rows to commit and sees them, and
+nothing is added once it has started.
+
+Progress is published to the cache for the status endpoints. A run cut short
+leaves the parent marked, and `manage.py resumedeletions` finishes it.
+Results losing responses with a question bank are marked stale as its
+deletion starts and recounted when it ends.
+"""
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import close_old_connections, connection, transaction
+from django.db.models import CASCADE, DO_NOTHING, SET_NULL
+from django.utils import timezone
+
+from quiz_viva.analytics import invalidate_analytics
+from quiz_viva.archive import archive_path
+from quiz_viva.duplicates import get_index
+from quiz_viva.models import Question, QuestionBank, QuizOrViva
+from quiz_viva.results import mark_stale_results, recount_stale_results
+
+logger = logging.getLogger(__name__)
+
+DELETION_BATCH_SIZE = 1000
+# Seconds a finished or failed deletion stays visible to its owner
+DELETION_STATUS_TIMEOUT = 86400
+OWNER_FIELDS = {QuestionBank: "creator_id", QuizOrViva: "conductor_id"}
+
+
+def deletion_plan(model, lookup="pk"):
+    """
+    Steps emptying the rows of model matched by lookup, children first:
+    ("null", model, lookup, field) clears a SET_NULL reference and
+    ("delete", model, lookup) deletes rows. Leaf models are handled before
+    their siblings so rows about to be deleted are not updated first.
+    """
+    steps = []
+    relations = sorted(
+        (
+            relation
+            for relation in model._meta.related_objects
+            if not relation.many_to_many
+        ),
+        key=lambda relation: bool(relation.related_model._meta.related_objects),
+    )
+    for relation in relations:
+        field = relation.field
+        path = f"{field.name}__{lookup}"
+        if relation.on_delete is CASCADE:
+            steps += deletion_plan(relation.related_model, path)
+        elif relation.on_delete is SET_NULL:
+            steps.append(("null", relation.related_model, path, field.name))
+        elif relation.on_delete is not DO_NOTHING:
+            raise ValueError(
+                f"Cannot bulk delete through {field} ({relation.on_delete.__name__})"
+            )
+    steps.append(("delete", model, lookup))
+    return steps
+
+
+def raw_delete(model, pks):
+    quote = connection.ops.quote_name
+    pk = model._meta.pk
+    placeholders = ", ".join(["%s"] * len(pks))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote(model._meta.db_table)} "
+            f"WHERE {quote(pk.column)} IN ({placeholders})",
+            [pk.get_db_prep_value(value, connection) for value in pks],
+        )
+
+
+def run_step(step, root, batch_size, pause):
+    """
+    Apply one step of the plan to the rows under root, yielding the table
+    and row count of every batch.
+    """
+    kind, model, lookup, *field = step
+    rows = model._base_manager.filter(**{lookup: root}).order_by()
+    while pks := list(rows.values_list("pk", flat=True)[:batch_size]):
+        if kind == "null":
+            model._base_manager.filter(pk__in=pks).update(**{field[0]: None})
+        else:
+            raw_delete(model, pks)
+            if model is Question:
+                get_index().remove(*pks)
+        yield model._meta.db_table, len(pks)
+        if pause:
+            time.sleep(pause)
+
+
+def status_key(model, pk):
+    return f"deletion:{model._meta.db_table}:{pk}"
+
+
+def publish(model, pk, status):
+    cache.set(status_key(model, pk), status, DELETION_STATUS_TIMEOUT)
+
+
+def deletion_status(model, pk, user_id):
+    """
+    Progress of the deletion of a row owned by user_id, or None if there is
+    none to report.
+    """
+    status = cache.get(status_key(model, pk))
+    if status is None:
+        # Started by another process whose cache is not shared, or resumed
+        owner = (
+            model.all_objects.filter(pk=pk, deleting_at__isnull=False)
+            .values_list(OWNER_FIELDS[model], flat=True)
+            .first()
+        )
+        status = owner and {"state": "deleting", "owner": str(owner), "deleted": {}}
+    if not status or status["owner"] != str(user_id):
+        return None
+    return {"state": status["state"], "deleted": status["deleted"]}
+
+
+def delete_now(model, pk, batch_size=DELETION_BATCH_SIZE, pause=0):
+    """
+    Delete a question bank or quiz or viva and everything depending on it.
+    Returns the number of rows deleted or updated per table.
+    """
+    owner = (
+        model.all_objects.filter(pk=pk)
+        .values_list(OWNER_FIELDS[model], flat=True)
+        .first()
+    )
+    progress = defaultdict(int)
+    status = {"state": "deleting", "owner": str(owner), "deleted": progress}
+    try:
+        for step in deletion_plan(model):
+            for table, count in run_step(step, pk, batch_size, pause):
+                progress[table] += count
+                publish(model, pk, status)
+    except Exception:
+        status["state"] = "failed"
+        publish(model, pk, status)
+        raise
+    status["state"] = "deleted"
+    publish(model, pk, status)
+
+    if model is QuizOrViva:
+        invalidate_analytics(quiz_or_viva_ids=[pk])
+        if os.path.exists(path := archive_path(pk)):
+            os.remove(path)
+    else:
+        invalidate_analytics(qbank_ids=[pk])
+        recount_stale_results()
+    return dict(progress)
+
+
+def run_deletion(model, pk):
+    try:
+        delete_now(model, pk)
+    except Exception:
+        logger.exception("Deleting %s %s failed", model.__name__, pk)
+    finally:
+        close_old_connections()
+
+
+def hold_live(model, *pks):
+    """
+    Hold question banks or quizzes or vivas for the rest of the current
+    transaction, unless their deletion has already started. Returns whether
+    all of them are held. The lock is shared on PostgreSQL, so writers under
+    the same parent do not wait on each other; SQLite runs one write
+    transaction at a time anyway.
+    """
+    pks = set(pks)
+    if not pks:
+        return True
+    quote = connection.ops.quote_name
+    pk = model._meta.pk
+    placeholders = ", ".join(["%s"] * len(pks))
+    lock = " FOR KEY SHARE" if connection.vendor == "postgresql" else ""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT 1 FROM {quote(model._meta.db_table)} "
+            f"WHERE {quote(pk.column)} IN ({placeholders}) "
+            f"AND {quote(model._meta.get_field('deleting_at').column)} IS NULL"
+            f"{lock}",
+            [pk.get_db_prep_value(value, connection) for value in pks],
+        )
+        return len(cursor.fetchall()) == len(pks)
+
+
+def start_deletion(instance):
+    """
+    Hide instance from reads right away and delete it in the background
+    once the current transaction commits. Call it in a transaction that
+    has locked instance with select_for_update().
+    """
+    model = type(instance)
+    model.all_objects.filter(pk=instance.pk).update(deleting_at=timezone.now())
+    if model is QuestionBank:
+        mark_stale_results(instance.pk)
+    publish(
+        model,
+        instance.pk,
+        {
+            "state": "deleting",
+            "owner": str(getattr(instance, OWNER_FIELDS[model])),
+            "deleted": {},
+        },
+    )
+    transaction.on_commit(
+        lambda: threading.Thread(
+            target=run_deletion,
+            args=(model, instance.pk),
+            name=f"delete-{instance.pk}",
+            daemon=True,
+        ).start()
+    )
+
+
+def pending_deletions():
+    for model in OWNER_FIELDS:
+        deleting = model.all_objects.filter(deleting_at__isnull=False)
+        for pk in deleting.values_list("pk", flat=True):
+            yield model, pk
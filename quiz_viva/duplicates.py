@@ -0,0 +1,322 @@
+"""
+Near-duplicate question detection with MinHash signatures and LSH banding.
+
+Each question's normalized text is shingled into character 4-grams and
+summarized by a NUM_PERM value MinHash signature. Signatures are split into
+BANDS bands; questions sharing any band are candidates, and candidates whose
+estimated Jaccard similarity reaches DUPLICATE_THRESHOLD are near-duplicates.
+
+The index lives in memory and is persisted to DUPLICATE_INDEX_PATH as an
+append-only file of fixed size binary records, so every change is a single
+append and a restart only reads the file back. Processes sharing the file
+pick up each other's appends on their next lookup. Deleted or edited
+questions leave stale records behind; `manage.py builddedupeindex` rewrites
+the file from the database.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import unicodedata
+import uuid
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from quiz_viva.models import Question
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 4
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+DUPLICATE_THRESHOLD = 0.8
+
+MAGIC = b"QMH1"
+HEADER = MAGIC + np.uint32(NUM_PERM).tobytes()
+RECORD = np.dtype([("id", "V16"), ("deleted", "u1"), ("signature", "<u4", NUM_PERM)])
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+# Fixed seed, persisted signatures must stay comparable across restarts
+_rng = np.random.default_rng(20240117)
+PERM_A = _rng.integers(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+PERM_B = _rng.integers(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text).casefold()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def shingles(text):
+    text = normalize(text)
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i : i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def shingle_hash(shingle):
+    digest = hashlib.blake2b(shingle.encode(), digest_size=4).digest()
+    return int.from_bytes(digest, "little")
+
+
+def signature(text):
+    hashes = np.fromiter(map(shingle_hash, shingles(text)), dtype=np.uint64)
+    permuted = (np.outer(hashes, PERM_A) + PERM_B) % MERSENNE_PRIME & MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def similarity(a, b):
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+class DuplicateIndex:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self, inode=None):
+        self.signatures = {}
+        self.buckets = [defaultdict(set) for _ in range(BANDS)]
+        self.offset = 0
+        self.inode = inode
+
+    def band_keys(self, sig):
+        return [sig[band * ROWS : (band + 1) * ROWS].tobytes() for band in range(BANDS)]
+
+    def apply(self, records):
+        ids = [uuid.UUID(bytes=pk) for pk in records["id"].tolist()]
+        signatures = records["signature"]
+        # Each band of every record as one bytes key, sliced in bulk
+        band_keys = [
+            np.ascontiguousarray(signatures[:, band * ROWS : (band + 1) * ROWS])
+            .view(f"V{ROWS * 4}")
+            .ravel()
+            .tolist()
+            for band in range(BANDS)
+        ]
+        for row, (pk, deleted) in enumerate(zip(ids, records["deleted"].tolist())):
+            if deleted:
+                self.signatures.pop(pk, None)
+                continue
+            self.signatures[pk] = signatures[row]
+            for bucket, keys in zip(self.buckets, band_keys):
+                bucket[keys[row]].add(pk)
+
+    def refresh(self):
+        """
+        Apply records appended to the file since it was last read, or reload
+        it entirely after a rebuild replaced it.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if stat.st_ino != self.inode:
+            self.reset(stat.st_ino)
+        size = stat.st_size
+        if size <= self.offset:
+            return
+        with open(self.path, "rb") as file:
+            if self.offset == 0:
+                if file.read(len(HEADER)) != HEADER:
+                    logger.warning(
+                        "Ignoring incompatible duplicate index %s, rebuild it with "
+                        "manage.py builddedupeindex",
+                        self.path,
+                    )
+                    self.offset = size
+                    return
+                self.offset = len(HEADER)
+            file.seek(self.offset)
+            count = (size - self.offset) // RECORD.itemsize
+            records = np.fromfile(file, dtype=RECORD, count=count)
+        self.offset += count * RECORD.itemsize
+        self.apply(records)
+
+    def create(self):
+        """
+        Create the file with its header unless it exists. The header is
+        written to a private file linked into place, which fails if another
+        process created the file first, so no process ever appends to a file
+        still missing it.
+        """
+        if os.path.exists(self.path):
+            return
+        temporary = f"{self.path}.{os.getpid()}.{threading.get_ident()}.new"
+        with open(temporary, "wb") as file:
+            file.write(HEADER)
+        try:
+            os.link(temporary, self.path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(temporary)
+
+    def append(self, records):
+        self.create()
+        with open(self.path, "ab") as file:
+            file.write(records.tobytes())
+
+    def record(self, pk, sig):
+        records = np.zeros(1, dtype=RECORD)
+        records["id"] = np.void(pk.bytes)
+        records["signature"] = sig
+        return records
+
+    def tombstones(self, pks):
+        records = np.zeros(len(pks), dtype=RECORD)
+        records["id"] = [np.void(pk.bytes) for pk in pks]
+        records["deleted"] = 1
+        return records
+
+    def add(self, pk, text):
+        with self.lock:
+            self.refresh()
+            records = self.record(pk, signature(text))
+            self.append(records)
+            # Read back on the next refresh, applying it twice is harmless
+            self.apply(records)
+
+    def remove(self, *pks):
+        with self.lock:
+            self.refresh()
+            records = self.tombstones(pks)
+            self.append(records)
+            # Read back on the next refresh, applying it twice is harmless
+            self.apply(records)
+
+    def copy(self, pairs):
+        """
+        Index each new id of (existing id, new id) pairs under the signature
+        of the existing one, e.g. for cloned questions.
+        """
+        with self.lock:
+            self.refresh()
+            found = [
+                (new, self.signatures[old])
+                for old, new in pairs
+                if old in self.signatures
+            ]
+            if not found:
+                return
+            records = np.zeros(len(found), dtype=RECORD)
+            records["id"] = [np.void(pk.bytes) for pk, _ in found]
+            records["signature"] = np.stack([sig for _, sig in found])
+            self.append(records)
+            # Read back on the next refresh, applying it twice is harmless
+            self.apply(records)
+
+    def candidates(self, sig, within=None):
+        found = set()
+        for bucket, key in zip(self.buckets, self.band_keys(sig)):
+            found |= bucket.get(key, set())
+        if within is not None:
+            found &= within
+        return found
+
+    def similar(self, sig, exclude=None, within=None):
+        """
+        Ids of indexed questions whose similarity to sig reaches the
+        threshold, most similar first, as (id, similarity) pairs.
+        """
+        with self.lock:
+            self.refresh()
+            matches = []
+            for pk in self.candidates(sig, within):
+                if pk == exclude or (other := self.signatures.get(pk)) is None:
+                    continue
+                if (score := similarity(sig, other)) >= DUPLICATE_THRESHOLD:
+                    matches.append((pk, score))
+        return sorted(matches, key=lambda match: -match[1])
+
+    def find(self, text, exclude=None):
+        return self.similar(signature(text), exclude=exclude)
+
+    def clusters(self, question_ids):
+        """
+        Group the given question ids into sets of near-duplicates, dropping
+        questions without any.
+        """
+        question_ids = set(question_ids)
+        parent = {pk: pk for pk in question_ids}
+
+        def root(pk):
+            while parent[pk] != pk:
+                parent[pk] = parent[parent[pk]]
+                pk = parent[pk]
+            return pk
+
+        for pk in question_ids:
+            if (sig := self.signatures.get(pk)) is None:
+                continue
+            for other, _ in self.similar(sig, exclude=pk, within=question_ids):
+                parent[root(other)] = root(pk)
+
+        groups = defaultdict(list)
+        for pk in question_ids:
+            groups[root(pk)].append(pk)
+        return [group for group in groups.values() if len(group) > 1]
+
+    def rebuild(self, rows):
+        """
+        Replace the index and its file with the given (id, text) rows.
+        """
+        with self.lock:
+            records = np.concatenate(
+                [np.zeros(0, dtype=RECORD)]
+                + [self.record(pk, signature(text)) for pk, text in rows]
+            )
+            temporary = f"{self.path}.tmp"
+            with open(temporary, "wb") as file:
+                file.write(HEADER)
+                file.write(records.tobytes())
+            os.replace(temporary, self.path)
+            self.refresh()
+        return len(records)
+
+
+def course_questions(course_id):
+    """
+    Questions of the live question banks linked to a course.
+    """
+    return Question.objects.filter(
+        qbank__qbankcourselink__course_id=course_id,
+        qbank__deleting_at__isnull=True,
+    )
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = DuplicateIndex(settings.DUPLICATE_INDEX_PATH)
+    return _index
+
+
+def on_question_save(sender, instance, **kwargs):
+    pk, text = instance.pk, instance.question
+    transaction.on_commit(lambda: get_index().add(pk, text))
+
+
+def on_question_delete(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: get_index().remove(pk))
+
+
+def connect_signals():
+    post_save.connect(on_question_save, sender=Question, dispatch_uid="dedupe")
+    post_delete.connect(on_question_delete, sender=Question, dispatch_uid="dedupe")
@@ -0,0 +1,88 @@
+from django.db import transaction
+from django.db.models import F
+
+from admin.models import Student
+from quiz_viva.models import (
+    CommunityMemberQuizOrVivaLink,
+    QuizOrViva,
+    StudentQuizOrVivaLink,
+)
+from users.models import UserCommunityLink
+from utils.counters import increment
+
+ENROLLMENT_BATCH_SIZE = 1000
+
+
+def cohort_students(department_id=None, course_id=None, class_or_semester=None):
+    """
+    User ids of the students matching every given selector, as one query.
+    A course selects the students of its departments in its class or
+    semester.
+    """
+    students = Student.objects.all()
+    if department_id:
+        students = students.filter(studentdepartmentlink__department_id=department_id)
+    if course_id:
+        course = "studentdepartmentlink__department__coursedepartmentlink__course"
+        students = students.filter(
+            **{
+                f"{course}_id": course_id,
+                f"{course}__class_or_semester": F("class_or_semester"),
+            }
+        )
+    if class_or_semester is not None:
+        students = students.filter(class_or_semester=class_or_semester)
+    return students.values_list("user_id", flat=True).distinct()
+
+
+def cohort_community_members(community_id):
+    return (
+        UserCommunityLink.objects.filter(
+            community_id=community_id,
+            accepted=True,
+            role__name="CommunityMember",
+        )
+        .values_list("user_id", flat=True)
+        .distinct()
+    )
+
+
+def enroll(link_model, user_field, quiz_or_viva_id, user_ids):
+    """
+    Link every user in user_ids to the quiz or viva, skipping existing links
+    through the (user, quiz_or_viva) unique constraint.
+    Returns (matched, enrolled) counts.
+    """
+    existing = link_model.objects.filter(quiz_or_viva_id=quiz_or_viva_id)
+    with transaction.atomic():
+        before = existing.count()
+        links = [
+            link_model(**{user_field: user_id, "quiz_or_viva_id": quiz_or_viva_id})
+            for user_id in user_ids
+        ]
+        link_model.objects.bulk_create(
+            links, batch_size=ENROLLMENT_BATCH_SIZE, ignore_conflicts=True
+        )
+        enrolled = existing.count() - before
+        increment(
+            QuizOrViva.objects.filter(pk=quiz_or_viva_id), "enrolled_count", enrolled
+        )
+    return len(links), enrolled
+
+
+def enroll_students(quiz_or_viva_id, **selectors):
+    return enroll(
+        StudentQuizOrVivaLink,
+        "student_id",
+        quiz_or_viva_id,
+        cohort_students(**selectors),
+    )
+
+
+def enroll_community_members(quiz_or_viva_id, community_id):
+    return enroll(
+        CommunityMemberQuizOrVivaLink,
+        "community_member_id",
+        quiz_or_viva_id,
+        cohort_community_members(community_id),
+    )
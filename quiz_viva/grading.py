@@ -0,0 +1,117 @@
+from django.db import transaction
+from django.utils import timezone
+
+from quiz_viva.analytics import invalidate_analytics
+from quiz_viva.archive import archived_enrollment
+from quiz_viva.deletion import hold_live
+from quiz_viva.models import (
+    Answer,
+    CommunityMemberQuizOrVivaLink,
+    Question,
+    QuestionBank,
+    QuestionResponse,
+    QuizOrViva,
+    StudentQuizOrVivaLink,
+)
+from quiz_viva.results import record_result
+from quiz_viva.versions import has_paper, paper, pinned_answers
+
+
+class GradingError(Exception):
+    pass
+
+
+def is_enrolled(user_id, quiz_or_viva):
+    # Archiving moves the enrollment links to the archive file
+    if quiz_or_viva.archived_at:
+        return str(user_id) in archived_enrollment(quiz_or_viva.id)
+    return (
+        StudentQuizOrVivaLink.objects.filter(
+            student_id=user_id, quiz_or_viva_id=quiz_or_viva.id
+        ).exists()
+        or CommunityMemberQuizOrVivaLink.objects.filter(
+            community_member_id=user_id, quiz_or_viva_id=quiz_or_viva.id
+        ).exists()
+    )
+
+
+def grade_submission(user_id, quiz_or_viva, submitted):
+    """
+    Grade submitted (question_id, answer_id) pairs and store them, replacing
+    earlier responses to the same questions. A quiz or viva with a paper is
+    graded against the versions pinned when it opened and only accepts their
+    questions, others against the current Answer.is_correct. The student's
+    StudentResult is updated in the same transaction.
+    Returns the number of graded responses and how many are correct.
+    """
+    now = timezone.now()
+    if not quiz_or_viva.start_time <= now <= quiz_or_viva.end_time:
+        raise GradingError("Quiz or viva is not open")
+    if not is_enrolled(user_id, quiz_or_viva):
+        raise GradingError("Not enrolled in this quiz or viva")
+
+    if quiz_or_viva.paper_pinned_at is None and has_paper(quiz_or_viva):
+        raise GradingError("Paper is not ready yet")
+
+    submitted = dict(submitted)
+    answer_ids = [pk for pk in submitted.values() if pk]
+    if pinned := paper(quiz_or_viva):
+        questions, answers = pinned_answers(pinned)
+        # Edits after opening may have deleted what the versions refer to
+        live_questions = set(
+            Question.objects.filter(id__in=submitted).values_list("id", flat=True)
+        )
+        live_answers = set(
+            Answer.objects.filter(id__in=answer_ids).values_list("id", flat=True)
+        )
+    else:
+        questions = dict(
+            Question.objects.filter(id__in=submitted).values_list("id", "qbank_id")
+        )
+        answers = {
+            pk: (question_id, is_correct)
+            for pk, question_id, is_correct in Answer.objects.filter(
+                id__in=answer_ids
+            ).values_list("id", "question_id", "is_correct")
+        }
+        live_questions, live_answers = set(questions), set(answers)
+
+    responses = []
+    for question_id, answer_id in submitted.items():
+        if question_id not in questions:
+            raise GradingError(f"Unknown question {question_id}")
+        is_correct = False
+        if answer_id:
+            answer_question, is_correct = answers.get(answer_id, (None, False))
+            if answer_question != question_id:
+                raise GradingError(
+                    f"Answer {answer_id} is not an option of question {question_id}"
+                )
+        if question_id not in live_questions:
+            raise GradingError(f"Question {question_id} no longer exists")
+        responses.append(
+            QuestionResponse(
+                student_id=user_id,
+                quiz_or_viva_id=quiz_or_viva.id,
+                question_id=question_id,
+                answer_id=answer_id if answer_id in live_answers else None,
+                is_correct=is_correct,
+            )
+        )
+
+    with transaction.atomic():
+        if not hold_live(QuizOrViva, quiz_or_viva.id):
+            raise GradingError("Quiz or viva is being deleted")
+        if not hold_live(QuestionBank, *(questions[pk] for pk in submitted)):
+            raise GradingError("A question bank of these is being deleted")
+        QuestionResponse.objects.bulk_create(
+            responses,
+            update_conflicts=True,
+            unique_fields=["quiz_or_viva", "student", "question"],
+            update_fields=["answer", "is_correct", "updated_at"],
+        )
+        record_result(user_id, quiz_or_viva.id, len(pinned), questions.values())
+        transaction.on_commit(
+            lambda: invalidate_analytics([quiz_or_viva.id], questions.values())
+        )
+    return len(responses), sum(response.is_correct for response in responses)
@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from quiz_viva.archive import (
+    archive_quiz_or_viva,
+    closed_before,
+    interrupted,
+    table_sizes,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move quizzes and vivas that closed long enough ago to compressed "
+        "archive files, resuming interrupted runs first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            dest="older_than_days",
+            type=int,
+            default=settings.ARCHIVE_AFTER_DAYS,
+            help="Archive quizzes and vivas that ended this many days ago.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            dest="batch_size",
+            type=int,
+            default=1000,
+            help="Rows read or deleted per statement.",
+        )
+        parser.add_argument(
+            "--pause",
+            dest="pause",
+            type=float,
+            default=0.05,
+            help="Seconds to sleep between delete batches.",
+        )
+        parser.add_argument(
+            "--limit",
+            dest="limit",
+            type=int,
+            default=None,
+            help="Archive at most this many quizzes and vivas.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+        before = table_sizes()
+        pending = list(interrupted()) + list(
+            closed_before(cutoff).order_by("end_time")[: options["limit"]]
+        )
+        archived_bytes = 0
+        for quiz_or_viva in pending:
+            size, deleted = archive_quiz_or_viva(
+                quiz_or_viva, options["batch_size"], options["pause"]
+            )
+            archived_bytes += size or 0
+            self.stdout.write(
+                f"{quiz_or_viva.id}: "
+                + ("resumed" if size is None else f"{size} bytes archived")
+                + ", "
+                + ", ".join(f"{table} -{count}" for table, count in deleted.items())
+            )
+
+        after = table_sizes()
+        self.stdout.write(f"Archived {len(pending)}, {archived_bytes} bytes written")
+        for table, size in before.items():
+            line = f"{table}: {size['rows']} -> {after[table]['rows']} rows"
+            if "bytes" in size:
+                line += f", {size['bytes']} -> {after[table]['bytes']} bytes"
+            self.stdout.write(line)
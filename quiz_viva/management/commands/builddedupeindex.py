@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from quiz_viva.duplicates import get_index
+from quiz_viva.models import Question
+
+
+class Command(BaseCommand):
+    help = "Rebuild the near-duplicate question index from the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            dest="chunk_size",
+            type=int,
+            default=2000,
+            help="Questions read per query.",
+        )
+
+    def handle(self, *args, **options):
+        rows = Question.objects.values_list("id", "question").iterator(
+            chunk_size=options["chunk_size"]
+        )
+        count = get_index().rebuild(rows)
+        self.stdout.write(f"Indexed {count} questions")
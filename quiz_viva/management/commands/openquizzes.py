@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from quiz_viva.versions import opening, pin_paper
+
+
+class Command(BaseCommand):
+    help = (
+        "Pin the papers of quizzes and vivas as they open to the current "
+        "versions of their questions. Meant to run every minute."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lead",
+            dest="lead",
+            type=int,
+            default=60,
+            help="Also pin papers opening within this many seconds.",
+        )
+
+    def handle(self, *args, **options):
+        opened = 0
+        for quiz_or_viva in opening(options["lead"]).iterator():
+            pin_paper(quiz_or_viva)
+            opened += 1
+        self.stdout.write(f"{opened} papers pinned")
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+
+from admin.models import Course, Module
+from quiz_viva.models import (
+    CommunityMemberQuizOrVivaLink,
+    Question,
+    QuestionBank,
+    QuizOrViva,
+    StudentQuizOrVivaLink,
+)
+from utils.counters import reconcile_counter
+
+
+def counters():
+    """
+    (name, parents, counter field, [(child model, foreign key)]) of every
+    maintained counter. Archived quizzes and vivas are skipped, their links
+    only live in the archive.
+    """
+    return [
+        (
+            "question_bank.question_count",
+            QuestionBank.objects.all(),
+            "question_count",
+            [(Question, "qbank")],
+        ),
+        (
+            "course.module_count",
+            Course.objects.all(),
+            "module_count",
+            [(Module, "course")],
+        ),
+        (
+            "quiz_or_viva.enrolled_count",
+            QuizOrViva.objects.filter(archived_at__isnull=True),
+            "enrolled_count",
+            [
+                (StudentQuizOrVivaLink, "quiz_or_viva"),
+                (CommunityMemberQuizOrVivaLink, "quiz_or_viva"),
+            ],
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized counters in batches and report drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            dest="batch_size",
+            type=int,
+            default=1000,
+            help="Parent rows recounted per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        for name, parents, field, children in counters():
+            checked, fixed, drift = reconcile_counter(
+                parents, field, children, options["batch_size"]
+            )
+            self.stdout.write(
+                f"{name}: {checked} checked, {fixed} fixed, drift {drift}"
+            )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from quiz_viva.deletion import DELETION_BATCH_SIZE, delete_now, pending_deletions
+
+
+class Command(BaseCommand):
+    help = (
+        "Finish deleting the question banks and quizzes or vivas left in the "
+        "deleting state, e.g. after a restart."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            dest="batch_size",
+            type=int,
+            default=DELETION_BATCH_SIZE,
+            help="Rows deleted per statement.",
+        )
+        parser.add_argument(
+            "--pause",
+            dest="pause",
+            type=float,
+            default=0.05,
+            help="Seconds to sleep between batches.",
+        )
+
+    def handle(self, *args, **options):
+        for model, pk in list(pending_deletions()):
+            deleted = delete_now(model, pk, options["batch_size"], options["pause"])
+            self.stdout.write(
+                f"{model._meta.db_table} {pk}: "
+                + ", ".join(f"{table} -{count}" for table, count in deleted.items())
+            )
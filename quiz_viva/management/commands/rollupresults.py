@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_datetime
+
+from quiz_viva.results import rollup_results
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh result percentiles of recently graded quizzes and vivas and "
+        "recompute the per course result summaries. Meant to run nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            dest="since",
+            type=parse_datetime,
+            default=None,
+            help="Refresh quizzes and vivas graded since this ISO datetime "
+            "instead of since the previous rollup.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            dest="batch_size",
+            type=int,
+            default=1000,
+            help="Rows written per statement.",
+        )
+
+    def handle(self, *args, **options):
+        refreshed, changed, courses = rollup_results(
+            options["since"], options["batch_size"]
+        )
+        self.stdout.write(
+            f"{refreshed} quizzes and vivas refreshed, {changed} percentiles "
+            f"changed, {courses} course summaries"
+        )
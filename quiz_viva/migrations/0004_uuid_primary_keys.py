@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:48
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quiz_viva", "0003_answer_is_correct"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="answer",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="communitymemberquizorvivalink",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="qbankcourselink",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="question",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="questionbank",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="questionmodulelink",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="quizorviva",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="studentquizorvivalink",
+            name="id",
+            field=models.UUIDField(
+                default=uuid.uuid4, primary_key=True, serialize=False
+            ),
+        ),
+    ]
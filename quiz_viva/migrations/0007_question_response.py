@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:08
+
+import django.db.models.deletion
+import utils.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quiz_viva", "0006_access_pattern_indexes"),
+        ("users", "0009_token_expires_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QuestionResponse",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=utils.ids.generate_id, primary_key=True, serialize=False
+                    ),
+                ),
+                ("is_correct", models.BooleanField(default=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "answer",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="quiz_viva.answer",
+                    ),
+                ),
+                (
+                    "question",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="quiz_viva.question",
+                    ),
+                ),
+                (
+                    "quiz_or_viva",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="quiz_viva.quizorviva",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="users.user"
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "question_response",
+                "indexes": [
+                    models.Index(fields=["question"], name="response_question_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("quiz_or_viva", "student", "question"),
+                        name="unique_quiz_or_viva_student_question",
+                    )
+                ],
+            },
+        ),
+    ]
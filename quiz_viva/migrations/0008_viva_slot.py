@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:13
+
+import django.db.models.deletion
+import utils.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quiz_viva", "0007_question_response"),
+        ("users", "0009_token_expires_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VivaSlot",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=utils.ids.generate_id, primary_key=True, serialize=False
+                    ),
+                ),
+                ("start_time", models.DateTimeField()),
+                ("end_time", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "quiz_or_viva",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="quiz_viva.quizorviva",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="users.user"
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "viva_slot",
+                "indexes": [
+                    models.Index(
+                        fields=["student", "start_time"], name="viva_slot_student_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("quiz_or_viva", "student"),
+                        name="unique_viva_slot_student",
+                    ),
+                    models.UniqueConstraint(
+                        fields=("quiz_or_viva", "start_time"),
+                        name="unique_viva_slot_start",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quiz_viva", "0008_viva_slot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="quizorviva",
+            name="archived_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
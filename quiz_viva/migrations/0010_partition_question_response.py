@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:20
+
+from django.conf import settings
+from django.db import migrations
+
+from utils.ids import uuid7_floor
+from utils.partitions import MonthlyPartitions
+
+
+def partition_by_quiz_month(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    responses = MonthlyPartitions(
+        "question_response", "quiz_or_viva_id", bound=uuid7_floor
+    )
+    responses.convert(settings.PARTITION_MONTHS_AHEAD)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quiz_viva", "0009_quiz_or_viva_archived_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_by_quiz_month, migrations.RunPython.noop),
+    ]
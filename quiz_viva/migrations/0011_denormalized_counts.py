@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:22
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, foreign_key):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{foreign_key: OuterRef("pk")})
+            .values(foreign_key)
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def backfill_counts(apps, schema_editor):
+    model = apps.get_model
+    model("quiz_viva", "QuestionBank").objects.update(
+        question_count=count_of(model("quiz_viva", "Question"), "qbank")
+    )
+    model("quiz_viva", "QuizOrViva").objects.update(
+        enrolled_count=count_of(
+            model("quiz_viva", "StudentQuizOrVivaLink"), "quiz_or_viva"
+        )
+        + count_of(model("quiz_viva", "CommunityMemberQuizOrVivaLink"), "quiz_or_viva")
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quiz_viva", "0010_partition_question_response"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="questionbank",
+            name="question_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="quizorviva",
+            name="enrolled_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quiz_viva", "0011_denormalized_counts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="questionbank",
+            name="deleting_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="quizorviva",
+            name="deleting_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:34
+
+import django.db.models.deletion
+import utils.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quiz_viva", "0012_deleting_state"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QuestionVersion",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=utils.ids.generate_id, primary_key=True, serialize=False
+                    ),
+                ),
+                ("version", models.IntegerField()),
+                ("content_hash", models.CharField(max_length=64)),
+                ("payload", models.JSONField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "question",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to="quiz_viva.question",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "question_version",
+            },
+        ),
+        migrations.CreateModel(
+            name="QuizOrVivaQuestion",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=utils.ids.generate_id, primary_key=True, serialize=False
+                    ),
+                ),
+                ("position", models.IntegerField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "question",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to="quiz_viva.question",
+                    ),
+                ),
+                (
+                    "quiz_or_viva",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="quiz_viva.quizorviva",
+                    ),
+                ),
+                (
+                    "version",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="quiz_viva.questionversion",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "quiz_or_viva_question",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="questionversion",
+            constraint=models.UniqueConstraint(
+                fields=("question", "content_hash"), name="unique_question_content"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="quizorvivaquestion",
+            constraint=models.UniqueConstraint(
+                fields=("quiz_or_viva", "question"), name="unique_quiz_or_viva_question"
+            ),
+        ),
+    ]
@@ -0,0 +1,147 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:36
+
+import django.db.models.deletion
+import utils.ids
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def backfill_results(apps, schema_editor):
+    # Percentiles are left to the first rollupresults run
+    model = apps.get_model
+    responses = model("quiz_viva", "QuestionResponse").objects.order_by()
+    qbank_courses = {}
+    for qbank_id, course_id in (
+        model("quiz_viva", "QBankCourseLink")
+        .objects.order_by("-created_at")
+        .values_list("question_bank_id", "course_id")
+    ):
+        qbank_courses[qbank_id] = course_id
+    quiz_courses = {}
+    for quiz_or_viva_id, qbank_id in responses.values_list(
+        "quiz_or_viva_id", "question__qbank_id"
+    ).distinct():
+        if course_id := qbank_courses.get(qbank_id):
+            quiz_courses.setdefault(quiz_or_viva_id, course_id)
+    StudentResult = model("quiz_viva", "StudentResult")
+    StudentResult.objects.bulk_create(
+        [
+            StudentResult(
+                course_id=quiz_courses.get(row["quiz_or_viva_id"]),
+                total=row["answered"],
+                score=round(100 * row["correct"] / row["answered"], 2),
+                **row,
+            )
+            for row in responses.values("student_id", "quiz_or_viva_id").annotate(
+                answered=Count("pk"),
+                correct=Count("pk", filter=Q(is_correct=True)),
+                graded_at=Max("updated_at"),
+            )
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("admin", "0011_course_module_count"),
+        ("quiz_viva", "0013_question_versions"),
+        ("users", "0010_partition_verification_token"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CourseResultSummary",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=utils.ids.generate_id, primary_key=True, serialize=False
+                    ),
+                ),
+                ("quizzes_or_vivas", models.IntegerField()),
+                ("students", models.IntegerField()),
+                ("results", models.IntegerField()),
+                ("mean_score", models.FloatField()),
+                ("lowest_score", models.FloatField()),
+                ("highest_score", models.FloatField()),
+                ("computed_at", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="admin.course"
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "course_result_summary",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("course",), name="unique_course_result_summary"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="StudentResult",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=utils.ids.generate_id, primary_key=True, serialize=False
+                    ),
+                ),
+                ("answered", models.IntegerField()),
+                ("correct", models.IntegerField()),
+                ("total", models.IntegerField()),
+                ("score", models.FloatField()),
+                ("percentile", models.FloatField(blank=True, null=True)),
+                ("graded_at", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "course",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="admin.course",
+                    ),
+                ),
+                (
+                    "quiz_or_viva",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="quiz_viva.quizorviva",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="users.user"
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "student_result",
+                "indexes": [
+                    models.Index(
+                        fields=["student", "-graded_at"],
+                        name="student_result_history_idx",
+                    ),
+                    models.Index(
+                        fields=["quiz_or_viva", "score"],
+                        name="student_result_score_idx",
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("student", "quiz_or_viva"), name="unique_student_result"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_results, migrations.RunPython.noop),
+    ]
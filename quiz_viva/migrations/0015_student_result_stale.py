@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quiz_viva", "0014_student_results"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="studentresult",
+            name="stale",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:04
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+
+def mark_pinned_papers(apps, schema_editor):
+    # Papers pinned lazily so far, the rest are pinned by openquizzes
+    QuizOrViva = apps.get_model("quiz_viva", "QuizOrViva")
+    QuizOrVivaQuestion = apps.get_model("quiz_viva", "QuizOrVivaQuestion")
+    QuizOrViva.objects.filter(
+        Exists(
+            QuizOrVivaQuestion.objects.filter(
+                quiz_or_viva=OuterRef("pk"), version__isnull=False
+            )
+        )
+    ).update(paper_pinned_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quiz_viva", "0015_student_result_stale"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="quizorviva",
+            name="paper_pinned_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_pinned_papers, migrations.RunPython.noop),
+    ]
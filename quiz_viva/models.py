@@ -1,12 +1,22 @@
-import uuid
 from django.db import models
 
+from utils.ids import generate_id
+
+
+class LiveManager(models.Manager):
+    """
+    Default manager hiding rows whose deletion is running in the background.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleting_at__isnull=True)
+
 
 # Create your models here
 class QuizOrViva(models.Model):
     TYPE_CHOICES = [("VIVA", "viva"), ("QUIZ", "quiz")]
 
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     title = models.CharField(max_length=100)
     description = models.CharField(max_length=500)
     viva_or_quiz = models.CharField(max_length=4, choices=TYPE_CHOICES)
@@ -15,14 +25,23 @@ class QuizOrViva(models.Model):
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
     duration = models.IntegerField()
+    archived_at = models.DateTimeField(null=True, blank=True)
+    # Set by `manage.py openquizzes` once its paper is pinned to versions
+    paper_pinned_at = models.DateTimeField(null=True, blank=True)
+    # Enrolled students and community members, kept as they were once archived
+    enrolled_count = models.IntegerField(default=0)
+    deleting_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = LiveManager()
+    all_objects = models.Manager()
+
     class Meta:
         db_table = "quiz_or_viva"
 
 class StudentQuizOrVivaLink(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     student = models.ForeignKey("users.User", on_delete=models.CASCADE)
     quiz_or_viva = models.ForeignKey("QuizOrViva", on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -37,7 +56,7 @@ class StudentQuizOrVivaLink(models.Model):
         ]
 
 class CommunityMemberQuizOrVivaLink(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     community_member = models.ForeignKey("users.User", on_delete=models.CASCADE)
     quiz_or_viva = models.ForeignKey("QuizOrViva", on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -53,18 +72,23 @@ class CommunityMemberQuizOrVivaLink(models.Model):
 
 
 class QuestionBank(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     title = models.CharField(max_length=50)
     creator = models.ForeignKey("users.User", on_delete=models.CASCADE)
+    question_count = models.IntegerField(default=0)
+    deleting_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = LiveManager()
+    all_objects = models.Manager()
+
     class Meta:
         db_table = "question_bank"
 
 
 class QBankCourseLink(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     question_bank = models.ForeignKey("QuestionBank", on_delete=models.CASCADE)
     course = models.ForeignKey("admin.Course", on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -82,7 +106,7 @@ class QBankCourseLink(models.Model):
 class Question(models.Model):
     TYPE_CHOICES = [("MCQ", "mcq"), ("DIRECT", "direct")]
 
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     question_number = models.IntegerField()
     question = models.CharField(max_length=500)
     question_type = models.CharField(max_length=6, choices=TYPE_CHOICES)
@@ -92,9 +116,14 @@ class Question(models.Model):
 
     class Meta:
         db_table = "question"
+        indexes = [
+            models.Index(
+                fields=["qbank", "question_number"], name="question_qbank_number_idx"
+            ),
+        ]
 
 class QuestionModuleLink(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     question = models.ForeignKey("Question", on_delete=models.CASCADE)
     module = models.ForeignKey("admin.Module", on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -111,7 +140,7 @@ class QuestionModuleLink(models.Model):
 class Answer(models.Model):
     ANSWER_CHOICES = [("PLAIN", 0), ("A", 1), ("B", 2), ("C", 3), ("D", 4), ("E", 5)]
 
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     answer_number = models.IntegerField(choices=ANSWER_CHOICES)
     answer = models.CharField(max_length=500)
     question = models.ForeignKey("Question", on_delete=models.CASCADE)
@@ -121,3 +150,169 @@ class Answer(models.Model):
 
     class Meta:
         db_table = "answer"
+        indexes = [
+            models.Index(
+                fields=["question", "answer_number"], name="answer_question_number_idx"
+            ),
+        ]
+
+
+class QuestionVersion(models.Model):
+    """
+    Immutable snapshot of a question and its answers. Rows are only ever
+    added, and outlive the question so pinned papers stay readable.
+    """
+
+    id = models.UUIDField(primary_key=True, default=generate_id)
+    question = models.ForeignKey(
+        "Question", on_delete=models.DO_NOTHING, db_constraint=False
+    )
+    version = models.IntegerField()
+    # SHA-256 of the canonical JSON of payload
+    content_hash = models.CharField(max_length=64)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "question_version"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["question", "content_hash"], name="unique_question_content"
+            )
+        ]
+
+
+class QuizOrVivaQuestion(models.Model):
+    id = models.UUIDField(primary_key=True, default=generate_id)
+    quiz_or_viva = models.ForeignKey("QuizOrViva", on_delete=models.CASCADE)
+    question = models.ForeignKey(
+        "Question", on_delete=models.DO_NOTHING, db_constraint=False
+    )
+    position = models.IntegerField()
+    # Set as the quiz or viva opens, see quiz_viva.versions
+    version = models.ForeignKey(
+        "QuestionVersion", on_delete=models.CASCADE, null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "quiz_or_viva_question"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["quiz_or_viva", "question"],
+                name="unique_quiz_or_viva_question",
+            )
+        ]
+
+
+class QuestionResponse(models.Model):
+    id = models.UUIDField(primary_key=True, default=generate_id)
+    student = models.ForeignKey("users.User", on_delete=models.CASCADE)
+    quiz_or_viva = models.ForeignKey("QuizOrViva", on_delete=models.CASCADE)
+    question = models.ForeignKey("Question", on_delete=models.CASCADE)
+    answer = models.ForeignKey("Answer", on_delete=models.SET_NULL, null=True)
+    is_correct = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "question_response"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["quiz_or_viva", "student", "question"],
+                name="unique_quiz_or_viva_student_question",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["question"], name="response_question_idx"),
+        ]
+
+
+class StudentResult(models.Model):
+    """
+    Result of one student in one quiz or viva, kept current by grading so
+    result history is read without aggregating responses.
+    """
+
+    id = models.UUIDField(primary_key=True, default=generate_id)
+    student = models.ForeignKey("users.User", on_delete=models.CASCADE)
+    quiz_or_viva = models.ForeignKey("QuizOrViva", on_delete=models.CASCADE)
+    course = models.ForeignKey(
+        "admin.Course", on_delete=models.SET_NULL, null=True, blank=True
+    )
+    answered = models.IntegerField()
+    correct = models.IntegerField()
+    # Questions of the paper, or the answered ones without a paper
+    total = models.IntegerField()
+    score = models.FloatField()
+    # Exact when graded, refreshed for every result by rollupresults
+    percentile = models.FloatField(null=True, blank=True)
+    # Responses were deleted with their question bank, the counts are
+    # recomputed once the deletion finishes
+    stale = models.BooleanField(default=False)
+    graded_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "student_result"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["student", "quiz_or_viva"], name="unique_student_result"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["student", "-graded_at"], name="student_result_history_idx"
+            ),
+            models.Index(
+                fields=["quiz_or_viva", "score"], name="student_result_score_idx"
+            ),
+        ]
+
+
+class CourseResultSummary(models.Model):
+    id = models.UUIDField(primary_key=True, default=generate_id)
+    course = models.ForeignKey("admin.Course", on_delete=models.CASCADE)
+    quizzes_or_vivas = models.IntegerField()
+    students = models.IntegerField()
+    results = models.IntegerField()
+    mean_score = models.FloatField()
+    lowest_score = models.FloatField()
+    highest_score = models.FloatField()
+    computed_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "course_result_summary"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["course"], name="unique_course_result_summary"
+            )
+        ]
+
+
+class VivaSlot(models.Model):
+    id = models.UUIDField(primary_key=True, default=generate_id)
+    quiz_or_viva = models.ForeignKey("QuizOrViva", on_delete=models.CASCADE)
+    student = models.ForeignKey("users.User", on_delete=models.CASCADE)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "viva_slot"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["quiz_or_viva", "student"], name="unique_viva_slot_student"
+            ),
+            models.UniqueConstraint(
+                fields=["quiz_or_viva", "start_time"], name="unique_viva_slot_start"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["student", "start_time"], name="viva_slot_student_idx"),
+        ]
@@ -0,0 +1,233 @@
+"""
+Per student results and per course rollups.
+
+grade_submission() keeps one StudentResult row per student and quiz or viva
+current: after storing a submission it recounts that student's responses to
+that quiz or viva only, through the unique index they share, and upserts the
+row with its percentile among the results so far. Percentiles of the other
+students drift as later results arrive, so rollup_results(), run nightly by
+`manage.py rollupresults`, refreshes them for every quiz or viva graded since
+its last run and recomputes CourseResultSummary from the result rows alone.
+
+Deleting a question bank deletes the responses to its questions. The results
+holding any are marked stale when the deletion starts and recounted by
+recount_stale_results() once it is done.
+"""
+
+from bisect import bisect_left, bisect_right
+
+from django.db import transaction
+from django.db.models import Avg, Count, Exists, Max, Min, OuterRef, Q
+from django.utils import timezone
+
+from quiz_viva.models import (
+    CourseResultSummary,
+    QBankCourseLink,
+    QuestionResponse,
+    QuizOrVivaQuestion,
+    StudentResult,
+)
+
+
+def percentile(below, tied, results):
+    """
+    Share of results scoring below, counting ties as half, as a percentage.
+    """
+    return round(100 * (below + tied / 2) / results, 2)
+
+
+def percentile_rank(scores, score):
+    # scores is sorted and includes score
+    below = bisect_left(scores, score)
+    return percentile(below, bisect_right(scores, score) - below, len(scores))
+
+
+def course_of(qbank_ids):
+    return (
+        QBankCourseLink.objects.filter(question_bank_id__in=qbank_ids)
+        .order_by("created_at")
+        .values_list("course_id", flat=True)
+        .first()
+    )
+
+
+def student_results(student_id, course_id=None):
+    """
+    Results of a student, latest first, left out once their quiz or viva is
+    being deleted.
+    """
+    results = StudentResult.objects.filter(
+        student_id=student_id, quiz_or_viva__deleting_at__isnull=True
+    )
+    if course_id:
+        results = results.filter(course_id=course_id)
+    return results.order_by("-graded_at", "-pk")
+
+
+def submitted_responses(student_id, quiz_or_viva_id):
+    return QuestionResponse.objects.filter(
+        quiz_or_viva_id=quiz_or_viva_id, student_id=student_id
+    )
+
+
+def record_result(student_id, quiz_or_viva_id, question_count, qbank_ids):
+    """
+    Recount the responses of a student to a quiz or viva into its
+    StudentResult. question_count is the size of its paper, if any. The
+    course is taken from the first graded question bank and then kept.
+    """
+    counts = submitted_responses(student_id, quiz_or_viva_id).aggregate(
+        answered=Count("pk"), correct=Count("pk", filter=Q(is_correct=True))
+    )
+    total = question_count or counts["answered"]
+    result = StudentResult(
+        student_id=student_id,
+        quiz_or_viva_id=quiz_or_viva_id,
+        course_id=course_of(set(qbank_ids)),
+        answered=counts["answered"],
+        correct=counts["correct"],
+        total=total,
+        score=round(100 * counts["correct"] / total, 2) if total else 0.0,
+        stale=False,
+        graded_at=timezone.now(),
+    )
+    StudentResult.objects.bulk_create(
+        [result],
+        update_conflicts=True,
+        unique_fields=["student", "quiz_or_viva"],
+        update_fields=[
+            "answered",
+            "correct",
+            "total",
+            "score",
+            "stale",
+            "graded_at",
+            "updated_at",
+        ],
+    )
+    # Each count is a range scan of the (quiz_or_viva, score) index
+    results = StudentResult.objects.filter(quiz_or_viva_id=quiz_or_viva_id)
+    StudentResult.objects.filter(
+        student_id=student_id, quiz_or_viva_id=quiz_or_viva_id
+    ).update(
+        percentile=percentile(
+            results.filter(score__lt=result.score).count(),
+            results.filter(score=result.score).count(),
+            results.count(),
+        )
+    )
+
+
+def mark_stale_results(qbank_id):
+    """
+    Mark the results holding responses to questions of a question bank.
+    """
+    return StudentResult.objects.filter(
+        Exists(
+            QuestionResponse.objects.filter(
+                student_id=OuterRef("student_id"),
+                quiz_or_viva_id=OuterRef("quiz_or_viva_id"),
+                question__qbank_id=qbank_id,
+            )
+        )
+    ).update(stale=True)
+
+
+def recount_stale_results():
+    """
+    Recount every stale result from the responses left, deleting those left
+    with none. Returns the number of results recounted or deleted.
+    """
+    stale = list(
+        StudentResult.objects.filter(stale=True).values_list(
+            "pk", "student_id", "quiz_or_viva_id"
+        )
+    )
+    for pk, student_id, quiz_or_viva_id in stale:
+        with transaction.atomic():
+            if not submitted_responses(student_id, quiz_or_viva_id).exists():
+                StudentResult.objects.filter(pk=pk).delete()
+                continue
+            question_count = QuizOrVivaQuestion.objects.filter(
+                quiz_or_viva_id=quiz_or_viva_id, version__isnull=False
+            ).count()
+            # The course is kept from the first grading
+            record_result(student_id, quiz_or_viva_id, question_count, ())
+    return len(stale)
+
+
+def refresh_percentiles(quiz_or_viva_id, batch_size=1000):
+    """
+    Recompute the percentiles of every result of a quiz or viva. Returns the
+    number of results changed.
+    """
+    results = list(
+        StudentResult.objects.filter(quiz_or_viva_id=quiz_or_viva_id).only(
+            "pk", "score", "percentile"
+        )
+    )
+    scores = sorted(result.score for result in results)
+    changed = []
+    for result in results:
+        rank = percentile_rank(scores, result.score)
+        if result.percentile != rank:
+            result.percentile = rank
+            changed.append(result)
+    StudentResult.objects.bulk_update(changed, ["percentile"], batch_size=batch_size)
+    return len(changed)
+
+
+def rollup_results(since=None, batch_size=1000):
+    """
+    Refresh the percentiles of quizzes and vivas graded since the given time,
+    by default the previous rollup, and recompute every course summary.
+    Returns (quizzes and vivas refreshed, percentiles changed, courses).
+    """
+    now = timezone.now()
+    if since is None:
+        since = CourseResultSummary.objects.aggregate(last=Max("computed_at"))["last"]
+    graded = StudentResult.objects.all()
+    if since is not None:
+        graded = graded.filter(graded_at__gte=since)
+    quiz_or_viva_ids = list(
+        graded.order_by().values_list("quiz_or_viva_id", flat=True).distinct()
+    )
+    changed = sum(refresh_percentiles(pk, batch_size) for pk in quiz_or_viva_ids)
+
+    summaries = [
+        CourseResultSummary(course_id=row.pop("course_id"), computed_at=now, **row)
+        for row in StudentResult.objects.filter(
+            course__isnull=False, quiz_or_viva__deleting_at__isnull=True
+        )
+        .values("course_id")
+        .annotate(
+            quizzes_or_vivas=Count("quiz_or_viva", distinct=True),
+            students=Count("student", distinct=True),
+            results=Count("pk"),
+            mean_score=Avg("score"),
+            lowest_score=Min("score"),
+            highest_score=Max("score"),
+        )
+        .order_by()
+    ]
+    fields = [
+        "quizzes_or_vivas",
+        "students",
+        "results",
+        "mean_score",
+        "lowest_score",
+        "highest_score",
+        "computed_at",
+        "updated_at",
+    ]
+    with transaction.atomic():
+        CourseResultSummary.objects.bulk_create(
+            summaries,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["course"],
+            update_fields=fields,
+        )
+        # Courses whose results are all gone
+        CourseResultSummary.objects.filter(computed_at__lt=now).delete()
+    return len(quiz_or_viva_ids), changed, len(summaries)
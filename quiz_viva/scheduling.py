@@ -0,0 +1,191 @@
+"""
+Packing of enrolled students into viva slots.
+
+A viva with a single conductor is split into back to back slots of its
+duration, in minutes, between start_time and end_time. Students are placed
+most constrained first, each into the earliest free slot that does not
+overlap anything else they are busy with: their slots in other vivas and the
+windows of the quizzes they are enrolled in.
+
+Scheduling is incremental. Existing slots are kept and only students without
+one are placed, so running it again after a student drops fills the freed
+slot without moving anyone else.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+
+from quiz_viva.models import QuizOrViva, StudentQuizOrVivaLink, VivaSlot
+from utils.counters import increment
+
+
+class BusyIntervals:
+    """
+    Disjoint, sorted [start, end) intervals. Overlapping inserts are merged,
+    so an overlap query only has to look at the last interval starting
+    before the queried end.
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def overlaps(self, start, end):
+        index = bisect_left(self.starts, end) - 1
+        return index >= 0 and self.ends[index] > start
+
+    def add(self, start, end):
+        low = bisect_left(self.ends, start)
+        high = bisect_left(self.starts, end)
+        if low < high:
+            start = min(start, self.starts[low])
+            end = max(end, self.ends[high - 1])
+        self.starts[low:high] = [start]
+        self.ends[low:high] = [end]
+
+
+def slot_times(viva):
+    length = timedelta(minutes=viva.duration)
+    if length <= timedelta(0):
+        return []
+    times = []
+    start = viva.start_time
+    while start + length <= viva.end_time:
+        times.append((start, start + length))
+        start += length
+    return times
+
+
+def load_busy(student_ids, start, end, exclude):
+    """
+    Busy intervals of the given students between start and end, leaving out
+    the vivas in exclude.
+    """
+    busy = defaultdict(BusyIntervals)
+    for student_id, slot_start, slot_end in (
+        VivaSlot.objects.filter(
+            student_id__in=student_ids, start_time__lt=end, end_time__gt=start
+        )
+        .exclude(quiz_or_viva_id__in=exclude)
+        .values_list("student_id", "start_time", "end_time")
+    ):
+        busy[student_id].add(slot_start, slot_end)
+    for student_id, quiz_start, quiz_end in (
+        StudentQuizOrVivaLink.objects.filter(
+            student_id__in=student_ids,
+            quiz_or_viva__viva_or_quiz="QUIZ",
+            quiz_or_viva__start_time__lt=end,
+            quiz_or_viva__end_time__gt=start,
+        )
+        .exclude(quiz_or_viva_id__in=exclude)
+        .values_list(
+            "student_id", "quiz_or_viva__start_time", "quiz_or_viva__end_time"
+        )
+    ):
+        busy[student_id].add(quiz_start, quiz_end)
+    return busy
+
+
+def place(viva, students, taken, busy):
+    """
+    Assign students to the free slots of viva. Returns the new VivaSlot rows
+    and the students left without a slot.
+    """
+    free = [times for times in slot_times(viva) if times[0] not in taken]
+    fits = {
+        student_id: [
+            times for times in free if not busy[student_id].overlaps(*times)
+        ]
+        for student_id in students
+    }
+    slots, unscheduled = [], []
+    used = set()
+    for student_id in sorted(students, key=lambda pk: (len(fits[pk]), str(pk))):
+        for start, end in fits[student_id]:
+            if start in used or busy[student_id].overlaps(start, end):
+                continue
+            used.add(start)
+            busy[student_id].add(start, end)
+            slots.append(
+                VivaSlot(
+                    quiz_or_viva_id=viva.id,
+                    student_id=student_id,
+                    start_time=start,
+                    end_time=end,
+                )
+            )
+            break
+        else:
+            unscheduled.append(student_id)
+    return slots, unscheduled
+
+
+def schedule_vivas(vivas):
+    """
+    Place every enrolled student without a slot into the given vivas.
+    Returns {viva id: {"scheduled": n, "unscheduled": [student ids]}}.
+    """
+    vivas = [viva for viva in vivas if viva.viva_or_quiz == "VIVA"]
+    if not vivas:
+        return {}
+    with transaction.atomic():
+        # Serialize concurrent runs for the same vivas, and with deletions
+        held = set(
+            QuizOrViva.objects.select_for_update()
+            .filter(id__in=[viva.id for viva in vivas])
+            .values_list("id", flat=True)
+        )
+        if not (vivas := [viva for viva in vivas if viva.id in held]):
+            return {}
+        return place_all(vivas, [viva.id for viva in vivas])
+
+
+def place_all(vivas, viva_ids):
+    enrolled = defaultdict(set)
+    for viva_id, student_id in StudentQuizOrVivaLink.objects.filter(
+        quiz_or_viva_id__in=viva_ids
+    ).values_list("quiz_or_viva_id", "student_id"):
+        enrolled[viva_id].add(student_id)
+    existing = defaultdict(dict)
+    for viva_id, student_id, start, end in VivaSlot.objects.filter(
+        quiz_or_viva_id__in=viva_ids
+    ).values_list("quiz_or_viva_id", "student_id", "start_time", "end_time"):
+        existing[viva_id][student_id] = (start, end)
+
+    students = set().union(*enrolled.values())
+    busy = load_busy(
+        students,
+        min(viva.start_time for viva in vivas),
+        max(viva.end_time for viva in vivas),
+        exclude=viva_ids,
+    )
+    # Slots already held in the vivas being scheduled are busy time as well
+    for slots in existing.values():
+        for student_id, times in slots.items():
+            busy[student_id].add(*times)
+
+    new_slots, report = [], {}
+    for viva in sorted(vivas, key=lambda viva: viva.start_time):
+        held = existing[viva.id]
+        taken = {start for start, _ in held.values()}
+        slots, unscheduled = place(viva, enrolled[viva.id] - set(held), taken, busy)
+        new_slots.extend(slots)
+        report[viva.id] = {"scheduled": len(slots), "unscheduled": unscheduled}
+
+    VivaSlot.objects.bulk_create(new_slots, batch_size=1000)
+    return report
+
+
+def drop_student(viva, student_id):
+    """
+    Free a student's slot and offer it to the students still waiting.
+    """
+    with transaction.atomic():
+        VivaSlot.objects.filter(quiz_or_viva=viva, student_id=student_id).delete()
+        dropped, _ = StudentQuizOrVivaLink.objects.filter(
+            quiz_or_viva=viva, student_id=student_id
+        ).delete()
+        increment(QuizOrViva.objects.filter(pk=viva.pk), "enrolled_count", -dropped)
+        return schedule_vivas([viva]).get(viva.id)
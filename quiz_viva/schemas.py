@@ -3,14 +3,14 @@ import uuid
 from ninja import Schema, ModelSchema
 from typing import List, Union
 
-from quiz_viva.models import QuestionBank, Question, Answer
+from quiz_viva.models import QuestionBank, Question, Answer, StudentResult
 from admin.schemas import CourseOutSchema
 
 class AnswerInSchema(ModelSchema):
-    question_id: str
+    question_id: uuid.UUID
     class Meta:
         model = Answer
-        fields = ["id", "question", "created_at", "updated_at"]
+        exclude = ["id", "question", "created_at", "updated_at"]
 
 
 class AnswerOutSchema(ModelSchema):
@@ -27,9 +27,12 @@ class QuestionOutSchema(ModelSchema):
         model = Question
         fields = "__all__"
 
+class QuestionCreatedSchema(QuestionOutSchema):
+    near_duplicates: List[uuid.UUID] = []
+
 class QuestionInSchema(ModelSchema):
-    qbank_id: str
-    module_id: str
+    qbank_id: uuid.UUID
+    module_id: uuid.UUID
 
     class Meta:
         model = Question
@@ -37,14 +40,68 @@ class QuestionInSchema(ModelSchema):
 
 class QBankInSchema(Schema):
     title: str
-    course_id: str
+    course_id: uuid.UUID
 
 class QBankOutSchema(ModelSchema):
     id: Union[str, uuid.UUID]
-    course: CourseOutSchema = None
-    questions: List[QuestionOutSchema]
-    
+    course: Union[CourseOutSchema, None] = None
+
     class Meta:
         model = QuestionBank
-        fields = "__all__"
+        exclude = ["deleting_at"]
+
+    @staticmethod
+    def resolve_course(obj):
+        return obj.course_links[0].course if obj.course_links else None
+
+
+class CloneSchema(Schema):
+    qbank_id: uuid.UUID
+    title: str = None
+
+
+class EnrollmentSchema(Schema):
+    quiz_or_viva_id: uuid.UUID
+    department_id: uuid.UUID = None
+    course_id: uuid.UUID = None
+    class_or_semester: int = None
+    community_id: uuid.UUID = None
+
+
+class PaperSchema(Schema):
+    question_ids: List[uuid.UUID]
 
+
+class ResponseItemSchema(Schema):
+    question_id: uuid.UUID
+    answer_id: uuid.UUID = None
+
+
+class SubmissionSchema(Schema):
+    quiz_or_viva_id: uuid.UUID
+    responses: List[ResponseItemSchema]
+
+
+class ScheduleSchema(Schema):
+    quiz_or_viva_ids: List[uuid.UUID]
+
+
+class DropSchema(Schema):
+    quiz_or_viva_id: uuid.UUID
+    student_id: uuid.UUID
+
+
+class StudentResultOutSchema(ModelSchema):
+    class Meta:
+        model = StudentResult
+        fields = [
+            "quiz_or_viva",
+            "course",
+            "answered",
+            "correct",
+            "total",
+            "score",
+            "percentile",
+            "stale",
+            "graded_at",
+        ]
@@ -1,3 +1,344 @@
+import datetime
+
 from django.test import TestCase
+from django.utils import timezone
+
+from admin.models import Course, Module
+from quiz_viva.deletion import delete_now
+from quiz_viva.models import (
+    Answer,
+    QBankCourseLink,
+    Question,
+    QuestionBank,
+    QuestionModuleLink,
+    QuestionResponse,
+    QuizOrViva,
+    StudentResult,
+)
+from quiz_viva.results import record_result
+from quiz_viva.schemas import AnswerOutSchema, QuestionOutSchema
+from users.models import User
+from utils.testing import (
+    TrustedOutputMixin,
+    create_user,
+    login,
+    random_moment,
+    random_text,
+    use_temporary_duplicate_index,
+)
+
+
+class TrustedOutputTests(TrustedOutputMixin, TestCase):
+    def populate(self, rng):
+        creator = User.objects.create(
+            username=f"{rng.random()}@example.com", email=str(rng.random())
+        )
+        banks = [
+            QuestionBank.objects.create(title=random_text(rng, 50), creator=creator)
+            for _ in range(3)
+        ]
+        for number in range(40):
+            question = Question.objects.create(
+                question_number=rng.randint(-(2**31), 2**31 - 1),
+                question=random_text(rng),
+                question_type=rng.choice(["MCQ", "DIRECT"]),
+                qbank=rng.choice(banks),
+            )
+            for answer_number in range(rng.randint(0, 5)):
+                Answer.objects.create(
+                    answer_number=answer_number,
+                    answer=random_text(rng),
+                    question=question,
+                    is_correct=rng.random() < 0.3,
+                )
+        for model in (Question, Answer):
+            for pk in model.objects.values_list("pk", flat=True):
+                model.objects.filter(pk=pk).update(
+                    created_at=random_moment(rng), updated_at=random_moment(rng)
+                )
+        return [
+            (QuestionOutSchema, Question.objects.order_by("pk")),
+            (AnswerOutSchema, Answer.objects.order_by("pk")),
+        ]
+
+
+class MalformedIdTests(TestCase):
+    def setUp(self):
+        self.headers = login(self.client, create_user("faculty", ["Faculty"]))
+
+    def test_malformed_ids_are_rejected(self):
+        requests = [
+            ("get", "/api/v1/quiz/question", {"qbank_id": "abc"}),
+            ("get", "/api/v1/quiz/answer", {"question_id": "abc"}),
+            (
+                "post",
+                "/api/v1/quiz/question/",
+                {
+                    "qbank_id": "abc",
+                    "module_id": "abc",
+                    "question_number": 1,
+                    "question": "Question",
+                    "question_type": "MCQ",
+                },
+            ),
+            (
+                "post",
+                "/api/v1/quiz/answer/",
+                {
+                    "question_id": "abc",
+                    "answer_number": 1,
+                    "answer": "Answer",
+                    "is_correct": True,
+                },
+            ),
+            (
+                "post",
+                "/api/v1/quiz/viva/drop/",
+                {"quiz_or_viva_id": "abc", "student_id": "abc"},
+            ),
+        ]
+        for method, path, data in requests:
+            with self.subTest(path=path):
+                if method == "get":
+                    response = self.client.get(path, data, **self.headers)
+                else:
+                    response = self.client.post(
+                        path, data, content_type="application/json", **self.headers
+                    )
+                self.assertEqual(response.status_code, 422)
+
+
+def fill_qbank(qbank, module, questions=3, answers=2):
+    """
+    Add questions linked to module to qbank, each with answers of which the
+    first is correct. Returns {question: [answers]}.
+    """
+    filled = {}
+    for number in range(questions):
+        question = Question.objects.create(
+            question_number=number,
+            question=f"{qbank.title} {number}",
+            question_type="MCQ",
+            qbank=qbank,
+        )
+        QuestionModuleLink.objects.create(question=question, module=module)
+        filled[question] = [
+            Answer.objects.create(
+                answer_number=answer_number,
+                answer=str(answer_number),
+                question=question,
+                is_correct=answer_number == 0,
+            )
+            for answer_number in range(answers)
+        ]
+    return filled
+
+
+class DeletionTests(TestCase):
+    def setUp(self):
+        use_temporary_duplicate_index(self)
+        self.faculty = create_user("faculty", ["Faculty"])
+        self.headers = login(self.client, self.faculty)
+        course = Course.objects.create(name="Course", code="C1", class_or_semester=1)
+        self.module = Module.objects.create(
+            module_number=1, module_name="Module", syllabus="", course=course
+        )
+        self.qbank, self.kept = [
+            QuestionBank.objects.create(title=title, creator=self.faculty)
+            for title in ["Deleted", "Kept"]
+        ]
+        QBankCourseLink.objects.create(question_bank=self.qbank, course=course)
+        self.questions = {
+            **fill_qbank(self.qbank, self.module),
+            **fill_qbank(self.kept, self.module),
+        }
+
+        now = timezone.now()
+        self.quiz = QuizOrViva.objects.create(
+            title="Quiz",
+            description="",
+            viva_or_quiz="QUIZ",
+            conductor=self.faculty,
+            start_time=now - datetime.timedelta(hours=1),
+            end_time=now + datetime.timedelta(hours=1),
+            duration=60,
+        )
+        # One student answered the deleted bank only, the other both banks
+        self.only_deleted, self.both = create_user("one"), create_user("two")
+        for student, qbanks in [
+            (self.only_deleted, [self.qbank]),
+            (self.both, [self.qbank, self.kept]),
+        ]:
+            for question, answers in self.questions.items():
+                if question.qbank in qbanks:
+                    QuestionResponse.objects.create(
+                        student=student,
+                        quiz_or_viva=self.quiz,
+                        question=question,
+                        answer=answers[0],
+                        is_correct=True,
+                    )
+            record_result(student.id, self.quiz.id, 0, [qbank.id for qbank in qbanks])
+
+    def test_deleting_a_populated_bank(self):
+        question = Question.objects.filter(qbank=self.qbank).first()
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.delete(
+                f"/api/v1/quiz/qbank/{self.qbank.pk}/", **self.headers
+            )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(len(callbacks), 1)
+
+        # Nothing more is added under the bank once its deletion started
+        response = self.client.post(
+            "/api/v1/quiz/question/",
+            {
+                "qbank_id": str(self.qbank.pk),
+                "module_id": str(self.module.pk),
+                "question_number": 9,
+                "question": "Late",
+                "question_type": "MCQ",
+            },
+            content_type="application/json",
+            **self.headers,
+        )
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(
+            "/api/v1/quiz/answer/",
+            {
+                "question_id": str(question.pk),
+                "answer_number": 9,
+                "answer": "Late",
+                "is_correct": False,
+            },
+            content_type="application/json",
+            **self.headers,
+        )
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(
+            f"/api/v1/quiz/quiz-or-viva/{self.quiz.pk}/questions",
+            {"question_ids": [str(question.pk)]},
+            content_type="application/json",
+            **self.headers,
+        )
+        self.assertEqual(response.status_code, 400)
+
+        self.assertEqual(
+            delete_now(QuestionBank, self.qbank.pk),
+            {
+                "question_response": 6,
+                "answer": 6,
+                "question_module_link": 3,
+                "question": 3,
+                "qbank_course_link": 1,
+                "question_bank": 1,
+            },
+        )
+        self.assertFalse(QuestionBank.all_objects.filter(pk=self.qbank.pk).exists())
+        self.assertEqual(Question.objects.count(), 3)
+        self.assertEqual(Answer.objects.count(), 6)
+        self.assertEqual(QuestionModuleLink.objects.count(), 3)
+        self.assertEqual(QuestionResponse.objects.count(), 3)
+
+        # Results left without responses go, the others are recounted
+        self.assertFalse(
+            StudentResult.objects.filter(student=self.only_deleted).exists()
+        )
+        result = StudentResult.objects.get(student=self.both)
+        self.assertEqual((result.answered, result.correct), (3, 3))
+        self.assertFalse(result.stale)
+
+
+class CloneTests(TestCase):
+    def setUp(self):
+        use_temporary_duplicate_index(self)
+        self.faculty = create_user("faculty", ["Faculty"])
+        self.headers = login(self.client, self.faculty)
+        self.course = Course.objects.create(
+            name="Course", code="C1", class_or_semester=1
+        )
+        module = Module.objects.create(
+            module_number=1, module_name="Module", syllabus="", course=self.course
+        )
+        self.source = QuestionBank.objects.create(
+            title="Source", creator=self.faculty, question_count=3
+        )
+        QBankCourseLink.objects.create(question_bank=self.source, course=self.course)
+        fill_qbank(self.source, module)
+
+    def contents(self, qbank):
+        """
+        Questions of qbank with their answers and modules, ids left out.
+        """
+        return sorted(
+            (
+                question.question_number,
+                question.question,
+                question.question_type,
+                sorted(
+                    question.answer_set.values_list(
+                        "answer_number", "answer", "is_correct"
+                    )
+                ),
+                list(question.questionmodulelink_set.values_list("module_id")),
+            )
+            for question in Question.objects.filter(qbank=qbank)
+        )
+
+    def test_clone_copies_rows_under_new_ids(self):
+        source_ids = {
+            model: set(model.objects.values_list("pk", flat=True))
+            for model in (Question, Answer, QuestionModuleLink)
+        }
+        contents = self.contents(self.source)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/v1/quiz/qbank/clone/",
+                {"qbank_id": str(self.source.pk), "title": "Copy"},
+                content_type="application/json",
+                **self.headers,
+            )
+        self.assertEqual(response.status_code, 200)
+        clone = QuestionBank.objects.get(pk=response.json()["id"])
+        self.assertEqual((clone.title, clone.question_count), ("Copy", 3))
+        self.assertEqual(clone.creator_id, self.faculty.pk)
+        self.assertEqual(self.contents(clone), contents)
+
+        # Every copied row is new and points at the copies
+        for model, rows in [
+            (Question, Question.objects.filter(qbank=clone)),
+            (Answer, Answer.objects.filter(question__qbank=clone)),
+            (
+                QuestionModuleLink,
+                QuestionModuleLink.objects.filter(question__qbank=clone),
+            ),
+        ]:
+            with self.subTest(model=model.__name__):
+                copied = set(rows.values_list("pk", flat=True))
+                self.assertEqual(len(copied), len(source_ids[model]))
+                self.assertTrue(copied.isdisjoint(source_ids[model]))
+        self.assertEqual(
+            list(
+                QBankCourseLink.objects.filter(question_bank=clone).values_list(
+                    "course_id", flat=True
+                )
+            ),
+            [self.course.pk],
+        )
 
-# Create your tests here.
+        # The source is left as it was
+        self.source.refresh_from_db()
+        self.assertEqual(self.source.question_count, 3)
+        self.assertEqual(self.contents(self.source), contents)
+        for model, rows in [
+            (Question, Question.objects.filter(qbank=self.source)),
+            (Answer, Answer.objects.filter(question__qbank=self.source)),
+            (
+                QuestionModuleLink,
+                QuestionModuleLink.objects.filter(question__qbank=self.source),
+            ),
+        ]:
+            with self.subTest(model=model.__name__):
+                self.assertEqual(
+                    set(rows.values_list("pk", flat=True)), source_ids[model]
+                )
@@ -0,0 +1,219 @@
+"""
+Immutable snapshots of the questions of quizzes and vivas.
+
+Questions and answers are edited in place. So that an edit cannot change a
+paper students are already sitting, a quiz or viva lists its questions in
+QuizOrVivaQuestion, and as it opens `manage.py openquizzes`, scheduled every
+minute, pins each of them to a QuestionVersion: an append-only row holding
+the question and its answers as they were then, with a SHA-256 hash of that
+content. A question unchanged since an earlier version reuses it. Reads and
+grading only ever see the pinned paper, and refuse a paper not pinned yet.
+
+Version rows never change, so their payloads are cached under their id with
+no timeout and never invalidated, and the ETag of a paper is derived from
+its version ids alone.
+"""
+import hashlib
+import json
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Case, Exists, Max, OuterRef, UUIDField, Value, When
+from django.utils import timezone
+
+from quiz_viva.models import (
+    Answer,
+    Question,
+    QuestionVersion,
+    QuizOrViva,
+    QuizOrVivaQuestion,
+)
+
+
+def version_key(pk):
+    return f"question_version:{pk}"
+
+
+def content_hash(payload):
+    canonical = json.dumps(
+        payload, cls=DjangoJSONEncoder, sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def snapshots(question_ids):
+    """
+    Current payloads of the given questions, by question id.
+    """
+    answers = defaultdict(list)
+    for answer in (
+        Answer.objects.filter(question_id__in=question_ids)
+        .order_by("answer_number", "id")
+        .values("id", "question_id", "answer_number", "answer", "is_correct")
+    ):
+        question_id = answer.pop("question_id")
+        answer["id"] = str(answer["id"])
+        answers[question_id].append(answer)
+    return {
+        question["id"]: {
+            **question,
+            "id": str(question["id"]),
+            "qbank_id": str(question["qbank_id"]),
+            "answers": answers[question["id"]],
+        }
+        for question in Question.objects.filter(id__in=question_ids).values(
+            "id", "question_number", "question", "question_type", "qbank_id"
+        )
+    }
+
+
+def current_versions(question_ids):
+    """
+    Versions matching the current content of the given questions, added
+    where the content is new. Returns {question id: version id}.
+    """
+    payloads = snapshots(question_ids)
+    hashes = {pk: content_hash(payload) for pk, payload in payloads.items()}
+    latest = dict(
+        QuestionVersion.objects.filter(question_id__in=payloads)
+        .values_list("question_id")
+        .annotate(latest=Max("version"))
+        .order_by()
+    )
+    # A concurrent writer adding the same content wins, its row is read back
+    QuestionVersion.objects.bulk_create(
+        [
+            QuestionVersion(
+                question_id=pk,
+                version=latest.get(pk, 0) + 1,
+                content_hash=hashes[pk],
+                payload=payload,
+            )
+            for pk, payload in payloads.items()
+        ],
+        ignore_conflicts=True,
+    )
+    return {
+        question_id: pk
+        for pk, question_id, digest in QuestionVersion.objects.filter(
+            question_id__in=payloads, content_hash__in=hashes.values()
+        ).values_list("id", "question_id", "content_hash")
+        if hashes[question_id] == digest
+    }
+
+
+def set_paper(quiz_or_viva, question_ids):
+    """
+    Replace the questions of a quiz or viva that has not opened yet.
+    """
+    QuizOrVivaQuestion.objects.filter(quiz_or_viva=quiz_or_viva).delete()
+    QuizOrVivaQuestion.objects.bulk_create(
+        [
+            QuizOrVivaQuestion(
+                quiz_or_viva=quiz_or_viva, question_id=question_id, position=position
+            )
+            for position, question_id in enumerate(question_ids)
+        ]
+    )
+
+
+def pin_paper(quiz_or_viva):
+    """
+    Pin the questions of a quiz or viva to their current versions and mark
+    its paper pinned. Pins are only ever set from NULL, so concurrent
+    callers agree on the first one written.
+    """
+    unpinned = QuizOrVivaQuestion.objects.filter(
+        quiz_or_viva=quiz_or_viva, version__isnull=True
+    )
+    with transaction.atomic():
+        question_ids = list(unpinned.values_list("question_id", flat=True))
+        versions = current_versions(question_ids) if question_ids else {}
+        if versions:
+            unpinned.filter(question_id__in=versions).update(
+                version=Case(
+                    *[
+                        When(
+                            question_id=question_id,
+                            then=Value(pk, output_field=UUIDField()),
+                        )
+                        for question_id, pk in versions.items()
+                    ],
+                    output_field=UUIDField(),
+                )
+            )
+        QuizOrViva.all_objects.filter(
+            pk=quiz_or_viva.pk, paper_pinned_at__isnull=True
+        ).update(paper_pinned_at=timezone.now())
+
+
+def opening(lead):
+    """
+    Quizzes and vivas with an unpinned paper opening within lead seconds or
+    already open.
+    """
+    return QuizOrViva.objects.filter(
+        Exists(QuizOrVivaQuestion.objects.filter(quiz_or_viva=OuterRef("pk"))),
+        start_time__lte=timezone.now() + timedelta(seconds=lead),
+        paper_pinned_at__isnull=True,
+    )
+
+
+def has_paper(quiz_or_viva):
+    return QuizOrVivaQuestion.objects.filter(quiz_or_viva=quiz_or_viva).exists()
+
+
+def paper(quiz_or_viva):
+    """
+    Pinned (question id, version id) pairs of a quiz or viva in paper order.
+    Questions deleted before they could be pinned are left out.
+    """
+    return list(
+        QuizOrVivaQuestion.objects.filter(
+            quiz_or_viva=quiz_or_viva, version__isnull=False
+        )
+        .order_by("position")
+        .values_list("question_id", "version_id")
+    )
+
+
+def version_payloads(version_ids):
+    """
+    Payloads of the given versions in the same order.
+    """
+    keys = [version_key(pk) for pk in version_ids]
+    found = cache.get_many(keys)
+    missing = [pk for pk, key in zip(version_ids, keys) if key not in found]
+    if missing:
+        loaded = {
+            version_key(pk): payload
+            for pk, payload in QuestionVersion.objects.filter(
+                id__in=missing
+            ).values_list("id", "payload")
+        }
+        cache.set_many(loaded, timeout=None)
+        found.update(loaded)
+    return [found[key] for key in keys if key in found]
+
+
+def pinned_answers(pinned):
+    """
+    Grading keys of pinned (question id, version id) pairs as
+    ({question id: qbank id}, {answer id: (question id, is_correct)}).
+    """
+    questions, answers = {}, {}
+    for payload in version_payloads([pk for _, pk in pinned]):
+        question_id = uuid.UUID(payload["id"])
+        questions[question_id] = payload["qbank_id"]
+        for answer in payload["answers"]:
+            answers[uuid.UUID(answer["id"])] = (question_id, answer["is_correct"])
+    return questions, answers
+
+
+def paper_etag(version_ids):
+    source = "|".join(str(pk) for pk in version_ids)
+    return '"%s"' % hashlib.blake2b(source.encode(), digest_size=16).hexdigest()
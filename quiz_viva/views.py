@@ -1,16 +1,53 @@
+import uuid
+
+from asgiref.sync import sync_to_async
 from ninja import Router
+from ninja.pagination import LimitOffsetPagination, paginate
 from typing import Any
 
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.shortcuts import aget_object_or_404, get_object_or_404
 from django.db.models import Prefetch
+from django.http import Http404, HttpResponse
+from django.utils import timezone
 
 from quiz_viva.schemas import *
 from quiz_viva.models import *
 from admin.models import Course, Module
-from utils.authentication import AuthBearer, role_required
+from quiz_viva.analytics import qbank_analytics, quiz_analytics
+from quiz_viva.archive import ArchiveMissing, read_archive
+from quiz_viva.cloning import clone_qbank
+from quiz_viva.deletion import deletion_status, hold_live, start_deletion
+from quiz_viva.duplicates import course_questions, get_index
+from quiz_viva.enrollment import enroll_community_members, enroll_students
+from quiz_viva.grading import GradingError, grade_submission, is_enrolled
+from quiz_viva.results import student_results
+from quiz_viva.scheduling import drop_student, schedule_vivas
+from quiz_viva.versions import (
+    has_paper,
+    paper,
+    paper_etag,
+    set_paper,
+    version_payloads,
+)
+from utils.authentication import AuthBearer, AsyncAuthBearer, role_required
+from utils.counters import increment
+from utils.serializers import TrustedOutput
+from utils.utils import not_modified
+from quizverse_backend.urls import api
 
 router = Router(auth=AuthBearer())
 
+question_output = TrustedOutput(QuestionOutSchema)
+answer_output = TrustedOutput(AnswerOutSchema)
+
+
+@api.exception_handler(ArchiveMissing)
+def on_archive_missing(request, exc):
+    return api.create_response(
+        request, {"detail": "Archived data is no longer available"}, status=410
+    )
+
 
 @router.post("/qbank/", response={200: Any, 400: Any})
 @role_required(["Faculty"])
@@ -29,50 +66,386 @@ def get_qbank(request):
         creator_id=request.auth["user"]
     ).prefetch_related(
         Prefetch(
-            "qbank_course_link",
-            queryset=QBankCourseLink.objects.all(),
-            to_attr="course",
+            "qbankcourselink_set",
+            queryset=QBankCourseLink.objects.select_related("course"),
+            to_attr="course_links",
         ),
-        Prefetch("question", queryset=Question.objects.all(), to_attr="questions"),
     )
     return 200, question_bank
 
 
-@router.get("/question/", response={200: QuestionOutSchema, 400: Any})
+@router.post("/qbank/clone/", response={200: Any, 403: Any})
+@role_required(["Faculty"])
+def clone_question_bank(request, data: CloneSchema):
+    source = get_object_or_404(QuestionBank, id=data.qbank_id)
+    user_id = request.auth["user"]
+    if str(source.creator_id) != str(user_id):
+        # Banks of other faculty are shared within the courses they teach
+        course_ids = {
+            str(pk)
+            for pk in source.qbankcourselink_set.values_list("course_id", flat=True)
+        }
+        if course_ids.isdisjoint(request.auth["affiliation"]["courses"]):
+            return 403, {"message": "Question bank outside your courses"}
+    with transaction.atomic():
+        if not hold_live(QuestionBank, source.pk):
+            raise Http404
+        clone = clone_qbank(source, user_id, data.title)
+    return 200, {
+        "id": str(clone.id),
+        "title": clone.title,
+        "question_count": clone.question_count,
+    }
+
+
+@router.delete("/qbank/{qbank_id}/", response={202: Any})
+@role_required(["Faculty"])
+def delete_qbank(request, qbank_id: uuid.UUID):
+    with transaction.atomic():
+        qbank = get_object_or_404(
+            QuestionBank.objects.select_for_update(),
+            id=qbank_id,
+            creator_id=request.auth["user"],
+        )
+        start_deletion(qbank)
+    return 202, {"message": "Question bank is being deleted"}
+
+
+@router.get("/qbank/{qbank_id}/deletion", response={200: Any, 404: Any})
+@role_required(["Faculty"])
+def get_qbank_deletion(request, qbank_id: uuid.UUID):
+    if status := deletion_status(QuestionBank, qbank_id, request.auth["user"]):
+        return 200, status
+    return 404, {"message": "No deletion of this question bank"}
+
+
+@router.post("/question/", response={200: QuestionCreatedSchema, 400: Any})
 @role_required(["Faculty"])
 def create_question(request, data: QuestionInSchema):
     qbank = get_object_or_404(QuestionBank, id=data.qbank_id, creator_id=request.auth["user"])
     module = get_object_or_404(Module, id=data.module_id)
-    question = Question.objects.create(
-        question=data.question,
-        options=data.options,
-        correct_option=data.correct_option,
-        qbank=qbank,
-    )
-    QuestionModuleLink.objects.create(question=question, module=module)
+    with transaction.atomic():
+        if not hold_live(QuestionBank, qbank.pk):
+            raise Http404
+        question = Question.objects.create(
+            question_number=data.question_number,
+            question=data.question,
+            question_type=data.question_type,
+            qbank=qbank,
+        )
+        QuestionModuleLink.objects.create(question=question, module=module)
+        increment(QuestionBank.objects.filter(pk=qbank.pk), "question_count")
+    question.near_duplicates = [
+        pk for pk, _ in get_index().find(question.question, exclude=question.pk)
+    ]
     return 200, question
 
 
-@router.get("/question", response={200: List[QuestionOutSchema], 400: Any})
+@router.get(
+    "/question",
+    auth=AsyncAuthBearer(),
+    response={200: List[QuestionOutSchema], 400: Any},
+)
 @role_required(["Faculty"])
-def get_question(request, qbank_id: str):
+async def get_question(request, qbank_id: uuid.UUID):
     question = Question.objects.filter(
-        qbank_id=qbank_id, qbank__creator_id=request.auth["user"]
-    ).all()
-    return 200, question
+        qbank_id=qbank_id,
+        qbank__creator_id=request.auth["user"],
+        qbank__deleting_at__isnull=True,
+    ).order_by("question_number")
+    return await question_output.aresponse(request, question, conditional=True)
+
 
+def add_answer(question, data):
+    with transaction.atomic():
+        if not hold_live(QuestionBank, question.qbank_id):
+            raise Http404
+        return Answer.objects.create(
+            question=question,
+            answer_number=data.answer_number,
+            answer=data.answer,
+            is_correct=data.is_correct,
+        )
 
-@router.post("/answer/", response={200: AnswerOutSchema, 400: Any})
+
+@router.post(
+    "/answer/", auth=AsyncAuthBearer(), response={200: AnswerOutSchema, 400: Any}
+)
 @role_required(["Faculty"])
-def create_answer(request, data: AnswerInSchema):
-    question = get_object_or_404(Question, id=data.question_id)
-    answer = Answer.objects.create(
-        question=question, answer=data.answer, is_correct=data.is_correct
-    )
+async def create_answer(request, data: AnswerInSchema):
+    question = await aget_object_or_404(Question, id=data.question_id)
+    answer = await sync_to_async(add_answer)(question, data)
     return 200, answer
 
-@router.get("/answer", response={200: List[AnswerOutSchema], 400: Any})
+@router.get(
+    "/answer", auth=AsyncAuthBearer(), response={200: List[AnswerOutSchema], 400: Any}
+)
 @role_required(["Faculty"])
-def get_answer(request, question_id: str):
-    answer = Answer.objects.filter(question_id=question_id).all()
-    return 200, answer
+async def get_answer(request, question_id: uuid.UUID):
+    answer = Answer.objects.filter(
+        question_id=question_id, question__qbank__deleting_at__isnull=True
+    ).order_by("answer_number")
+    return await answer_output.aresponse(request, answer, conditional=True)
+
+
+@router.delete("/quiz-or-viva/{quiz_or_viva_id}/", response={202: Any})
+@role_required(["Faculty", "Community"])
+def delete_quiz_or_viva(request, quiz_or_viva_id: uuid.UUID):
+    with transaction.atomic():
+        quiz_or_viva = get_object_or_404(
+            QuizOrViva.objects.select_for_update(),
+            id=quiz_or_viva_id,
+            conductor_id=request.auth["user"],
+        )
+        start_deletion(quiz_or_viva)
+    return 202, {"message": "Quiz or viva is being deleted"}
+
+
+@router.get("/quiz-or-viva/{quiz_or_viva_id}/deletion", response={200: Any, 404: Any})
+@role_required(["Faculty", "Community"])
+def get_quiz_or_viva_deletion(request, quiz_or_viva_id: uuid.UUID):
+    if status := deletion_status(QuizOrViva, quiz_or_viva_id, request.auth["user"]):
+        return 200, status
+    return 404, {"message": "No deletion of this quiz or viva"}
+
+
+@router.post(
+    "/quiz-or-viva/{quiz_or_viva_id}/questions", response={200: Any, 400: Any}
+)
+@role_required(["Faculty", "Community"])
+def set_quiz_or_viva_questions(request, quiz_or_viva_id: uuid.UUID, data: PaperSchema):
+    quiz_or_viva = get_object_or_404(
+        QuizOrViva, id=quiz_or_viva_id, conductor_id=request.auth["user"]
+    )
+    if quiz_or_viva.paper_pinned_at or timezone.now() >= quiz_or_viva.start_time:
+        return 400, {"message": "Questions cannot change once it has opened"}
+    question_ids = list(dict.fromkeys(data.question_ids))
+    with transaction.atomic():
+        if not hold_live(QuizOrViva, quiz_or_viva.pk):
+            raise Http404
+        owned = dict(
+            Question.objects.filter(
+                id__in=question_ids,
+                qbank__creator_id=request.auth["user"],
+                qbank__deleting_at__isnull=True,
+            ).values_list("id", "qbank_id")
+        )
+        if unknown := [str(pk) for pk in question_ids if pk not in owned]:
+            return 400, {"message": f"Unknown questions {', '.join(unknown)}"}
+        if not hold_live(QuestionBank, *owned.values()):
+            return 400, {"message": "A question bank of these is being deleted"}
+        set_paper(quiz_or_viva, question_ids)
+    return 200, {"questions": len(question_ids)}
+
+
+@router.get(
+    "/quiz-or-viva/{quiz_or_viva_id}/paper",
+    response={200: Any, 400: Any, 403: Any, 503: Any},
+)
+@role_required(["Faculty", "Community", "Student", "CommunityMember"])
+def get_paper(request, response: HttpResponse, quiz_or_viva_id: uuid.UUID):
+    quiz_or_viva = get_object_or_404(QuizOrViva, id=quiz_or_viva_id)
+    user_id = request.auth["user"]
+    is_conductor = str(quiz_or_viva.conductor_id) == str(user_id)
+    if not is_conductor and not is_enrolled(user_id, quiz_or_viva):
+        return 403, {"message": "Not enrolled in this quiz or viva"}
+    if timezone.now() < quiz_or_viva.start_time:
+        return 400, {"message": "Quiz or viva is not open"}
+    if quiz_or_viva.paper_pinned_at is None:
+        if has_paper(quiz_or_viva):
+            # openquizzes runs every minute
+            response["Retry-After"] = "30"
+            return 503, {"message": "Paper is not ready yet"}
+        return 200, []
+
+    version_ids = [pk for _, pk in paper(quiz_or_viva)]
+    # Pinned versions never change, so neither does the paper
+    etag = paper_etag([is_conductor, *version_ids])
+    if cached := not_modified(request, etag):
+        return cached
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, max-age=31536000, immutable"
+    payloads = version_payloads(version_ids)
+    if not is_conductor:
+        payloads = [
+            {
+                **payload,
+                "answers": [
+                    {key: value for key, value in answer.items() if key != "is_correct"}
+                    for answer in payload["answers"]
+                ],
+            }
+            for payload in payloads
+        ]
+    return 200, payloads
+
+
+@router.post("/enroll/", response={200: Any, 400: Any, 403: Any})
+@role_required(["Faculty", "Community"])
+def enroll_cohort(request, data: EnrollmentSchema):
+    quiz_or_viva = get_object_or_404(
+        QuizOrViva, id=data.quiz_or_viva_id, conductor_id=request.auth["user"]
+    )
+    if not (data.department_id or data.course_id or data.community_id):
+        return 400, {"message": "Select a department, course or community"}
+
+    affiliation = request.auth["affiliation"]
+    cohort = [
+        (data.department_id, "departments"),
+        (data.course_id, "courses"),
+        (data.community_id, "communities"),
+    ]
+    if any(pk and str(pk) not in affiliation[kind] for pk, kind in cohort):
+        return 403, {"message": "Cohort outside your affiliations"}
+
+    counts = {}
+    with transaction.atomic():
+        if not hold_live(QuizOrViva, quiz_or_viva.id):
+            raise Http404
+        if data.department_id or data.course_id:
+            matched, enrolled = enroll_students(
+                quiz_or_viva.id,
+                department_id=data.department_id,
+                course_id=data.course_id,
+                class_or_semester=data.class_or_semester,
+            )
+            counts["students"] = {"matched": matched, "enrolled": enrolled}
+        if data.community_id:
+            matched, enrolled = enroll_community_members(
+                quiz_or_viva.id, data.community_id
+            )
+            counts["community_members"] = {"matched": matched, "enrolled": enrolled}
+    return 200, counts
+
+
+@router.post("/response/", response={200: Any, 400: Any})
+@role_required(["Student", "CommunityMember"])
+def submit_responses(request, data: SubmissionSchema):
+    quiz_or_viva = get_object_or_404(QuizOrViva, id=data.quiz_or_viva_id)
+    try:
+        graded, correct = grade_submission(
+            request.auth["user"],
+            quiz_or_viva,
+            [(item.question_id, item.answer_id) for item in data.responses],
+        )
+    except GradingError as exc:
+        return 400, {"message": str(exc)}
+    return 200, {"graded": graded, "correct": correct}
+
+
+@router.get("/analytics", response={200: Any, 400: Any})
+@role_required(["Faculty"])
+def get_analytics(
+    request, quiz_or_viva_id: uuid.UUID = None, qbank_id: uuid.UUID = None
+):
+    if quiz_or_viva_id:
+        quiz_or_viva = get_object_or_404(
+            QuizOrViva, id=quiz_or_viva_id, conductor_id=request.auth["user"]
+        )
+        return 200, quiz_analytics(quiz_or_viva)
+    if qbank_id:
+        get_object_or_404(QuestionBank, id=qbank_id, creator_id=request.auth["user"])
+        return 200, qbank_analytics(qbank_id)
+    return 400, {"message": "Give a quiz_or_viva_id or a qbank_id"}
+
+
+@router.get("/duplicates", response={200: Any, 403: Any})
+@role_required(["Faculty"])
+def get_duplicates(request, course_id: uuid.UUID):
+    questions = course_questions(course_id)
+    if str(course_id) not in request.auth["affiliation"]["courses"]:
+        # Outside their courses, faculty only see their own banks
+        questions = questions.filter(qbank__creator_id=request.auth["user"])
+        if not questions.exists():
+            return 403, {"message": "Course outside your affiliations"}
+    question_ids = questions.values_list("id", flat=True)
+    clusters = get_index().clusters(question_ids)
+    # Cluster members from banks being deleted are left out
+    questions = Question.objects.filter(qbank__deleting_at__isnull=True).in_bulk(
+        [pk for cluster in clusters for pk in cluster]
+    )
+    return 200, [
+        [
+            {
+                "id": pk,
+                "question": questions[pk].question,
+                "qbank_id": questions[pk].qbank_id,
+            }
+            for pk in cluster
+            if pk in questions
+        ]
+        for cluster in clusters
+    ]
+
+
+@router.post("/viva/schedule/", response={200: Any})
+@role_required(["Faculty"])
+def schedule_viva_slots(request, data: ScheduleSchema):
+    vivas = QuizOrViva.objects.filter(
+        id__in=data.quiz_or_viva_ids,
+        conductor_id=request.auth["user"],
+        viva_or_quiz="VIVA",
+    )
+    return 200, schedule_vivas(vivas)
+
+
+@router.post("/viva/drop/", response={200: Any})
+@role_required(["Faculty"])
+def drop_viva_student(request, data: DropSchema):
+    viva = get_object_or_404(
+        QuizOrViva,
+        id=data.quiz_or_viva_id,
+        conductor_id=request.auth["user"],
+        viva_or_quiz="VIVA",
+    )
+    return 200, drop_student(viva, data.student_id)
+
+
+@router.get("/viva/slots", response={200: Any})
+@role_required(["Faculty", "Student"])
+def get_viva_slots(request, quiz_or_viva_id: uuid.UUID):
+    viva = get_object_or_404(QuizOrViva, id=quiz_or_viva_id, viva_or_quiz="VIVA")
+    fields = ["student_id", "start_time", "end_time"]
+    if viva.archived_at:
+        slots = sorted(
+            (
+                {field: row[field] for field in fields}
+                for row in read_archive(viva.id, VivaSlot._meta.db_table)
+            ),
+            key=lambda slot: slot["start_time"],
+        )
+    else:
+        slots = list(
+            VivaSlot.objects.filter(quiz_or_viva=viva)
+            .order_by("start_time")
+            .values(*fields)
+        )
+    if str(viva.conductor_id) != str(request.auth["user"]):
+        user_id = str(request.auth["user"])
+        slots = [slot for slot in slots if str(slot["student_id"]) == user_id]
+    return 200, slots
+
+
+@router.get("/results", response=List[StudentResultOutSchema])
+@paginate(LimitOffsetPagination)
+@role_required(["Student", "CommunityMember"])
+def get_results(request, course_id: uuid.UUID = None):
+    return student_results(request.auth["user"], course_id)
+
+
+@router.get("/results/course/{course_id}", response={200: Any, 403: Any, 404: Any})
+@role_required(["Faculty"])
+def get_course_results(request, course_id: uuid.UUID):
+    if str(course_id) not in request.auth["affiliation"]["courses"]:
+        return 403, {"message": "Course outside your affiliations"}
+    summary = get_object_or_404(CourseResultSummary, course_id=course_id)
+    return 200, {
+        "course_id": str(summary.course_id),
+        "quizzes_or_vivas": summary.quizzes_or_vivas,
+        "students": summary.students,
+        "results": summary.results,
+        "mean_score": round(summary.mean_score, 2),
+        "lowest_score": summary.lowest_score,
+        "highest_score": summary.highest_score,
+        "computed_at": summary.computed_at,
+    }
@@ -0,0 +1,111 @@
+"""
+Database profiles selected through the DATABASE_PROFILE environment variable.
+
+sqlite      Single node deployments, tuned for concurrent readers (default)
+postgresql  Azure PostgreSQL with persistent connections or a connection pool
+
+DATABASE_REPLICAS optionally lists read replicas separated by "|", as SQLite
+file paths or connection strings depending on the profile. They are exposed
+as replica_1, replica_2, ... and used by quizverse_backend.routers.
+"""
+import importlib.util
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+def env_flag(name, default=False):
+    value = os.environ.get(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def sqlite_profile(path):
+    return {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": path,
+        "OPTIONS": {
+            # Seconds a writer waits on a locked database before raising
+            "timeout": env_int("SQLITE_BUSY_TIMEOUT", 20),
+            # Take the write lock up front instead of failing on lock upgrade
+            "transaction_mode": "IMMEDIATE",
+            "init_command": (
+                "PRAGMA journal_mode=WAL;"
+                "PRAGMA synchronous=NORMAL;"
+                f"PRAGMA mmap_size={env_int('SQLITE_MMAP_SIZE', 268435456)};"
+                "PRAGMA temp_store=MEMORY;"
+                "PRAGMA foreign_keys=ON;"
+            ),
+        },
+    }
+
+
+def parse_connection_string(connection_string):
+    parameters = {
+        key.strip(): value
+        for key, value in (
+            pair.split("=", 1) for pair in connection_string.split(";") if pair
+        )
+    }
+    return {
+        "NAME": parameters["Database"],
+        "HOST": parameters["Server"],
+        "USER": parameters["User Id"],
+        "PASSWORD": parameters["Password"],
+        "PORT": parameters["Port"],
+    }
+
+
+def postgresql_profile(connection_string):
+    database = {
+        "ENGINE": "django.db.backends.postgresql",
+        **parse_connection_string(connection_string),
+        "CONN_MAX_AGE": env_int("DATABASE_CONN_MAX_AGE", 600),
+        "CONN_HEALTH_CHECKS": env_flag("DATABASE_CONN_HEALTH_CHECKS", True),
+        "OPTIONS": {},
+    }
+    if env_flag("DATABASE_POOL"):
+        # The built-in pool needs psycopg 3 with the pool extra, which
+        # requirements.txt leaves out as it installs psycopg2
+        if importlib.util.find_spec("psycopg_pool") is None:
+            raise ImproperlyConfigured(
+                "DATABASE_POOL needs psycopg 3 with its pool extra, install "
+                '"psycopg[binary,pool]" in place of psycopg2-binary'
+            )
+        # The pool replaces persistent connections, which Django rejects
+        # alongside it
+        database["CONN_MAX_AGE"] = 0
+        database["OPTIONS"]["pool"] = {
+            "min_size": env_int("DATABASE_POOL_MIN_SIZE", 2),
+            "max_size": env_int("DATABASE_POOL_MAX_SIZE", 10),
+            "timeout": env_int("DATABASE_POOL_TIMEOUT", 10),
+        }
+    return database
+
+
+def get_databases(base_dir):
+    profile = os.environ.get("DATABASE_PROFILE") or "sqlite"
+    if profile == "sqlite":
+        build = lambda name: sqlite_profile(base_dir / name)
+        primary = "db.sqlite3"
+    elif profile == "postgresql":
+        build = postgresql_profile
+        primary = os.environ["AZURE_POSTGRESQL_CONNECTIONSTRING"]
+    else:
+        raise ValueError(f"Unknown DATABASE_PROFILE: {profile}")
+
+    databases = {"default": build(primary)}
+    replicas = os.environ.get("DATABASE_REPLICAS") or ""
+    for index, replica in enumerate(filter(None, replicas.split("|")), start=1):
+        databases[f"replica_{index}"] = {
+            **build(replica.strip()),
+            # Tests run against the primary only
+            "TEST": {"MIRROR": "default"},
+        }
+    return databases
@@ -0,0 +1,99 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+def accepted_encodings(header):
+    encodings = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(name.strip().lower())
+    return encodings
+
+
+def compress(encoding, content):
+    if encoding == "br":
+        return brotli.compress(content, quality=5)
+    return compress_string(content)
+
+
+class CompressionMiddleware:
+    """
+    Compress responses above COMPRESSION_MIN_SIZE bytes with brotli when the
+    brotli package is installed and accepted, gzip otherwise.
+
+    Responses carrying a strong ETag identify an immutable payload, so their
+    compressed body is cached and reused for every later request of the same
+    representation.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def negotiate(self, request):
+        encodings = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        if brotli is not None and "br" in encodings:
+            return "br"
+        if "gzip" in encodings:
+            return "gzip"
+        return None
+
+    def process_response(self, request, response):
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if not (encoding := self.negotiate(request)):
+            return response
+
+        etag = response.get("ETag")
+        cache_key = None
+        if etag and not etag.startswith("W/"):
+            cache_key = f"compressed:{encoding}:{request.path}:{etag}"
+
+        content = cache.get(cache_key) if cache_key else None
+        if content is None:
+            content = compress(encoding, response.content)
+            if len(content) >= len(response.content):
+                return response
+            if cache_key:
+                cache.set(cache_key, content, settings.COMPRESSION_CACHE_TIMEOUT)
+
+        response.content = content
+        response["Content-Length"] = str(len(content))
+        response["Content-Encoding"] = encoding
+        if cache_key:
+            # The encoded body is a different representation of the same data
+            response["ETag"] = f"W/{etag}"
+        return response
@@ -0,0 +1,118 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+PIN_COOKIE = "db_primary_pin"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Per request routing state, None outside of a request
+_request_state = ContextVar("request_state", default=None)
+# Set while reads must see the latest commit, see primary_reads()
+_primary_reads = ContextVar("primary_reads", default=False)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith("replica_")]
+
+
+@contextmanager
+def primary_reads():
+    """
+    Route the reads made inside the block to the primary. For loads whose
+    result is cached: read from a lagging replica, a state the primary has
+    already moved past would be cached after its invalidation ran.
+    """
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Send writes to the primary and reads to a random replica.
+    Reads stay on the primary outside of a request, for the whole of an
+    unsafe request, for the rest of a request once it has written, for
+    REPLICA_LAG_TOLERANCE seconds after a client's last write, and inside
+    primary_reads().
+    """
+
+    def __init__(self):
+        self.replicas = replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if (
+            not self.replicas
+            or state is None
+            or state["pinned"]
+            or _primary_reads.get()
+        ):
+            return "default"
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state["pinned"] = state["wrote"] = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema from the primary
+        return db == "default"
+
+
+class ReplicaPinningMiddleware:
+    # Runs natively under both WSGI and ASGI, avoiding a thread hop per request
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self.finish(state, response)
+
+    async def __acall__(self, request):
+        state, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self.finish(state, response)
+
+    def start(self, request):
+        state = {
+            "pinned": request.method not in SAFE_METHODS
+            or PIN_COOKIE in request.COOKIES,
+            "wrote": False,
+        }
+        return state, _request_state.set(state)
+
+    def finish(self, state, response):
+        if state["wrote"]:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_LAG_TOLERANCE,
+                httponly=True,
+                samesite="None",
+                secure=True,
+            )
+        return response
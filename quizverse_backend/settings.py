@@ -13,6 +13,8 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+from quizverse_backend.databases import get_databases
+
 load_dotenv()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,9 +49,11 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "quizverse_backend.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
+    "quizverse_backend.routers.ReplicaPinningMiddleware",
     # "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
@@ -81,24 +85,81 @@ WSGI_APPLICATION = "quizverse_backend.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-# connection_string = os.environ.get("AZURE_POSTGRESQL_CONNECTIONSTRING")
-# parameters = {pair.split('=')[0]:pair.split('=')[1] for pair in connection_string.split(';')}
-# DATABASES = {
-#     "default": {
-#         "ENGINE": "django.db.backends.postgresql",
-#         "NAME": parameters["Database"],
-#         "HOST": parameters["Server"],
-#         "USER": parameters["User Id"],
-#         "PASSWORD": parameters["Password"],
-#         "PORT": parameters["Port"],
-#     }
-# }
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# DATABASE_PROFILE selects "sqlite" (default) or "postgresql", see
+# quizverse_backend/databases.py for the tuning applied by each profile.
+DATABASES = get_databases(BASE_DIR)
+
+DATABASE_ROUTERS = ["quizverse_backend.routers.PrimaryReplicaRouter"]
+
+# Seconds a client keeps reading from the primary after a write, should
+# exceed the worst expected replication lag.
+REPLICA_LAG_TOLERANCE = int(os.environ.get("REPLICA_LAG_TOLERANCE") or 5)
+
+# Responses smaller than this are sent uncompressed, compressed bodies of
+# responses with a strong ETag are cached for COMPRESSION_CACHE_TIMEOUT seconds
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_CACHE_TIMEOUT = 60 * 60
+
+# Rate limiter storage, use "utils.ratelimit.CacheBackend" to share limits
+# across nodes through CACHES. RATELIMIT_IP_HEADER names the header a trusted
+# proxy appends the client address to. Required behind a proxy, or every
+# client shares the proxy's address and so one bucket; it defaults to
+# X-Forwarded-For on Azure App Service (WEBSITE_HOSTNAME is set there), whose
+# front end proxies every request.
+RATELIMIT_BACKEND = (
+    os.environ.get("RATELIMIT_BACKEND") or "utils.ratelimit.InMemoryBackend"
+)
+RATELIMIT_IP_HEADER = os.environ.get("RATELIMIT_IP_HEADER") or (
+    "X-Forwarded-For" if os.environ.get("WEBSITE_HOSTNAME") else None
+)
+
+# Seconds between in-process expired token clean ups, 0 disables it in favour
+# of scheduling `manage.py purgetokens`
+TOKEN_GC_INTERVAL = int(os.environ.get("TOKEN_GC_INTERVAL") or 0)
+
+# Cache shared by every process, e.g. redis://host:6379/0. Without it each
+# process keeps its own memory cache, which invalidations in other processes
+# cannot reach.
+REDIS_URL = os.environ.get("REDIS_URL") or None
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
     }
-}
+
+# Upper bound in seconds on how long a cached user affiliation record lives.
+# Link changes invalidate it earlier through signals. Without REDIS_URL the
+# records live in each process's memory, where link changes made by another
+# process only show once they expire, so the default is shorter; access tokens
+# carry roles for up to an hour anyway. 0 disables caching
+AFFILIATION_CACHE_TIMEOUT = int(
+    os.environ.get("AFFILIATION_CACHE_TIMEOUT") or (900 if REDIS_URL else 60)
+)
+
+# Upper bound in seconds on how long a cached institution hierarchy lives
+HIERARCHY_CACHE_TIMEOUT = int(os.environ.get("HIERARCHY_CACHE_TIMEOUT") or 3600)
+
+# Upper bound in seconds on how long cached item analysis results live.
+# Grading new responses invalidates them earlier
+ANALYTICS_CACHE_TIMEOUT = int(os.environ.get("ANALYTICS_CACHE_TIMEOUT") or 3600)
+
+# Append-only MinHash index used to flag near-duplicate questions, shared by
+# every process serving from this host
+DUPLICATE_INDEX_PATH = os.environ.get("DUPLICATE_INDEX_PATH") or os.path.join(
+    BASE_DIR, "question_minhash.idx"
+)
+
+# Closed quizzes and vivas are moved to compressed files under ARCHIVE_DIR
+# by `manage.py archivequizzes` once they ended ARCHIVE_AFTER_DAYS days ago
+ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR") or os.path.join(BASE_DIR, "archive")
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS") or 30)
+
+# Months of partitions created in advance for the tables partitioned by month
+# on PostgreSQL, kept up to date by scheduling `manage.py managepartitions` on
+# a single host, as the DDL locks the partitioned tables
+PARTITION_MONTHS_AHEAD = int(os.environ.get("PARTITION_MONTHS_AHEAD") or 3)
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -141,6 +202,11 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Callable used for every model's primary key default. Time-ordered ids keep
+# inserts appended to the end of the index, and partitions, archiving and
+# cloning rely on them, so it must return UUIDv7 ids.
+ID_GENERATOR = os.environ.get("ID_GENERATOR") or "utils.ids.uuid7"
+
 FRONTEND_URL = os.environ.get("FRONTEND_URL")
 
 PASSWORD_REGEX = os.environ.get("PASSWORD_REGEX")
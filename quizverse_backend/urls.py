@@ -19,7 +19,14 @@ from django.urls import path
 
 from ninja import NinjaAPI
 
-api = NinjaAPI(title="Quizverse API", version="0.1.0")
+from utils.renderers import FastJSONParser, FastJSONRenderer
+
+api = NinjaAPI(
+    title="Quizverse API",
+    version="0.1.0",
+    renderer=FastJSONRenderer(),
+    parser=FastJSONParser(),
+)
 
 api.add_router("/auth/", "users.views.router", tags=["auth"])
 api.add_router("/quiz/", "quiz_viva.views.router", tags=["quiz"])
@@ -0,0 +1,223 @@
+"""
+Per user record of the institutions, departments, courses and communities a
+user belongs to. AuthBearer attaches it as request.auth["affiliation"], a
+LazyAffiliation loaded on first read, so requests that never check their
+scope cost nothing. Once built the record is cached, so scope checks need no
+queries.
+
+Records are dropped when one of the user's links changes, once the change
+commits, so a concurrent request cannot cache the old links again. Changes
+that can affect many users at once, such as linking a course to a department
+or moving a course to another class or semester, bump a global generation
+instead, which invalidates every record. Without a shared cache (REDIS_URL)
+each process caches records in memory, which invalidations in other
+processes cannot reach, so AFFILIATION_CACHE_TIMEOUT defaults lower there.
+"""
+from collections.abc import Mapping
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from admin.models import (
+    Course,
+    CourseDepartmentLink,
+    CourseFacultyLink,
+    Faculty,
+    FacultyDepartmentLink,
+    Student,
+    StudentDepartmentLink,
+)
+from quizverse_backend.routers import primary_reads
+from users.models import UserCommunityLink, UserInstitutionLink
+
+GENERATION_KEY = "affiliation:generation"
+
+
+def affiliation_key(user_id):
+    return f"affiliation:{user_id}"
+
+
+def compute_affiliation(user_id):
+    faculty_id = (
+        Faculty.objects.filter(user_id=user_id).values_list("id", flat=True).first()
+    )
+    student = (
+        Student.objects.filter(user_id=user_id)
+        .values_list("id", "class_or_semester")
+        .first()
+    )
+    student_id, class_or_semester = student or (None, None)
+
+    departments, courses = set(), set()
+    if faculty_id:
+        departments.update(
+            FacultyDepartmentLink.objects.filter(faculty_id=faculty_id).values_list(
+                "department_id", flat=True
+            )
+        )
+        courses.update(
+            CourseFacultyLink.objects.filter(faculty_id=faculty_id).values_list(
+                "course_id", flat=True
+            )
+        )
+    if student_id:
+        student_departments = StudentDepartmentLink.objects.filter(
+            student_id=student_id
+        ).values_list("department_id", flat=True)
+        departments.update(student_departments)
+        courses.update(
+            CourseDepartmentLink.objects.filter(
+                department_id__in=student_departments,
+                course__class_or_semester=class_or_semester,
+            ).values_list("course_id", flat=True)
+        )
+
+    return {
+        "institutions": [
+            str(pk)
+            for pk in UserInstitutionLink.objects.filter(
+                user_id=user_id, accepted=True
+            ).values_list("institution_id", flat=True)
+        ],
+        "communities": [
+            str(pk)
+            for pk in UserCommunityLink.objects.filter(
+                user_id=user_id, accepted=True
+            ).values_list("community_id", flat=True)
+        ],
+        "departments": sorted(str(pk) for pk in departments),
+        "courses": sorted(str(pk) for pk in courses),
+        "faculty_id": str(faculty_id) if faculty_id else None,
+        "student_id": str(student_id) if student_id else None,
+        "class_or_semester": class_or_semester,
+    }
+
+
+def store_affiliation(user_id, generation):
+    with primary_reads():
+        affiliation = compute_affiliation(user_id)
+    cache.set(
+        affiliation_key(user_id),
+        {"generation": generation, "affiliation": affiliation},
+        settings.AFFILIATION_CACHE_TIMEOUT,
+    )
+    return affiliation
+
+
+def get_affiliation(user_id):
+    if not settings.AFFILIATION_CACHE_TIMEOUT:
+        return compute_affiliation(user_id)
+    key = affiliation_key(user_id)
+    cached = cache.get_many([GENERATION_KEY, key])
+    generation = cached.get(GENERATION_KEY, 0)
+    if (record := cached.get(key)) and record["generation"] == generation:
+        return record["affiliation"]
+    return store_affiliation(user_id, generation)
+
+
+async def aget_affiliation(user_id):
+    if not settings.AFFILIATION_CACHE_TIMEOUT:
+        return await sync_to_async(compute_affiliation)(user_id)
+    key = affiliation_key(user_id)
+    cached = await cache.aget_many([GENERATION_KEY, key])
+    generation = cached.get(GENERATION_KEY, 0)
+    if (record := cached.get(key)) and record["generation"] == generation:
+        return record["affiliation"]
+    return await sync_to_async(store_affiliation)(user_id, generation)
+
+
+class LazyAffiliation(Mapping):
+    """
+    Affiliation of a user, looked up on first read. Async views load it with
+    aload() first, the event loop cannot run the lookup's queries.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.affiliation = None
+
+    def load(self):
+        if self.affiliation is None:
+            self.affiliation = get_affiliation(self.user_id)
+        return self.affiliation
+
+    async def aload(self):
+        if self.affiliation is None:
+            self.affiliation = await aget_affiliation(self.user_id)
+        return self.affiliation
+
+    def __getitem__(self, key):
+        return self.load()[key]
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __len__(self):
+        return len(self.load())
+
+
+def invalidate_affiliation(*user_ids):
+    cache.delete_many([affiliation_key(user_id) for user_id in user_ids])
+
+
+def invalidate_all_affiliations():
+    if cache.add(GENERATION_KEY, 1, timeout=None):
+        return
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, timeout=None)
+
+
+def on_user_link_change(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_affiliation(user_id))
+
+
+def on_faculty_link_change(sender, instance, **kwargs):
+    user_ids = list(
+        Faculty.objects.filter(id=instance.faculty_id).values_list(
+            "user_id", flat=True
+        )
+    )
+    transaction.on_commit(lambda: invalidate_affiliation(*user_ids))
+
+
+def on_student_link_change(sender, instance, **kwargs):
+    user_ids = list(
+        Student.objects.filter(id=instance.student_id).values_list(
+            "user_id", flat=True
+        )
+    )
+    transaction.on_commit(lambda: invalidate_affiliation(*user_ids))
+
+
+def on_shared_link_change(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_all_affiliations)
+
+
+def on_course_change(sender, instance, created=False, **kwargs):
+    # Students see the courses of their class or semester
+    if not created:
+        transaction.on_commit(invalidate_all_affiliations)
+
+
+def connect_signals():
+    receivers = [
+        (
+            on_user_link_change,
+            [UserInstitutionLink, UserCommunityLink, Faculty, Student],
+        ),
+        (on_faculty_link_change, [FacultyDepartmentLink, CourseFacultyLink]),
+        (on_student_link_change, [StudentDepartmentLink]),
+        (on_shared_link_change, [CourseDepartmentLink]),
+        (on_course_change, [Course]),
+    ]
+    for receiver, models in receivers:
+        for model in models:
+            uid = f"affiliation:{model.__name__}"
+            post_save.connect(receiver, sender=model, dispatch_uid=uid)
+            post_delete.connect(receiver, sender=model, dispatch_uid=uid)
@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
 
 
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "users"
+
+    def ready(self):
+        from users.affiliations import connect_signals
+        from users.cleanup import VERIFICATION_TOKEN_PARTITIONS
+        from utils.partitions import register
+
+        connect_signals()
+        register(VERIFICATION_TOKEN_PARTITIONS)
+        if settings.TOKEN_GC_INTERVAL:
+            from users.cleanup import start_token_gc
+
+            request_started.connect(start_token_gc, dispatch_uid="token_gc")
@@ -0,0 +1,95 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from users.models import Token, VerificationToken
+from utils.partitions import MonthlyPartitions
+
+logger = logging.getLogger(__name__)
+
+
+def expired_tokens(now):
+    return Token.objects.filter(expires_at__lt=now)
+
+
+def expired_verification_tokens(now):
+    expired = Q()
+    for token_type, lifetime in VerificationToken.LIFETIMES.items():
+        expired |= Q(token_type=token_type, created_at__lt=now - lifetime)
+    return VerificationToken.objects.filter(expired)
+
+
+def verification_partition_expired(lower, upper, now):
+    return upper <= now - max(VerificationToken.LIFETIMES.values())
+
+
+VERIFICATION_TOKEN_PARTITIONS = MonthlyPartitions(
+    "verification_token", "created_at", expired=verification_partition_expired
+)
+
+
+def delete_in_batches(queryset, batch_size=1000, pause=0):
+    """
+    Delete the rows of queryset in primary key order, batch_size at a time.
+    Each batch is a short statement of its own so no lock is held for long,
+    and the filter is applied again on delete so rows refreshed in the
+    meantime survive. Returns the number of rows deleted.
+    """
+    deleted = 0
+    last_pk = None
+    while True:
+        page = queryset.order_by("pk")
+        if last_pk is not None:
+            page = page.filter(pk__gt=last_pk)
+        pks = list(page.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        count, _ = queryset.filter(pk__in=pks).delete()
+        deleted += count
+        last_pk = pks[-1]
+        if pause:
+            time.sleep(pause)
+
+
+def purge_expired_tokens(batch_size=1000, pause=0):
+    now = timezone.now()
+    return {
+        "token": delete_in_batches(expired_tokens(now), batch_size, pause),
+        "verification_token": delete_in_batches(
+            expired_verification_tokens(now), batch_size, pause
+        ),
+    }
+
+
+_gc_started = False
+_gc_lock = threading.Lock()
+
+
+def run_token_gc():
+    while True:
+        time.sleep(settings.TOKEN_GC_INTERVAL)
+        try:
+            reclaimed = purge_expired_tokens(pause=0.01)
+            logger.info("Token GC reclaimed %s", reclaimed)
+        except Exception:
+            logger.exception("Token GC failed")
+        finally:
+            close_old_connections()
+
+
+def start_token_gc(**kwargs):
+    """
+    request_started receiver starting the periodic collector on the first
+    request, so it only runs in processes actually serving traffic.
+    """
+    global _gc_started
+    with _gc_lock:
+        if _gc_started:
+            return
+        _gc_started = True
+    threading.Thread(target=run_token_gc, name="token-gc", daemon=True).start()
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from users.cleanup import purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete expired login tokens and verification tokens in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            dest="batch_size",
+            type=int,
+            default=1000,
+            help="Rows deleted per statement.",
+        )
+        parser.add_argument(
+            "--pause",
+            dest="pause",
+            type=float,
+            default=0.05,
+            help="Seconds to sleep between batches.",
+        )
+
+    def handle(self, *args, **options):
+        reclaimed = purge_expired_tokens(options["batch_size"], options["pause"])
+        for table, count in reclaimed.items():
+            self.stdout.write(f"{table}: {count} rows deleted")
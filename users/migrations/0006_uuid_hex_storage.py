@@ -0,0 +1,62 @@
+from django.db import migrations, models
+
+
+UUID_APPS = ("admin", "quiz_viva", "users")
+
+
+def uuid_columns(model):
+    for field in model._meta.concrete_fields:
+        target = field.target_field if field.is_relation else field
+        if isinstance(target, models.UUIDField):
+            yield field.column
+
+
+def rewrite_uuid_columns(schema_editor, apps, expression):
+    """
+    Backends without a native uuid type keep UUIDField values as 32 hex chars,
+    while the old CharField keys were stored hyphenated. Rewrite every key and
+    foreign key column in a single migration so constraint checks see matching
+    values on both sides of each relation.
+    """
+    if schema_editor.connection.features.has_native_uuid_field:
+        return
+    quote = schema_editor.quote_name
+    for model in apps.get_models(include_auto_created=True):
+        if model._meta.app_label not in UUID_APPS:
+            continue
+        columns = list(uuid_columns(model))
+        if not columns:
+            continue
+        assignments = ", ".join(
+            f"{quote(column)} = {expression.format(column=quote(column))}"
+            for column in columns
+        )
+        schema_editor.execute(
+            f"UPDATE {quote(model._meta.db_table)} SET {assignments}"
+        )
+
+
+def strip_hyphens(apps, schema_editor):
+    rewrite_uuid_columns(schema_editor, apps, "REPLACE({column}, '-', '')")
+
+
+def restore_hyphens(apps, schema_editor):
+    rewrite_uuid_columns(
+        schema_editor,
+        apps,
+        "SUBSTR({column}, 1, 8) || '-' || SUBSTR({column}, 9, 4) || '-' || "
+        "SUBSTR({column}, 13, 4) || '-' || SUBSTR({column}, 17, 4) || '-' || "
+        "SUBSTR({column}, 21)",
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0005_uuid_primary_keys"),
+        ("admin", "0008_uuid_primary_keys"),
+        ("quiz_viva", "0004_uuid_primary_keys"),
+    ]
+
+    operations = [
+        migrations.RunPython(strip_hyphens, restore_hyphens),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:50
+
+import utils.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0006_uuid_hex_storage"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="role",
+            name="id",
+            field=models.UUIDField(
+                default=utils.ids.generate_id, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="token",
+            name="id",
+            field=models.UUIDField(
+                default=utils.ids.generate_id, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="user",
+            name="id",
+            field=models.UUIDField(
+                default=utils.ids.generate_id, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="usercommunitylink",
+            name="id",
+            field=models.UUIDField(
+                default=utils.ids.generate_id, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="userinstitutionlink",
+            name="id",
+            field=models.UUIDField(
+                default=utils.ids.generate_id, primary_key=True, serialize=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="verificationtoken",
+            name="id",
+            field=models.UUIDField(
+                default=utils.ids.generate_id, primary_key=True, serialize=False
+            ),
+        ),
+    ]
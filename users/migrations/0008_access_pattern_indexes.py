@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("admin", "0010_access_pattern_indexes"),
+        ("users", "0007_time_ordered_ids"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="usercommunitylink",
+            index=models.Index(
+                fields=["user", "accepted"], name="user_community_accepted_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userinstitutionlink",
+            index=models.Index(
+                fields=["user", "accepted"], name="user_institution_accepted_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:00
+
+from datetime import datetime, timezone
+
+import jwt
+from django.db import migrations, models
+
+
+def backfill_expires_at(apps, schema_editor):
+    """
+    Read the expiry of existing refresh tokens from their exp claim.
+    Tokens that cannot be decoded are already unusable and expire now.
+    """
+    Token = apps.get_model("users", "Token")
+    now = datetime.now(timezone.utc)
+    tokens = Token.objects.filter(expires_at__isnull=True).only("refresh_token")
+    batch = []
+    for token in tokens.iterator(chunk_size=1000):
+        try:
+            claims = jwt.decode(
+                token.refresh_token, options={"verify_signature": False}
+            )
+            token.expires_at = datetime.fromtimestamp(claims["exp"], timezone.utc)
+        except (jwt.InvalidTokenError, KeyError):
+            token.expires_at = now
+        batch.append(token)
+        if len(batch) == 1000:
+            Token.objects.bulk_update(batch, ["expires_at"])
+            batch = []
+    Token.objects.bulk_update(batch, ["expires_at"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0008_access_pattern_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="token",
+            name="expires_at",
+            field=models.DateTimeField(db_index=True, null=True),
+        ),
+        migrations.RunPython(backfill_expires_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+from utils.partitions import MonthlyPartitions
+
+
+def partition_by_month(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    MonthlyPartitions("verification_token", "created_at").convert(
+        settings.PARTITION_MONTHS_AHEAD
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0009_token_expires_at"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="verificationtoken",
+            name="token",
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AddConstraint(
+            model_name="verificationtoken",
+            constraint=models.UniqueConstraint(
+                fields=("token", "created_at"), name="unique_verification_token"
+            ),
+        ),
+        migrations.RunPython(partition_by_month, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:53
+
+from django.db import migrations, models
+
+from utils.partitions import UnlessPartitioned
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0010_partition_verification_token"),
+    ]
+
+    # Only PostgreSQL partitions verification_token, other backends get the
+    # unique token back and drop the constraint 0010 added for partitioning
+    operations = [
+        UnlessPartitioned(
+            [
+                migrations.RemoveConstraint(
+                    model_name="verificationtoken",
+                    name="unique_verification_token",
+                ),
+                migrations.AlterField(
+                    model_name="verificationtoken",
+                    name="token",
+                    field=models.CharField(max_length=100, unique=True),
+                ),
+            ]
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:56
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0011_unique_verification_token"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="role",
+            options={"ordering": ["id"]},
+        ),
+    ]
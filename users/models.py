@@ -1,9 +1,14 @@
-import uuid
+from datetime import timedelta
+
 from django.db import models
+from django.utils import timezone
+
+from utils.ids import generate_id
+from utils.partitions import month_start
 
 
 class User(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     username = models.EmailField(max_length=50, unique=True)
     email = models.CharField(max_length=50, unique=True)
     password = models.CharField(max_length=150)
@@ -17,17 +22,19 @@ class User(models.Model):
 
 
 class Role(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     name = models.CharField(max_length=50, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = "role"
+        # Role id lists render in a stable order on every backend
+        ordering = ["id"]
 
 
 class UserInstitutionLink(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     user = models.ForeignKey(
         "User", on_delete=models.CASCADE, related_name="user_institution_link"
     )
@@ -46,10 +53,15 @@ class UserInstitutionLink(models.Model):
                 fields=["user", "institution"], name="unique_user_institution"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["user", "accepted"], name="user_institution_accepted_idx"
+            ),
+        ]
 
 
 class UserCommunityLink(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     user = models.ForeignKey(
         "User", on_delete=models.CASCADE, related_name="user_community_link"
     )
@@ -68,13 +80,20 @@ class UserCommunityLink(models.Model):
                 fields=["user", "community"], name="unique_user_community"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["user", "accepted"], name="user_community_accepted_idx"
+            ),
+        ]
 
 
 class Token(models.Model):
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=generate_id)
     access_token = models.TextField()
     refresh_token = models.TextField()
     user = models.OneToOneField("User", on_delete=models.CASCADE)
+    # Expiry of the refresh token, moved forward on every login
+    expires_at = models.DateTimeField(null=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -83,7 +102,10 @@ class Token(models.Model):
 
 class VerificationToken(models.Model):
     TOKEN_TYPES = [("verify", "verify"), ("forgot", "forgot")]
-    id = models.CharField(primary_key=True, max_length=36, default=uuid.uuid4)
+    LIFETIMES = {"verify": timedelta(minutes=5), "forgot": timedelta(minutes=2)}
+    id = models.UUIDField(primary_key=True, default=generate_id)
+    # Unique on its own except on PostgreSQL, whose partitioned table can only
+    # enforce (token, created_at), see 0011_unique_verification_token
     token = models.CharField(max_length=100, unique=True)
     user = models.ForeignKey("User", on_delete=models.CASCADE)
     token_type = models.CharField(max_length=7, choices=TOKEN_TYPES)
@@ -91,3 +113,14 @@ class VerificationToken(models.Model):
 
     class Meta:
         db_table = "verification_token"
+
+    def is_expired(self):
+        return timezone.now() > self.created_at + self.LIFETIMES[self.token_type]
+
+    @classmethod
+    def oldest_kept(cls):
+        """
+        Start of the oldest month that can still hold an unexpired token.
+        Lookups filtered from there on skip every older partition.
+        """
+        return month_start(timezone.now() - max(cls.LIFETIMES.values()))
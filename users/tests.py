@@ -1,3 +1,67 @@
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+# The API module first, as utils.ratelimit imports it and it imports every view
+from quizverse_backend.urls import api  # noqa: F401
+from utils.ratelimit import InMemoryBackend, get_backend
+from utils.testing import create_user, login
+
+
+class LazyAffiliationTests(TestCase):
+    def test_endpoints_not_reading_the_affiliation_skip_it(self):
+        headers = login(self.client, create_user("faculty", ["Faculty"]))
+        # The token check, the user and its roles
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/v1/auth/user", **headers)
+        self.assertEqual(response.status_code, 200)
+
+
+@mock.patch("utils.ratelimit.time.monotonic")
+class RateLimitTests(TestCase):
+    def setUp(self):
+        get_backend.cache_clear()
+        self.addCleanup(get_backend.cache_clear)
+
+    def test_buckets_refill_at_the_rate(self, monotonic):
+        backend = InMemoryBackend()
+        # 4 requests per 8 seconds, one token back every 2 seconds
+        monotonic.return_value = 0.0
+        self.assertEqual([backend.consume("key", 4, 8) for _ in range(4)], [0] * 4)
+        self.assertEqual(backend.consume("key", 4, 8), 2.0)
+        monotonic.return_value = 1.0
+        self.assertEqual(backend.consume("key", 4, 8), 1.0)
+        monotonic.return_value = 2.0
+        self.assertEqual(backend.consume("key", 4, 8), 0)
+        self.assertEqual(backend.consume("key", 4, 8), 2.0)
+        # Idle buckets refill up to their capacity only
+        monotonic.return_value = 100.0
+        self.assertEqual([backend.consume("key", 4, 8) for _ in range(4)], [0] * 4)
+        self.assertEqual(backend.consume("key", 4, 8), 2.0)
+
+    def test_keys_have_their_own_buckets(self, monotonic):
+        backend = InMemoryBackend()
+        monotonic.return_value = 0.0
+        for _ in range(4):
+            backend.consume("one", 4, 8)
+        self.assertEqual(backend.consume("one", 4, 8), 2.0)
+        self.assertEqual(backend.consume("two", 4, 8), 0)
+
+    def test_limited_logins_answer_429_with_retry_after(self, monotonic):
+        monotonic.return_value = 0.0
+
+        def attempt(username):
+            return self.client.post(
+                "/api/v1/auth/login/",
+                {"username_or_email": username, "password": "wrong"},
+                content_type="application/json",
+            )
+
+        # 5 attempts per minute and identifier, one back every 12 seconds
+        for _ in range(5):
+            self.assertEqual(attempt("one@example.com").status_code, 400)
+        response = attempt("ONE@example.com")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "12")
+        # Other identifiers from the same address are not held back
+        self.assertEqual(attempt("two@example.com").status_code, 400)
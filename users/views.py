@@ -1,6 +1,5 @@
 import secrets
 import re
-from datetime import datetime, timedelta
 
 from ninja import Router
 from typing import Any, List
@@ -11,21 +10,36 @@ from django.contrib.auth.hashers import make_password, check_password
 from django.db.models import Q
 from django.http import JsonResponse
 from django.template.loader import get_template
+from django.utils import timezone
 
 from users.models import *
 from users.schemas import *
 from quizverse_backend.settings import PASSWORD_REGEX, EMAIL_HOST_USER, FRONTEND_URL
 from utils.utils import search_queryset
+from utils.serializers import TrustedOutput
+from utils.ratelimit import rate_limit
 from utils.authentication import (
     AuthBearer,
+    AsyncAuthBearer,
     role_required,
     verify_token,
     generate_access_token,
     generate_token,
+    REFRESH_TOKEN_LIFETIME,
 )
 
 router = Router(auth=AuthBearer())
 
+user_output = TrustedOutput(UserOutSchema)
+
+
+def login_identifier(request, login):
+    return login.username_or_email.lower()
+
+
+def forgot_password_email(request, data):
+    return data.email.lower()
+
 
 def verification_email(email):
     token = secrets.token_urlsafe(40)
@@ -46,10 +60,12 @@ def verification_email(email):
     return token
 
 
-@router.get("/user", response={200: UserOutSchema, 404: Any})
-def get_user(request):
+@router.get("/user", auth=AsyncAuthBearer(), response={200: UserOutSchema, 404: Any})
+async def get_user(request):
     try:
-        user = User.objects.get(id=request.auth["user"])
+        user = await User.objects.prefetch_related("role").aget(
+            id=request.auth["user"]
+        )
         return 200, user
     except User.DoesNotExist:
         return 404, {"details": "User not found"}
@@ -61,10 +77,11 @@ def get_users(request, search: str = None):
     users = User.objects.all()
     if search:
         users = search_queryset(users, search, ["username", "email"])
-    return 201, users
+    return user_output.response(request, users, status=201)
 
 
 @router.post("/register/", auth=None, response={201: UserOutSchema, 400: Any})
+@rate_limit("10/hour")
 def register(request, user: UserInSchema):
     unique_fields = ["username", "email"]
     user_data = user.dict()
@@ -100,20 +117,24 @@ def send_verification(request):
 def verify_email(request, token: str):
     try:
         verification_token = VerificationToken.objects.get(
-            token=token, token_type="verify"
+            token=token,
+            token_type="verify",
+            created_at__gte=VerificationToken.oldest_kept(),
         )
     except VerificationToken.DoesNotExist:
         return 400, {"details": "Invalid Link"}
-    if datetime.now() > verification_token.created_at + timedelta(minutes=5):
+    if verification_token.is_expired():
         return 400, {"details": "Link Expired"}
 
-    token.user.is_verified = True
-    token.user.save()
+    verification_token.user.is_verified = True
+    verification_token.user.save()
     verification_token.delete()
     return 200, {"details": "Email verified"}
 
 
 @router.post("/login/", auth=None, response={400: Any})
+@rate_limit("10/minute")
+@rate_limit("5/minute", key=login_identifier)
 def login(request, login: LoginSchema):
     user_data = login.dict()
     user = User.objects.filter(
@@ -123,15 +144,21 @@ def login(request, login: LoginSchema):
 
     if user and check_password(user_data["password"], user.password):
         access_token, refresh_token = generate_token(
-            user.id, [role.name for role in user.role.all()]
+            str(user.id), [role.name for role in user.role.all()]
         )
+        expires_at = timezone.now() + REFRESH_TOKEN_LIFETIME
         if not Token.objects.filter(user_id=user.id).exists():
             Token.objects.create(
-                user_id=user.id, access_token=access_token, refresh_token=refresh_token
+                user_id=user.id,
+                access_token=access_token,
+                refresh_token=refresh_token,
+                expires_at=expires_at,
             )
         else:
             Token.objects.filter(user_id=user.id).update(
-                access_token=access_token, refresh_token=refresh_token
+                access_token=access_token,
+                refresh_token=refresh_token,
+                expires_at=expires_at,
             )
         response = JsonResponse(data={"access_token": access_token}, status=200)
         response.set_cookie(
@@ -153,6 +180,7 @@ def logout(request):
 
 
 @router.post("/refresh/", auth=None, response={200: TokenSchema, 400: Any})
+@rate_limit("30/minute")
 def get_access_token(request):
     try:
         refresh_token = request.COOKIES.get("refresh_token")
@@ -199,6 +227,8 @@ def reset_password(request, payload: ResetPasswordSchema):
 
 
 @router.post("/forgot-password/", auth=None, response={200: Any, 400: Any})
+@rate_limit("5/hour")
+@rate_limit("3/hour", key=forgot_password_email)
 def forgot_password(request, data: EmailSchema):
     data = data.dict()
     user = User.objects.filter(email=data["email"]).first()
@@ -220,11 +250,13 @@ def verify_forgot_otp(request, token: str, data: TextSchema):
     data = data.dict()
     try:
         verification_token = VerificationToken.objects.get(
-            token=token, token_type="forgot"
+            token=token,
+            token_type="forgot",
+            created_at__gte=VerificationToken.oldest_kept(),
         )
     except VerificationToken.DoesNotExist:
         return 400, {"details": "Invalid link"}
-    if datetime.now() > verification_token.created_at + timedelta(minutes=2):
+    if verification_token.is_expired():
         return 400, {"details": "Link expired"}
     if data["text_data"]:
         user = verification_token.user
@@ -1,12 +1,18 @@
 import jwt
+from asgiref.sync import iscoroutinefunction
 from datetime import datetime, timedelta
 from quizverse_backend.settings import SECRET_KEY, JWT_ALGORITHM
+from users.affiliations import LazyAffiliation
 from users.models import Token
 from quizverse_backend.urls import api
 from functools import wraps
 from ninja.security import HttpBearer
 
 
+ACCESS_TOKEN_LIFETIME = timedelta(hours=1)
+REFRESH_TOKEN_LIFETIME = timedelta(days=7)
+
+
 class InvalidToken(Exception):
     pass
 
@@ -33,6 +39,20 @@ class AuthBearer(HttpBearer):
     def authenticate(self, request, token):
         payload = verify_token(token, "access")
         if payload:
+            payload["affiliation"] = LazyAffiliation(payload["user"])
+            return payload
+        else:
+            raise InvalidToken
+
+
+class AsyncAuthBearer(HttpBearer):
+    # Lets Ninja await authenticate() on async operations
+    is_async = True
+
+    async def authenticate(self, request, token):
+        payload = await averify_token(token, "access")
+        if payload:
+            payload["affiliation"] = LazyAffiliation(payload["user"])
             return payload
         else:
             raise InvalidToken
@@ -41,7 +61,7 @@ class AuthBearer(HttpBearer):
 # Function to generate a JWT token
 def generate_access_token(user_id, role):
     # Set the expiration time for the token (e.g., 1 hour from now)
-    access_exp_time = datetime.now() + timedelta(hours=1)
+    access_exp_time = datetime.now() + ACCESS_TOKEN_LIFETIME
     # Create the payload containing the user ID and expiration time
     access_payload = {
         "user": user_id,
@@ -56,7 +76,7 @@ def generate_access_token(user_id, role):
 
 def generate_token(user_id, role):
     access_token = generate_access_token(user_id, role)
-    refresh_exp_time = datetime.now() + timedelta(days=7)
+    refresh_exp_time = datetime.now() + REFRESH_TOKEN_LIFETIME
     # Create the payload containing the user ID and expiration time
     refresh_payload = {
         "user": user_id,
@@ -69,31 +89,16 @@ def generate_token(user_id, role):
     return access_token, refresh_token
 
 
-# Function to verify a JWT token
-def verify_token(token, type):
+# Function to decode a JWT token and check its type, without the database
+def decode_token(token, type):
     try:
         # Decode the token using the secret key
         payload = jwt.decode(token, SECRET_KEY, algorithms=JWT_ALGORITHM)
-
-        # Extract the user ID from the payload
-        user_id = payload["user"]
-
-        # Check if token present in database
-        if type == "access":
-            if payload["tokenType"] != "access":
-                raise jwt.InvalidTokenError
-            Token.objects.get(user_id=user_id, access_token=token)
-        elif type == "refresh":
-            if payload["tokenType"] != "refresh":
-                raise jwt.InvalidTokenError
-            Token.objects.get(user_id=user_id, refresh_token=token)
-
+        if payload["tokenType"] != type:
+            raise jwt.InvalidTokenError
         payload["token"] = token
         return payload
 
-    except Token.DoesNotExist:
-        # Token not present in database
-        return None
     except jwt.ExpiredSignatureError:
         # Token has expired
         return None
@@ -102,17 +107,53 @@ def verify_token(token, type):
         return None
 
 
+def token_lookup(payload, type):
+    if type == "access":
+        return {"user_id": payload["user"], "access_token": payload["token"]}
+    return {"user_id": payload["user"], "refresh_token": payload["token"]}
+
+
+# Function to verify a JWT token
+def verify_token(token, type):
+    if not (payload := decode_token(token, type)):
+        return None
+    # Check if token present in database
+    if not Token.objects.filter(**token_lookup(payload, type)).exists():
+        return None
+    return payload
+
+
+async def averify_token(token, type):
+    if not (payload := decode_token(token, type)):
+        return None
+    if not await Token.objects.filter(**token_lookup(payload, type)).aexists():
+        return None
+    return payload
+
+
+def has_role(request, roles):
+    if not (given_roles := getattr(request, "auth", {}).get("roles")):
+        return False
+    return any(role in roles for role in given_roles)
+
+
 def role_required(roles):
     def decorator(view_func):
+        if iscoroutinefunction(view_func):
+
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if not has_role(request, roles):
+                    raise InSufficientPermission
+                return await view_func(request, *args, **kwargs)
+
+            return async_wrapper
+
         @wraps(view_func)
         def wrapper(request, *args, **kwargs):
-
-            if not (given_roles := getattr(request, "auth", {}).get("roles")):
+            if not has_role(request, roles):
                 raise InSufficientPermission
-            for role in given_roles:
-                if role in roles:
-                    return view_func(request, *args, **kwargs)
-            raise InSufficientPermission
+            return view_func(request, *args, **kwargs)
 
         return wrapper
 
@@ -0,0 +1,60 @@
+"""
+Denormalized row counts kept on parent rows.
+
+Paths creating or deleting children bump the parent's counter in the same
+transaction with an F() expression, so concurrent writers never lose an
+update. Anything bypassing those paths drifts the counters, which
+reconcile_counter() measures and repairs.
+"""
+from django.db import transaction
+from django.db.models import Count, F
+
+
+def increment(queryset, field, delta=1):
+    if delta:
+        queryset.update(**{field: F(field) + delta})
+
+
+def reconcile_counter(parents, field, children, batch_size=1000):
+    """
+    Recompute the counter field of parents from children, a list of
+    (child model, foreign key name) pairs whose rows are summed, batch_size
+    parents at a time. Each batch locks its parents while counting so
+    concurrent increments are not overwritten.
+    Returns (rows checked, rows fixed, total absolute drift).
+    """
+    model = parents.model
+    checked = fixed = drift = 0
+    last_pk = None
+    while True:
+        page = parents.order_by("pk")
+        if last_pk is not None:
+            page = page.filter(pk__gt=last_pk)
+        pks = list(page.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return checked, fixed, drift
+        with transaction.atomic():
+            stored = dict(
+                model.objects.select_for_update()
+                .filter(pk__in=pks)
+                .values_list("pk", field)
+            )
+            actual = dict.fromkeys(stored, 0)
+            for child, foreign_key in children:
+                for pk, count in (
+                    child.objects.filter(**{f"{foreign_key}__in": list(stored)})
+                    .values_list(foreign_key)
+                    .annotate(count=Count("pk"))
+                    .order_by()
+                ):
+                    actual[pk] += count
+            wrong = [
+                model(pk=pk, **{field: count})
+                for pk, count in actual.items()
+                if stored[pk] != count
+            ]
+            model.objects.bulk_update(wrong, [field])
+        checked += len(stored)
+        fixed += len(wrong)
+        drift += sum(abs(stored[row.pk] - getattr(row, field)) for row in wrong)
+        last_pk = pks[-1]
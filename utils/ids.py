@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+import uuid
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7():
+    """
+    Generate a time-ordered UUID (RFC 9562, version 7).
+    The 12 bit rand_a field is used as a counter, so ids generated by this
+    process are strictly increasing even within the same millisecond.
+    """
+    global _last_ms, _counter
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            # Start low in the counter space to leave room for a burst
+            _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            _counter += 1
+            if _counter > 0xFFF:
+                _last_ms += 1
+                _counter = 0
+        timestamp, counter = _last_ms, _counter
+
+    rand_b = int.from_bytes(os.urandom(8), "big") & 0x3FFFFFFFFFFFFFFF
+    value = (timestamp << 80) | (0x7 << 76) | (counter << 64) | (0x2 << 62) | rand_b
+    return uuid.UUID(int=value)
+
+
+@lru_cache(maxsize=None)
+def get_id_generator():
+    """
+    The ID_GENERATOR callable, which must return version 7 ids: archive and
+    partition ranges are bounded with uuid7_floor() and cloned rows are
+    numbered after an id's leading timestamp.
+    """
+    path = getattr(settings, "ID_GENERATOR", "utils.ids.uuid7")
+    generator = import_string(path)
+    if generator().version != 7:
+        raise ImproperlyConfigured(f"ID_GENERATOR {path} must return UUIDv7 ids")
+    return generator
+
+
+def generate_id():
+    """
+    Default primary key value for every model.
+    The generator is configurable through the ID_GENERATOR setting.
+    """
+    return get_id_generator()()
+
+
+def uuid7_floor(moment):
+    """
+    Lower bound of the version 7 ids generated from moment on, for range
+    filters on time-ordered keys.
+    """
+    return uuid.UUID(int=int(moment.timestamp() * 1000) << 80)
@@ -0,0 +1,260 @@
+"""
+Monthly range partitioning of append-mostly tables on PostgreSQL.
+
+A partitioned table is split into one partition per calendar month (UTC) of
+its partition key, named <table>_pYYYYMM, plus a <table>_default partition
+catching rows outside every month created so far. Queries filtering on the
+key only scan the partitions whose range matches, and retention drops whole
+months with DETACH and DROP instead of deleting their rows one by one.
+
+Partitions are created and dropped by `manage.py managepartitions` alone,
+scheduled on a single host: the DDL takes locks on the partitioned table that
+concurrent maintenance from every worker would contend on. The default
+partition is never dropped, rows stay there until their owning app deletes
+them, and the command reports how many it holds.
+
+Other backends keep a single table behind the same models. Creating and
+dropping partitions is a no-op there, and retention falls back to the
+batched deletes of the owning app.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection, migrations, transaction
+from django.utils import timezone
+
+_registry = {}
+
+
+def month_start(moment):
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def supports_partitions():
+    return connection.vendor == "postgresql"
+
+
+class MonthlyPartitions:
+    """
+    Monthly partitions of table on column. bound turns the first instant of a
+    month into a value of column, and expired(lower, upper, now) tells whether
+    the partition of the months [lower, upper) may be dropped.
+    """
+
+    def __init__(self, table, column, bound=None, expired=None):
+        self.table = table
+        self.column = column
+        self.bound = bound or (lambda moment: moment)
+        self.expired = expired or (lambda lower, upper, now: False)
+
+    @property
+    def default_name(self):
+        return f"{self.table}_default"
+
+    def name(self, month):
+        return f"{self.table}_p{month:%Y%m}"
+
+    def months(self):
+        """
+        First instants of the months with a partition of their own.
+        """
+        pattern = re.compile(rf"^{re.escape(self.table)}_p(\d{{4}})(\d{{2}})$")
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = %s",
+                [self.table],
+            )
+            names = [name for (name,) in cursor.fetchall()]
+        epoch = month_start(timezone.now())
+        return sorted(
+            epoch.replace(year=int(match[1]), month=int(match[2]))
+            for name in names
+            if (match := pattern.match(name))
+        )
+
+    def create(self, month):
+        """
+        Create the partition of month, first moving any of its rows that
+        landed in the default partition while it did not exist.
+        """
+        quote = connection.ops.quote_name
+        table, default = quote(self.table), quote(self.default_name)
+        column, partition = quote(self.column), quote(self.name(month))
+        bounds = [self.bound(month), self.bound(add_months(month, 1))]
+        in_range = f"{column} >= %s AND {column} < %s"
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_range})", bounds
+            )
+            (stranded,) = cursor.fetchone()
+            if stranded:
+                cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {default}")
+            cursor.execute(
+                f"CREATE TABLE {partition} PARTITION OF {table} "
+                "FOR VALUES FROM (%s) TO (%s)",
+                bounds,
+            )
+            if stranded:
+                cursor.execute(
+                    f"INSERT INTO {partition} "
+                    f"SELECT * FROM {default} WHERE {in_range}",
+                    bounds,
+                )
+                cursor.execute(f"DELETE FROM {default} WHERE {in_range}", bounds)
+                cursor.execute(
+                    f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"
+                )
+
+    def default_rows(self):
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {quote(self.default_name)}")
+            (count,) = cursor.fetchone()
+        return count
+
+    def drop(self, month):
+        quote = connection.ops.quote_name
+        partition = quote(self.name(month))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE {quote(self.table)} DETACH PARTITION {partition}"
+            )
+            cursor.execute(f"DROP TABLE {partition}")
+
+    def maintain(self, now, ahead):
+        """
+        Create the partitions of the current month and the next ahead months,
+        and drop the expired ones. Returns the names created and dropped and
+        the rows left in the default partition.
+        """
+        existing = self.months()
+        current = month_start(now)
+        created, dropped = [], []
+        for month in (add_months(current, count) for count in range(ahead + 1)):
+            if month not in existing:
+                self.create(month)
+                created.append(self.name(month))
+        for month in existing:
+            if self.expired(month, add_months(month, 1), now):
+                self.drop(month)
+                dropped.append(self.name(month))
+        return {
+            "created": created,
+            "dropped": dropped,
+            "default_rows": self.default_rows(),
+        }
+
+    def convert(self, ahead):
+        """
+        Turn the plain table into a partitioned one with the same columns,
+        constraints and indexes and move its rows over. The primary key is
+        widened with the partition key, and every unique constraint must
+        already include it.
+        """
+        quote = connection.ops.quote_name
+        table = quote(self.table)
+        old = quote(f"{self.table}_unpartitioned")
+        with connection.cursor() as cursor:
+            # Definitions are read before the rename, so they still name
+            # the table they are replayed on
+            cursor.execute(
+                "SELECT conname, contype, pg_get_constraintdef(oid) "
+                "FROM pg_constraint WHERE conrelid = %s::regclass "
+                "AND contype IN ('p', 'u', 'f')",
+                [self.table],
+            )
+            constraints = cursor.fetchall()
+            cursor.execute(
+                "SELECT indexdef FROM pg_indexes WHERE tablename = %s "
+                "AND indexname NOT IN (SELECT conname FROM pg_constraint "
+                "WHERE conrelid = %s::regclass)",
+                [self.table, self.table],
+            )
+            indexes = [definition for (definition,) in cursor.fetchall()]
+
+            cursor.execute(f"ALTER TABLE {table} RENAME TO {old}")
+            cursor.execute(
+                f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS "
+                f"INCLUDING CONSTRAINTS) PARTITION BY RANGE ({quote(self.column)})"
+            )
+            cursor.execute(
+                f"CREATE TABLE {quote(self.default_name)} "
+                f"PARTITION OF {table} DEFAULT"
+            )
+        current = month_start(timezone.now())
+        for count in range(ahead + 1):
+            self.create(add_months(current, count))
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+            cursor.execute(f"DROP TABLE {old}")
+            for name, kind, definition in constraints:
+                if kind == "p":
+                    definition = f"PRIMARY KEY (id, {quote(self.column)})"
+                elif kind == "u" and self.column not in definition:
+                    raise ValueError(
+                        f"Unique constraint {name} of {self.table} does not "
+                        f"include the partition key {self.column}"
+                    )
+                cursor.execute(
+                    f"ALTER TABLE {table} ADD CONSTRAINT {quote(name)} {definition}"
+                )
+            for definition in indexes:
+                cursor.execute(definition)
+
+
+class UnlessPartitioned(migrations.SeparateDatabaseAndState):
+    """
+    Migration operation applying operations to the state everywhere, but to
+    the database only on backends without partitioning, for schema changes a
+    partitioned table cannot take, such as a unique constraint leaving out
+    the partition key.
+    """
+
+    def __init__(self, operations):
+        super().__init__(database_operations=operations, state_operations=operations)
+
+    def deconstruct(self):
+        return self.__class__.__name__, [], {"operations": self.state_operations}
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+    def describe(self):
+        return "Unless partitioned: " + "; ".join(
+            operation.describe() for operation in self.state_operations
+        )
+
+
+def register(partitions):
+    _registry[partitions.table] = partitions
+
+
+def maintain_partitions(now=None, ahead=None):
+    """
+    Run maintenance of every registered partitioned table. Returns
+    {table: {"created": [...], "dropped": [...], "default_rows": n}}, empty
+    on backends without partitioning.
+    """
+    if not supports_partitions():
+        return {}
+    now = now or timezone.now()
+    if ahead is None:
+        ahead = settings.PARTITION_MONTHS_AHEAD
+    return {
+        table: partitions.maintain(now, ahead)
+        for table, partitions in _registry.items()
+    }
@@ -0,0 +1,182 @@
+import hashlib
+import ipaddress
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache, wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from quizverse_backend.urls import api
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+
+@api.exception_handler(RateLimited)
+def on_rate_limited(request, exc):
+    response = api.create_response(
+        request, {"detail": "Too many requests"}, status=429
+    )
+    response["Retry-After"] = str(max(1, math.ceil(exc.retry_after)))
+    return response
+
+
+def parse_rate(rate):
+    """
+    Parse rates such as "5/minute" or "100/h" into (count, period seconds).
+    """
+    count, _, period = rate.partition("/")
+    for name, seconds in PERIODS.items():
+        if name.startswith(period.strip().lower()):
+            return int(count), seconds
+    raise ValueError(f"Invalid rate: {rate}")
+
+
+class InMemoryBackend:
+    """
+    Token buckets held in process memory, split across shards so concurrent
+    requests for different keys rarely contend on the same lock.
+    Each shard keeps its buckets least recently used first. Buckets that have
+    refilled completely are equivalent to missing ones, and every request
+    drops those at the front, so eviction costs O(1) amortized. A shard past
+    max_keys also drops its least recently used buckets, refilled or not.
+    """
+
+    def __init__(self, shards=64, max_keys=10000):
+        self.shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+        self.max_keys = max_keys
+
+    def consume(self, key, capacity, period):
+        """
+        Take one token from the bucket of key. Returns 0 when allowed, or the
+        seconds until a token is available.
+        """
+        lock, buckets = self.shards[hash(key) % len(self.shards)]
+        refill_rate = capacity / period
+        now = time.monotonic()
+        with lock:
+            tokens, last, _ = buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - last) * refill_rate)
+            retry_after = 0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / refill_rate
+            full_at = now + (capacity - tokens) / refill_rate
+            buckets[key] = (tokens, now, full_at)
+            buckets.move_to_end(key)
+            while buckets:
+                _, _, oldest_full_at = next(iter(buckets.values()))
+                if oldest_full_at > now and len(buckets) <= self.max_keys:
+                    break
+                buckets.popitem(last=False)
+        return retry_after
+
+
+class CacheBackend:
+    """
+    Shared limiter for multi-node deployments, backed by the Django cache
+    (point CACHES at Redis or Memcached). Uses fixed windows with the
+    cache's atomic incr since the cache API offers no compare-and-set.
+    """
+
+    def consume(self, key, capacity, period):
+        now = time.time()
+        window = int(now // period)
+        digest = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+        cache_key = f"ratelimit:{digest}:{window}"
+        cache.add(cache_key, 0, timeout=period)
+        try:
+            count = cache.incr(cache_key)
+        except ValueError:
+            # Expired between add and incr
+            cache.set(cache_key, 1, timeout=period)
+            count = 1
+        if count <= capacity:
+            return 0
+        return (window + 1) * period - now
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    return import_string(settings.RATELIMIT_BACKEND)()
+
+
+def strip_port(address):
+    """
+    Address without the port some proxies append, e.g. "1.2.3.4:5678" or
+    "[::1]:5678". Bare IPv6 addresses are returned as they are.
+    """
+    if address.startswith("["):
+        return address[1 : address.find("]")]
+    host, _, port = address.rpartition(":")
+    if port.isdigit() and "." in host:
+        return host
+    return address
+
+
+def client_ip(request, *args, **kwargs):
+    """
+    Client address: the last RATELIMIT_IP_HEADER entry, the one appended by
+    the trusted proxy, as earlier entries come from the client and can be
+    forged. Falls back to REMOTE_ADDR.
+    """
+    if header := settings.RATELIMIT_IP_HEADER:
+        if forwarded := request.headers.get(header):
+            address = strip_port(forwarded.split(",")[-1].strip())
+            try:
+                return str(ipaddress.ip_address(address))
+            except ValueError:
+                pass
+    return request.META.get("REMOTE_ADDR")
+
+
+def rate_limit(rate, key=client_ip):
+    """
+    Limit a view to rate requests per key, the client IP by default. key is
+    called with the view's arguments and may return None to skip the check.
+    """
+    capacity, period = parse_rate(rate)
+
+    def decorator(view_func):
+        scope = (
+            f"{view_func.__module__}.{view_func.__qualname__}:{rate}:{key.__name__}"
+        )
+
+        def check(request, *args, **kwargs):
+            value = key(request, *args, **kwargs)
+            if value is None:
+                return
+            retry_after = get_backend().consume(
+                f"{scope}:{value}", capacity, period
+            )
+            if retry_after:
+                raise RateLimited(retry_after)
+
+        if iscoroutinefunction(view_func):
+
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                check(request, *args, **kwargs)
+                return await view_func(request, *args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            check(request, *args, **kwargs)
+            return view_func(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,51 @@
+import datetime
+
+from ninja.parser import Parser
+from ninja.renderers import JSONRenderer
+from ninja.responses import NinjaJSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# orjson handles uuid.UUID natively. Datetimes are passed through to
+# encode_default so they keep the millisecond precision and "Z" suffix that
+# the stdlib renderer has always produced.
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+)
+
+
+_encoder = NinjaJSONEncoder()
+
+
+def encode_default(obj):
+    # Same output as DjangoJSONEncoder, checked first as the common case
+    if isinstance(obj, datetime.datetime):
+        representation = obj.isoformat()
+        if obj.microsecond:
+            representation = representation[:23] + representation[26:]
+        if representation.endswith("+00:00"):
+            representation = representation[:-6] + "Z"
+        return representation
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson, falling back to the stdlib renderer
+    when orjson is not installed.
+    """
+
+    def render(self, request, data, *, response_status):
+        if orjson is None:
+            return super().render(request, data, response_status=response_status)
+        return orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONParser(Parser):
+    def parse_body(self, request):
+        if orjson is None:
+            return super().parse_body(request)
+        return orjson.loads(request.body)
@@ -0,0 +1,108 @@
+from collections import defaultdict
+
+from utils.utils import list_etag, list_version, not_modified
+
+
+class TrustedOutput:
+    """
+    Opt-in fast path for list endpoints returning a ModelSchema.
+
+    Rows are read with .values_list() and mapped straight onto the schema's
+    field names, skipping model instantiation and Pydantic validation. Only
+    use it for querysets whose columns already have the schema's output types,
+    i.e. plain model fields, foreign keys and many to many ids, the latter in
+    the related model's default ordering as the validated path lists them.
+    The rendered JSON is identical to the validated path wherever that
+    ordering is total.
+
+    With conditional=True the response carries an ETag derived from the
+    updated_at maximum and row count, and a matching If-None-Match is
+    answered with a 304 after that single aggregate query. Only use it for
+    schemas without many to many fields, as link changes do not touch
+    updated_at.
+    """
+
+    def __init__(self, schema):
+        model = schema.Meta.model
+        self.names = []
+        self.columns = []
+        self.many_to_many = []
+        for name in schema.model_fields:
+            model_field = model._meta.get_field(name)
+            if model_field.many_to_many:
+                self.many_to_many.append((name, model_field))
+            else:
+                self.names.append(name)
+                self.columns.append(model_field.attname)
+        self.field_order = list(schema.model_fields)
+        if self.many_to_many:
+            self.pk_index = self.columns.index(model._meta.pk.attname)
+
+    def related_ids(self, queryset, model_field):
+        query_name = model_field.related_query_name()
+        related = model_field.related_model
+        return (
+            related._default_manager.filter(
+                **{f"{query_name}__in": queryset.values("pk")}
+            )
+            .order_by(*related._meta.ordering)
+            .values_list(query_name, "pk")
+        )
+
+    def build(self, rows, related):
+        result = []
+        for row in rows:
+            item = dict(zip(self.names, row))
+            for name, ids in related.items():
+                item[name] = ids.get(row[self.pk_index], [])
+            if related:
+                item = {name: item[name] for name in self.field_order}
+            result.append(item)
+        return result
+
+    def rows(self, queryset):
+        related = {}
+        for name, model_field in self.many_to_many:
+            related[name] = defaultdict(list)
+            for owner, pk in self.related_ids(queryset, model_field):
+                related[name][owner].append(pk)
+        return self.build(queryset.values_list(*self.columns), related)
+
+    async def arows(self, queryset):
+        related = {}
+        for name, model_field in self.many_to_many:
+            related[name] = defaultdict(list)
+            async for owner, pk in self.related_ids(queryset, model_field):
+                related[name][owner].append(pk)
+        rows = [row async for row in queryset.values_list(*self.columns)]
+        return self.build(rows, related)
+
+    def response(self, request, queryset, status=200, conditional=False):
+        # Imported here as the API module imports the views using this class
+        from quizverse_backend.urls import api
+
+        etag = None
+        if conditional:
+            unordered, aggregates = list_version(queryset)
+            etag = list_etag(request, unordered.aggregate(**aggregates))
+            if cached := not_modified(request, etag):
+                return cached
+        response = api.create_response(request, self.rows(queryset), status=status)
+        if etag:
+            response["ETag"] = etag
+        return response
+
+    async def aresponse(self, request, queryset, status=200, conditional=False):
+        from quizverse_backend.urls import api
+
+        etag = None
+        if conditional:
+            unordered, aggregates = list_version(queryset)
+            etag = list_etag(request, await unordered.aaggregate(**aggregates))
+            if cached := not_modified(request, etag):
+                return cached
+        rows = await self.arows(queryset)
+        response = api.create_response(request, rows, status=status)
+        if etag:
+            response["ETag"] = etag
+        return response
@@ -0,0 +1,123 @@
+"""
+Helpers shared by the app test suites.
+"""
+
+import datetime
+import os
+import random
+import tempfile
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import make_password
+from django.test import RequestFactory
+from django.utils import timezone
+
+from users.models import Role, User
+from utils.serializers import TrustedOutput
+
+# Characters JSON encoders are known to disagree on. NUL is left out as
+# PostgreSQL text cannot hold it, other control characters stand in for it
+TRICKY_TEXT = ['"', "\\", "/", "\n", "\t", "\x01", "\x1f", "é", "ß", "漢", "😀", " "]
+
+
+def random_text(rng, max_length=40):
+    alphabet = TRICKY_TEXT + list("abcdefghij KLMNOP 0123456789")
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length)))
+
+
+def random_moment(rng):
+    moment = timezone.now() - datetime.timedelta(
+        days=rng.randint(0, 3650), seconds=rng.randint(0, 86399)
+    )
+    # Whole seconds render without a fraction, the rest truncated to ms
+    return moment.replace(microsecond=rng.choice([0, 1000, rng.randint(1, 999999)]))
+
+
+def render(data):
+    # Imported here as the API module imports every view
+    from quizverse_backend.urls import api
+
+    request = RequestFactory().get("/")
+    return api.create_response(request, data, status=200).content
+
+
+def create_user(name, roles=(), password="password"):
+    user = User.objects.create(
+        username=f"{name}@example.com",
+        email=f"{name}@example.com",
+        password=make_password(password),
+        is_verified=True,
+    )
+    user.role.add(*[Role.objects.get_or_create(name=role)[0] for role in roles])
+    return user
+
+
+def login(client, user, password="password"):
+    """
+    Authorization header of user, logged in through the API.
+    """
+    # Imported here as the API module imports every view
+    from quizverse_backend.urls import api  # noqa: F401
+    from utils.ratelimit import get_backend
+
+    # Logins are rate limited per address, which every test shares
+    get_backend.cache_clear()
+    response = client.post(
+        "/api/v1/auth/login/",
+        {"username_or_email": user.email, "password": password},
+        content_type="application/json",
+    )
+    return {"HTTP_AUTHORIZATION": f"Bearer {response.json()['access_token']}"}
+
+
+def use_temporary_duplicate_index(test):
+    """
+    Point the near-duplicate index at a file removed after test, rather than
+    DUPLICATE_INDEX_PATH.
+    """
+    from quiz_viva import duplicates
+
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    path = os.path.join(directory.name, "question_minhash.idx")
+    patcher = mock.patch.object(duplicates, "_index", duplicates.DuplicateIndex(path))
+    patcher.start()
+    test.addCleanup(patcher.stop)
+
+
+def validated_output(schema, queryset):
+    """
+    JSON Ninja renders for a List[schema] response of queryset, every
+    instance validated by the schema.
+    """
+    return render([schema.from_orm(obj).model_dump() for obj in queryset])
+
+
+def trusted_outputs(schema, queryset):
+    """
+    JSON rendered from the sync and async TrustedOutput rows of queryset.
+    """
+    output = TrustedOutput(schema)
+    return render(output.rows(queryset)), render(async_to_sync(output.arows)(queryset))
+
+
+class TrustedOutputMixin:
+    """
+    Property check for TestCase classes: for several random seeds, fill the
+    database through populate(rng) and compare the trusted and validated
+    output of each (schema, queryset) it returns byte for byte.
+    """
+
+    seeds = range(5)
+
+    def populate(self, rng):
+        raise NotImplementedError
+
+    def test_trusted_output_is_byte_identical(self):
+        for seed in self.seeds:
+            with self.subTest(seed=seed):
+                for schema, queryset in self.populate(random.Random(seed)):
+                    expected = validated_output(schema, queryset)
+                    for actual in trusted_outputs(schema, queryset):
+                        self.assertEqual(actual, expected)
@@ -1,4 +1,9 @@
-from django.db.models import Q
+import hashlib
+
+from django.db.models import Count, Max, Q
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
+
 
 def search_queryset(queryset, search_term=None, search_fields=None):
     """
@@ -11,4 +16,44 @@ def search_queryset(queryset, search_term=None, search_fields=None):
             for term in search_term:
                 query |= Q(**{f"{field}__icontains": term})
         return queryset.filter(query)
-    return queryset
\ No newline at end of file
+    return queryset
+
+
+def list_version(queryset):
+    """
+    Aggregates identifying the current contents of a list queryset, to be
+    passed to aggregate() or aaggregate(). The row count catches deletes,
+    which do not move the updated_at maximum.
+    """
+    return queryset.order_by(), {
+        "last_updated": Max("updated_at"),
+        "total": Count("pk"),
+    }
+
+
+def list_etag(request, version):
+    auth = getattr(request, "auth", None) or {}
+    source = "|".join(
+        [
+            request.get_full_path(),
+            str(auth.get("user")),
+            str(version["last_updated"]),
+            str(version["total"]),
+        ]
+    )
+    return '"%s"' % hashlib.blake2b(source.encode(), digest_size=16).hexdigest()
+
+
+def not_modified(request, etag):
+    """
+    Return a 304 response when If-None-Match matches the given ETag.
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return None
+    etags = [tag.removeprefix("W/") for tag in parse_etags(if_none_match)]
+    if etag in etags or "*" in etags:
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+    return None